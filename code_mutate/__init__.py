@@ -1,9 +1,14 @@
 import code_ast as ca
-from code_ast.visitor import ResumingVisitorComposition
 
 from itertools import chain
 
-from .ops import init_mutation_operator
+from .ops import MutationDispatcher, ProfiledMutationDispatcher, ClassIndex, get_class_index, init_mutation_operator
+from .mutation import get_scope_index
+from .scope import ScopeFilter
+from .changes import LineFilter
+from .sampling import init_sampler
+from .syntax import SyntaxFilter
+from .stats import Stats, timer
 
 STANDARD_OPERATORS = {
     "python": [
@@ -30,21 +35,84 @@ STANDARD_OPERATORS = {
     ]
 }
 
-def mutate(source_code_or_ast, ops = None, lang = "guess", **kwargs):
-    
+def mutate(source_code_or_ast, ops = None, lang = "guess", class_index = None,
+           scope = None, module_name = None, stream = False, sample = None,
+           validate = False, lines = None, stats = None, **kwargs):
+
     if isinstance(source_code_or_ast, str):
-        source_ast = ca.ast(source_code_or_ast, lang = lang, **kwargs)
+        with timer(stats, "parse"):
+            source_ast = ca.ast(source_code_or_ast, lang = lang, **kwargs)
     else:
         source_ast = source_code_or_ast
 
     assert lang in STANDARD_OPERATORS, f"{lang} is currently not supported for mutation"
     if ops is None: ops = STANDARD_OPERATORS[lang]
 
-    mutation_visitor = ResumingVisitorComposition(
-        *[init_mutation_operator(source_ast, op) for op in ops]
-    )
-    source_ast.visit(mutation_visitor)
+    # Base classes defined in other modules
+    if class_index is not None: get_class_index(source_ast, imports = class_index)
+
+    # Only mutate definitions that match the scope pattern
+    scope_filter = None
+    if scope is not None:
+        scope_filter = ScopeFilter(scope, get_scope_index(source_ast), module_name = module_name)
+
+    # Only mutate nodes on the given lines
+    line_filter = None
+    if lines is not None:
+        line_filter = LineFilter(lines)
+
+    operators = [init_mutation_operator(source_ast, op) for op in ops]
+
+    if stats is None:
+        mutation_visitor = MutationDispatcher(
+            *operators,
+            scope_filter = scope_filter,
+            line_filter = line_filter
+        )
+    else:
+        # The scope index is otherwise built lazily by the first mutation
+        with stats.timer("scope_index"):
+            get_scope_index(source_ast)
+
+        mutation_visitor = ProfiledMutationDispatcher(
+            *operators,
+            stats = stats,
+            names = [op if isinstance(op, str) else type(operator).__name__
+                     for op, operator in zip(ops, operators)],
+            scope_filter = scope_filter,
+            line_filter = line_filter
+        )
+
+    if stream:
+        # Mutations are yielded in traversal order while the AST is visited
+        mutations = mutation_visitor.iter_mutations(source_ast.root_node())
+    else:
+        with timer(stats, "traverse"):
+            source_ast.visit(mutation_visitor)
+        mutations = chain.from_iterable(v.mutations for v in mutation_visitor.operators)
+
+    if scope_filter is not None:
+        mutations = (m for m in mutations if scope_filter.matches(m.scope))
+
+    if line_filter is not None:
+        mutations = (m for m in mutations if line_filter.matches(m))
+
+    # Drop mutants that do not parse
+    if validate:
+        if isinstance(source_code_or_ast, str):
+            syntax_filter = SyntaxFilter(source_code_or_ast, source_ast = source_ast, lang = lang)
+        else:
+            # The source code is recovered from the tree
+            syntax_filter = SyntaxFilter(source_ast = source_ast, lang = lang)
+        mutations = syntax_filter.filter(mutations)
+
+    if sample is not None:
+        mutations = init_sampler(sample).sample(mutations)
+
+    if stats is not None:
+        # Counts the emitted mutants and times the lazy traversal (stream) or selection
+        mutations = stats.count_mutants(mutations, timer = "traverse" if stream else "select")
 
-    return chain.from_iterable(v.mutations for v in mutation_visitor.visitors)
+    return mutations
     
 
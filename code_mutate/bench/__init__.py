@@ -0,0 +1,16 @@
+from .benchmarks import (
+    STAGES,
+    DEFAULT_REPEAT,
+    load_corpus,
+    corpus_fingerprint,
+    bench_parse,
+    bench_generate,
+    bench_apply,
+    bench_import,
+    run_benchmarks,
+    run_stage,
+    merge_rounds,
+    peak_memory_mb
+)
+
+from .compare import compare_results, config_mismatch
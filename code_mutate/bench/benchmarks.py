@@ -0,0 +1,366 @@
+import os
+import sys
+import time
+import json
+import shutil
+import hashlib
+import statistics
+import tempfile
+import sysconfig
+import importlib
+
+from glob import glob
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+import code_ast as ca
+
+from .. import STANDARD_OPERATORS, mutate
+from ..mutation import SourceBuffer
+from ..runners.base import mutate_imports, evict_modules
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+STAGES = ["parse", "generate", "apply", "import"]
+
+# Number of rounds in which every stage is measured. The fastest round is reported.
+DEFAULT_REPEAT = 5
+
+# Standard library modules that can be imported as a copy without side effects
+IMPORT_MODULES = ["argparse", "bisect", "calendar", "colorsys", "difflib",
+                  "fnmatch", "heapq", "shlex", "string", "textwrap"]
+
+
+def load_corpus(path : str = None, max_files : int = None):
+    """
+    Loads the Python files used as benchmark corpus
+
+    Parameters
+    ----------
+    path : str
+        Directory that is searched recursively for Python files.
+        Default: the top level modules of the standard library
+
+    max_files : int
+        Maximal number of files (in sorted order). Default: all files
+
+    Returns
+    -------
+    list[(str, str)]
+        path and source code of every file
+
+    """
+    if path is None:
+        files = glob(os.path.join(sysconfig.get_paths()["stdlib"], "*.py"))
+    else:
+        files = glob(os.path.join(path, "**", "*.py"), recursive = True)
+
+    corpus = []
+    for file_path in sorted(files):
+        if max_files is not None and len(corpus) >= max_files: break
+        try:
+            with open(file_path, "r", encoding = "utf-8") as f:
+                corpus.append((file_path, f.read()))
+        except (OSError, UnicodeDecodeError):
+            continue
+
+    return corpus
+
+
+# Stages ----------------------------------------------------------------
+
+def bench_parse(corpus):
+    """Measures parsing with `code_ast.ast`"""
+    num_lines = sum(source_code.count("\n") + 1 for _, source_code in corpus)
+
+    start_time = time.perf_counter()
+    for _, source_code in corpus:
+        ca.ast(source_code, lang = "python")
+    duration = time.perf_counter() - start_time
+
+    return {
+        "seconds": duration,
+        "files": len(corpus),
+        "lines": num_lines,
+        "files_per_sec": _rate(len(corpus), duration),
+        "lines_per_sec": _rate(num_lines, duration),
+    }
+
+
+def bench_generate(corpus, ops = None):
+    """Measures `mutate` with all operators and with every single operator (excluding parsing)"""
+    if ops is None: ops = STANDARD_OPERATORS["python"]
+
+    def _generate(operators):
+        duration, num_mutants = 0.0, 0
+        for _, source_code in corpus:
+            # Every run starts from a fresh AST without memoized indices
+            source_ast = ca.ast(source_code, lang = "python")
+
+            start_time = time.perf_counter()
+            num_mutants += sum(1 for _ in mutate(source_ast, ops = operators, lang = "python"))
+            duration += time.perf_counter() - start_time
+
+        return {"seconds": duration, "mutants": num_mutants,
+                "mutants_per_sec": _rate(num_mutants, duration)}
+
+    result = _generate(ops)
+    result["ops"] = list(ops)
+    result["operators"] = {op: _generate([op]) for op in ops}
+    return result
+
+
+def bench_apply(corpus, ops = None, max_mutants : int = None):
+    """Measures `Mutation.apply` and `Mutation.unified_diff` per mutant"""
+    per_file = None
+    if max_mutants is not None: per_file = max(1, max_mutants // max(1, len(corpus)))
+
+    mutants = []
+    for file_path, source_code in corpus:
+        file_mutants = list(mutate(source_code, ops = ops, lang = "python"))
+        mutants.append((file_path, SourceBuffer(source_code), file_mutants[:per_file]))
+    num_mutants = sum(len(file_mutants) for _, _, file_mutants in mutants)
+
+    start_time = time.perf_counter()
+    for _, buffer, file_mutants in mutants:
+        for mutant in file_mutants:
+            mutant.apply(buffer)
+    apply_duration = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for file_path, buffer, file_mutants in mutants:
+        for mutant in file_mutants:
+            mutant.unified_diff(buffer, fromfile = file_path, tofile = file_path)
+    diff_duration = time.perf_counter() - start_time
+
+    return {
+        "mutants": num_mutants,
+        "apply": {"seconds": apply_duration, "mutants_per_sec": _rate(num_mutants, apply_duration)},
+        "diff": {"seconds": diff_duration, "mutants_per_sec": _rate(num_mutants, diff_duration)},
+    }
+
+
+def bench_import(modules = None, ops = None, max_mutants : int = 200):
+    """
+    Measures loading mutated modules via `mutate_imports` and `MutationLoader`
+
+    Copies of the given standard library modules are imported once per
+    mutant. The overhead is the difference to importing the unmutated copy
+    (from its bytecode cache) and includes applying and compiling the mutant.
+    """
+    if modules is None: modules = IMPORT_MODULES
+    stdlib = sysconfig.get_paths()["stdlib"]
+
+    temp_dir = tempfile.mkdtemp(prefix = "cmutate_bench_")
+    sys.path.insert(0, temp_dir)
+
+    try:
+        targets = []
+        for module in modules:
+            origin = os.path.join(stdlib, f"{module}.py")
+            if not os.path.isfile(origin): continue
+
+            module_name = f"_cmutate_bench_{module}"
+            shutil.copyfile(origin, os.path.join(temp_dir, f"{module_name}.py"))
+            with open(origin, "r", encoding = "utf-8") as f:
+                targets.append((module_name, list(mutate(f.read(), ops = ops, lang = "python"))))
+
+        per_module = max(1, max_mutants // max(1, len(targets)))
+        importlib.invalidate_caches()
+
+        plain_duration, num_plain = 0.0, 0
+        for module_name, _ in targets:
+            for _ in range(3):
+                evict_modules(module_name)
+                start_time = time.perf_counter()
+                importlib.import_module(module_name)
+                plain_duration += time.perf_counter() - start_time
+                num_plain += 1
+            evict_modules(module_name)
+
+        duration, num_mutants, num_failed = 0.0, 0, 0
+        for module_name, mutants in targets:
+            for mutant in mutants[:per_module]:
+                start_time = time.perf_counter()
+                try:
+                    with mutate_imports(module_name, mutant):
+                        importlib.import_module(module_name)
+                except Exception:
+                    # Mutants might fail during compilation or module execution
+                    num_failed += 1
+                duration += time.perf_counter() - start_time
+                num_mutants += 1
+
+    finally:
+        sys.path.remove(temp_dir)
+        shutil.rmtree(temp_dir, ignore_errors = True)
+
+    plain_import = plain_duration / max(1, num_plain)
+    mutant_import = duration / max(1, num_mutants)
+
+    return {
+        "seconds": duration,
+        "mutants": num_mutants,
+        "failed": num_failed,
+        "mutants_per_sec": _rate(num_mutants, duration),
+        "plain_import_seconds": plain_import,
+        "mutant_import_seconds": mutant_import,
+        "overhead_seconds": mutant_import - plain_import,
+    }
+
+
+def run_benchmarks(corpus, stages = None, ops = None, max_mutants : int = None, isolate : bool = True,
+                   repeat : int = DEFAULT_REPEAT, max_files : int = None):
+    """
+    Runs the selected benchmark stages
+
+    Every stage runs in a fresh interpreter by default. Hence, the peak
+    memory of a stage does not include the memory of earlier stages.
+
+    All stages are measured in `repeat` rounds. Load on the machine only
+    slows a measurement down and often lasts longer than a single stage.
+    Therefore, the rounds are spread over the whole run and every timed
+    measurement is reported from its fastest round together with the
+    spread of all rounds.
+
+    Parameters
+    ----------
+    corpus : list[(str, str)]
+        Files used for parsing, generation and application (see `load_corpus`)
+
+    stages : list[str]
+        Subset of `STAGES`. Default: all stages
+
+    ops : list[str]
+        Operators that are benchmarked. Default: all standard operators
+
+    max_mutants : int
+        Maximal number of mutants for the apply and import stages. Default: 2000 / 200
+
+    isolate : bool
+        Whether every stage runs in a separate process. Default: True
+
+    repeat : int
+        Number of rounds. Default: 5
+
+    max_files : int
+        Limit that was used to load the corpus. Only recorded in the results.
+
+    Returns
+    -------
+    dict
+        JSON serializable results with throughput (`*_per_sec`),
+        time per operator and peak memory. The `config` entry identifies
+        the corpus and the settings that the results can be compared with.
+
+    """
+    if stages is None: stages = STAGES
+    if repeat < 1: raise ValueError(f"Repeat has to be positive: {repeat}")
+
+    results = {
+        "python": sys.version.split()[0],
+        "config": {
+            "corpus": corpus_fingerprint(corpus),
+            "max_files": max_files,
+            "max_mutants": max_mutants,
+            "ops": list(ops if ops is not None else STANDARD_OPERATORS["python"]),
+            "python": sys.version.split()[0],
+        },
+        "corpus": {"files": len(corpus), "lines": sum(source_code.count("\n") + 1 for _, source_code in corpus)},
+        "repeat": repeat,
+        "stages": {},
+    }
+
+    for stage in stages:
+        if stage not in STAGES: raise ValueError(f"Unknown benchmark stage {stage}")
+
+    rounds = {stage: [] for stage in stages}
+    for _ in range(repeat):
+        for stage in stages:
+            if isolate:
+                with ProcessPoolExecutor(max_workers = 1, mp_context = get_context("spawn")) as executor:
+                    result = executor.submit(run_stage, stage, corpus, ops, max_mutants).result()
+            else:
+                result = run_stage(stage, corpus, ops, max_mutants)
+            rounds[stage].append(result)
+
+    for stage in stages:
+        results["stages"][stage] = merge_rounds(rounds[stage])
+
+    stage_memory = [result["peak_memory_mb"] for result in results["stages"].values()
+                    if result["peak_memory_mb"] is not None]
+    results["peak_memory_mb"] = max(stage_memory, default = None)
+    return results
+
+
+def run_stage(stage, corpus, ops = None, max_mutants : int = None):
+    """Runs a single benchmark stage and records the peak memory of the process"""
+    if stage == "parse":
+        result = bench_parse(corpus)
+    elif stage == "generate":
+        result = bench_generate(corpus, ops = ops)
+    elif stage == "apply":
+        result = bench_apply(corpus, ops = ops, max_mutants = max_mutants or 2000)
+    elif stage == "import":
+        result = bench_import(ops = ops, max_mutants = max_mutants or 200)
+    else:
+        raise ValueError(f"Unknown benchmark stage {stage}")
+
+    result["peak_memory_mb"] = peak_memory_mb()
+    return result
+
+
+def merge_rounds(rounds):
+    """
+    Merges the results of a stage measured in several rounds
+
+    Every timed measurement (a dict with `seconds`) is taken from its fastest
+    round and extended by `median_seconds` and the relative `spread` of the
+    rounds (median / fastest - 1). The peak memory is the maximum of all rounds.
+    """
+    first = rounds[0]
+    merged = dict(first)
+
+    if "seconds" in first:
+        durations = [result["seconds"] for result in rounds]
+        fastest, median = min(durations), statistics.median(durations)
+        merged.update((key, value) for key, value in rounds[durations.index(fastest)].items()
+                      if not isinstance(value, dict))
+        merged["median_seconds"] = median
+        merged["spread"] = median / fastest - 1 if fastest > 0 else 0.0
+
+    for key, value in first.items():
+        if isinstance(value, dict):
+            merged[key] = merge_rounds([result[key] for result in rounds])
+
+    memory = [result["peak_memory_mb"] for result in rounds if result.get("peak_memory_mb") is not None]
+    if memory: merged["peak_memory_mb"] = max(memory)
+
+    return merged
+
+
+def corpus_fingerprint(corpus):
+    """Hash of the file names (relative to the corpus directory) and contents of a corpus"""
+    root = os.path.commonpath([os.path.dirname(file_path) for file_path, _ in corpus]) if corpus else ""
+    files = [(os.path.relpath(file_path, root), source_code) for file_path, source_code in corpus]
+    return hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()
+
+
+# Utils ----------------------------------------------------------------
+
+def _rate(count, duration):
+    return count / duration if duration > 0 else 0.0
+
+
+def peak_memory_mb():
+    """Returns the peak resident memory of the process in megabytes (or None if unsupported)"""
+    if resource is None: return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    if sys.platform == "darwin": return peak / (1024 * 1024)
+    return peak / 1024
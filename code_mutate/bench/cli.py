@@ -0,0 +1,86 @@
+import sys
+import json
+import argparse
+
+from .. import STANDARD_OPERATORS
+from .benchmarks import STAGES, DEFAULT_REPEAT, load_corpus, run_benchmarks
+from .compare import compare_results, config_mismatch
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(prog="cmutate-bench")
+    parser.add_argument("--corpus", default = None, type = str,
+                        help = "directory with Python files (default: top level modules of the standard library)")
+    parser.add_argument("--max-files", default = 50, type = int,
+                        help = "maximal number of corpus files (default: 50, 0 = all)")
+    parser.add_argument("--stages", default = STAGES, nargs = "+", choices = STAGES,
+                        help = "benchmark stages to run (default: all)")
+    parser.add_argument("--ops", default = None, nargs = "+", choices = STANDARD_OPERATORS["python"],
+                        help = "mutation operators to benchmark (default: all)")
+    parser.add_argument("--max-mutants", default = None, type = int,
+                        help = "maximal number of mutants for the apply and import stages")
+    parser.add_argument("--repeat", default = DEFAULT_REPEAT, type = int,
+                        help = f"number of rounds in which every stage is measured. The fastest round is reported. (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--in-process", action = "store_true",
+                        help = "run all stages in this process (peak memory then accumulates over the stages)")
+    parser.add_argument("-o", "--output", default = None, type = str,
+                        help = "write the results as JSON to this file instead of stdout")
+    parser.add_argument("--baseline", default = None, type = str,
+                        help = "JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", default = 0.2, type = float,
+                        help = "relative slowdown or memory growth that counts as regression. "
+                               "The spread of the repetitions is added for throughputs. (default: 0.2)")
+
+    config = parser.parse_args()
+
+    if config.repeat < 1:
+        parser.error("--repeat has to be positive")
+
+    return config
+
+
+def print_comparison(comparison):
+    for entry in comparison:
+        marker = "REGRESSION" if entry["regressed"] else "ok"
+        print(f"{entry['metric']:<50} {entry['baseline']:>14.2f} {entry['current']:>14.2f} "
+              f"{100 * entry['change']:>+8.1f}%  {marker}", file = sys.stderr)
+
+
+def main():
+    config = parse_arguments()
+
+    baseline = None
+    if config.baseline:
+        with open(config.baseline, "r") as f:
+            baseline = json.load(f)
+
+    corpus  = load_corpus(config.corpus, max_files = config.max_files or None)
+    results = run_benchmarks(corpus, stages = config.stages, ops = config.ops,
+                             max_mutants = config.max_mutants, isolate = not config.in_process,
+                             repeat = config.repeat, max_files = config.max_files or None)
+
+    output = json.dumps(results, indent = 2)
+    if config.output:
+        with open(config.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if baseline is not None:
+        mismatch = config_mismatch(results, baseline)
+        if mismatch:
+            print(f"Cannot compare against {config.baseline}: the results differ in {', '.join(mismatch)}. "
+                  "Record a new baseline with the same corpus and settings.", file = sys.stderr)
+            sys.exit(2)
+
+        comparison = compare_results(results, baseline, threshold = config.threshold)
+        print_comparison(comparison)
+
+        num_regressions = sum(entry["regressed"] for entry in comparison)
+        if num_regressions > 0:
+            print(f"{num_regressions} metrics regressed by more than {100 * config.threshold:g}%", file = sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
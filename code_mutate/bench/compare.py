@@ -0,0 +1,81 @@
+# Settings that have to be equal to compare two results
+CONFIG_KEYS = ["corpus", "max_files", "max_mutants", "ops", "python"]
+
+
+def config_mismatch(current : dict, baseline : dict):
+    """Returns the settings (see `CONFIG_KEYS`) in which two benchmark results differ"""
+    current_config, baseline_config = current.get("config"), baseline.get("config")
+    if current_config is None or baseline_config is None: return list(CONFIG_KEYS)
+
+    return [key for key in CONFIG_KEYS
+            if current_config.get(key) != baseline_config.get(key)]
+
+
+def compare_results(current : dict, baseline : dict, threshold : float = 0.2):
+    """
+    Compares benchmark results against a baseline
+
+    Throughput metrics (`*_per_sec`) regress if they drop by more than the
+    tolerance. Memory metrics (`peak_memory_mb`) regress if they grow by more
+    than the tolerance. The tolerance of a throughput is the threshold plus
+    the larger spread of its repetitions in both runs. Metrics missing in one
+    of the results are ignored.
+
+    Parameters
+    ----------
+    current : dict
+        Results of `run_benchmarks`
+
+    baseline : dict
+        Stored results of an earlier run
+
+    threshold : float
+        Relative tolerance, e.g. 0.2 for 20%. Default: 0.2
+
+    Returns
+    -------
+    list[dict]
+        compared metrics with name, baseline, current value,
+        relative change and whether the metric regressed
+
+    Raises
+    ------
+    ValueError
+        if the results were measured on different corpora or with different settings
+
+    """
+    mismatch = config_mismatch(current, baseline)
+    if mismatch:
+        raise ValueError(f"Cannot compare benchmark results with different settings: {', '.join(mismatch)}")
+
+    comparison = []
+
+    for name, base_value, value, spread in _common_metrics(current, baseline):
+        if name.endswith("_per_sec"):
+            tolerance = threshold + spread
+            regressed = value < base_value * (1 - tolerance)
+        elif name.endswith("peak_memory_mb"):
+            regressed = value > base_value * (1 + threshold)
+        else:
+            continue
+
+        change = (value - base_value) / base_value if base_value else 0.0
+        comparison.append({"metric": name, "baseline": base_value, "current": value,
+                           "change": change, "regressed": regressed})
+
+    return comparison
+
+
+def _common_metrics(current, baseline, prefix = ""):
+    # Spread of the repeated measurements that the metrics of this level are derived from
+    spread = max(current.get("spread", 0.0), baseline.get("spread", 0.0))
+
+    for key, value in current.items():
+        if key not in baseline: continue
+        base_value = baseline[key]
+        name = f"{prefix}{key}"
+
+        if isinstance(value, dict) and isinstance(base_value, dict):
+            yield from _common_metrics(value, base_value, prefix = f"{name}.")
+        elif isinstance(value, (int, float)) and isinstance(base_value, (int, float)):
+            yield name, base_value, value, spread
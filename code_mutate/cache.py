@@ -0,0 +1,147 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+from importlib import metadata
+
+from . import STANDARD_OPERATORS
+from .mutation import Mutation
+
+
+DEFAULT_CACHE_PATH = ".cmutate.db"
+
+
+class ResultCache:
+    """
+    Persistent cache for generated mutants and their test results
+
+    Mutants are cached per file content hash and operator set. Test results
+    are cached per mutant and fingerprint of the executed tests. Both keys
+    include the version of code_mutate such that entries of other versions
+    are not reused. The cache is stored in a local SQLite database and can be
+    shared between processes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the SQLite database. Default: .cmutate.db
+
+    """
+
+    def __init__(self, path : str = DEFAULT_CACHE_PATH):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout = 60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS mutants (file_hash TEXT, ops TEXT, mutants TEXT, "
+                "PRIMARY KEY (file_hash, ops))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT)"
+            )
+        return self._connection
+
+    # Mutants ----------------------------------------------------------------
+
+    def load_mutants(self, file_hash : str, ops):
+        ops_key = _ops_key(ops)
+        if ops_key is None: return None
+
+        row = self.connection.execute(
+            "SELECT mutants FROM mutants WHERE file_hash = ? AND ops = ?", (file_hash, ops_key)
+        ).fetchone()
+        if row is None: return None
+
+        return [Mutation(tuple(source_pos), target_text, op_type = op_type, scope = scope)
+                for source_pos, target_text, op_type, scope in json.loads(row[0])]
+
+    def store_mutants(self, file_hash : str, ops, mutations):
+        ops_key = _ops_key(ops)
+        if ops_key is None: return
+
+        mutants = json.dumps([(list(m.source_pos), m.target_text, m.op_type, m.scope)
+                              for m in mutations])
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mutants VALUES (?, ?, ?)", (file_hash, ops_key, mutants)
+            )
+
+    # Results ----------------------------------------------------------------
+
+    def load_result(self, key : str):
+        row = self.connection.execute(
+            "SELECT result FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None: return None
+
+        return json.loads(row[0])
+
+    def store_result(self, key : str, result : dict):
+        result = json.dumps(result)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?)", (key, result)
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __getstate__(self):
+        # Every process opens its own connection
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+
+# Hashing ----------------------------------------------------------------
+
+def hash_text(text : str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+_FILE_HASHES = {}
+
+def hash_file(path : str) -> str:
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _FILE_HASHES.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        file_hash = hashlib.sha256(f.read()).hexdigest()
+
+    _FILE_HASHES[path] = (version, file_hash)
+    return file_hash
+
+
+def mutant_key(file_hash : str, mutation : Mutation, tests_hash : str = "") -> str:
+    key = json.dumps([TOOL_VERSION, file_hash, list(mutation.source_pos), mutation.target_text,
+                      mutation.op_type, tests_hash])
+    return hash_text(key)
+
+
+def _ops_key(ops):
+    if ops is None: ops = STANDARD_OPERATORS["python"]
+    if not all(isinstance(op, str) for op in ops): return None
+    return f"{TOOL_VERSION}:{','.join(ops)}"
+
+
+def _tool_version():
+    try:
+        return metadata.version("cmutate")
+    except metadata.PackageNotFoundError:
+        # Running from a source tree
+        return "dev"
+
+
+TOOL_VERSION = _tool_version()
@@ -0,0 +1,138 @@
+"""
+Changed lines
+
+Reads the lines changed since a git revision such that only
+mutants on changed lines are generated (e.g. for pull requests).
+"""
+
+import os
+import re
+import subprocess
+
+from bisect import bisect_left
+
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def changed_lines(rev : str, cwd : str = None):
+    """
+    Returns the lines that changed between a git revision and the working tree
+
+    Parameters
+    ----------
+    rev : str
+        Git revision the working tree is compared to (e.g. `main` or `HEAD~1`)
+
+    cwd : str
+        Directory inside the git repository. Paths are relative to it
+        and changes outside of it are ignored. Default: working directory
+
+    Returns
+    -------
+    dict[str, list[(int, int)]]
+        changed line ranges (one-based, inclusive) per file path.
+        Untracked files are completely new and map to None.
+
+    """
+    diff = _git(["diff", "-U0", "--no-color", "--no-ext-diff", "--relative", rev, "--"], cwd)
+    changes = parse_unified_diff(diff)
+
+    untracked = _git(["ls-files", "--others", "--exclude-standard"], cwd)
+    for file_path in untracked.splitlines():
+        changes[os.path.normpath(file_path)] = None
+
+    return changes
+
+
+def parse_unified_diff(diff : str):
+    """Parses the line ranges of the new files from a unified diff (see `changed_lines`)"""
+    changes = {}
+    ranges  = None
+    pending = 0
+
+    for line in diff.splitlines():
+        if pending > 0:
+            # Lines of a hunk are skipped since they might look like headers (e.g. an added "++ x")
+            if line.startswith(("+", "-")): pending -= 1
+            elif line.startswith(" "): pending -= 2
+            continue
+
+        if line.startswith("+++ "):
+            file_path = line[4:].strip().strip('"')
+            if file_path == "/dev/null":
+                # Deleted files have no lines to mutate
+                ranges = None
+                continue
+            if file_path.startswith("b/"): file_path = file_path[2:]
+            ranges = changes.setdefault(os.path.normpath(file_path), [])
+            continue
+
+        match = _HUNK_HEADER.match(line)
+        if match is None: continue
+
+        old_count = int(match.group(1)) if match.group(1) is not None else 1
+        start = int(match.group(2))
+        count = int(match.group(3)) if match.group(3) is not None else 1
+        pending = old_count + count
+
+        if ranges is None: continue
+
+        if count == 0:
+            # Lines were deleted after start. The lines around them changed their context.
+            ranges.append((max(start, 1), start + 1))
+        else:
+            ranges.append((start, start + count - 1))
+
+    return changes
+
+
+def _git(args, cwd = None):
+    try:
+        process = subprocess.run(["git", "-c", "core.quotePath=false", *args], cwd = cwd,
+                                 capture_output = True, text = True)
+    except FileNotFoundError:
+        raise RuntimeError("Cannot read changed lines since git is not installed")
+
+    if process.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {process.stderr.strip()}")
+
+    return process.stdout
+
+
+class LineFilter:
+    """
+    Selects mutations and AST subtrees that touch the given lines
+
+    Parameters
+    ----------
+    ranges : list[(int, int)]
+        Line ranges (one-based, inclusive)
+
+    """
+
+    def __init__(self, ranges):
+        # Merged zero-based ranges
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start - 1 <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end - 1)
+            else:
+                merged.append([start - 1, end - 1])
+
+        self.starts = [start for start, _ in merged]
+        self.ends   = [end for _, end in merged]
+
+    def intersects(self, start_line : int, end_line : int) -> bool:
+        """Checks whether the zero-based line span intersects one of the ranges"""
+        index = bisect_left(self.ends, start_line)
+        return index < len(self.starts) and self.starts[index] <= end_line
+
+    def matches(self, mutation) -> bool:
+        """Checks whether the mutation touches one of the lines"""
+        start_line, _, end_line, _ = mutation.source_pos
+        return self.intersects(start_line, end_line)
+
+    def may_contain(self, node) -> bool:
+        """Checks whether the subtree rooted at node may contain selected mutations"""
+        return self.intersects(node.start_point[0], node.end_point[0])
@@ -1,16 +1,139 @@
 import os
+import sys
 import argparse
 
 from glob import iglob
 
-from . import mutate
+import code_ast as ca
+
+from . import mutate, STANDARD_OPERATORS
+from .ops import ModuleClasses, CLASS_INDEX_OPERATORS, imported_class_index
+from .mutation import SourceBuffer
+from .scope import ScopeFilter, match_scope
+from .sampling import init_sampler
+from .equivalence import EquivalenceFilter
+from .syntax import SyntaxFilter
+from .changes import LineFilter, changed_lines
+from .runners import (
+    TestResult,
+    UnittestRunner,
+    ForkServerRunner,
+    CoverageGuidedRunner,
+    CachedRunner,
+    CalibratedTimeoutRunner,
+    PrioritizedRunner,
+    AdaptiveCampaign,
+    Coordinator,
+    Worker,
+    run_mutants
+)
+from .schemata import MutantSchemata
+from .cache import DEFAULT_CACHE_PATH, ResultCache, hash_file, hash_text
+from .history import DEFAULT_HISTORY_PATH, KillHistory
+from .journal import DEFAULT_JOURNAL_PATH, Journal, mutant_id
+from .parallel import imap_bounded
+from .stats import Stats, timer
 
 def parse_arguments():
     parser = argparse.ArgumentParser(prog="cmutate")
     parser.add_argument("-t", "--target", required=True, type = str)
     parser.add_argument("-s", "--scope", default = None, type = str)
+    parser.add_argument("--since", default = None, type = str, metavar = "REV",
+                        help = "only mutate lines that changed since the given git revision (e.g. main)")
+    parser.add_argument("-j", "--jobs", default = 1, type = int,
+                        help = "number of worker processes used to generate mutants and run tests (0 = one per CPU)")
+    parser.add_argument("--timeout", default = -1, type = float,
+                        help = "timeout per mutant in seconds")
+    _add_runner_arguments(parser)
+    parser.add_argument("--serve", default = None, type = str, metavar = "ADDRESS",
+                        help = "distribute the mutants to `cmutate worker` processes connecting to HOST:PORT or unix:PATH")
+    parser.add_argument("--journal", nargs = "?", default = None, const = DEFAULT_JOURNAL_PATH,
+                        help = f"append the verdict of every mutant to a journal (default: {DEFAULT_JOURNAL_PATH})")
+    parser.add_argument("--resume", action = "store_true",
+                        help = "skip mutants whose verdict is already recorded in the journal")
+    parser.add_argument("--validate", action = "store_true",
+                        help = "drop mutants that do not parse")
+    parser.add_argument("--tce", action = "store_true",
+                        help = "drop mutants that compile to the same bytecode as the original or an earlier mutant")
+    parser.add_argument("--ci-width", default = None, type = float,
+                        help = "run mutants in random order until the confidence interval of the score is narrower than this width (e.g. 0.1)")
+    parser.add_argument("--budget", default = None, type = float,
+                        help = "stop running mutants in random order after this many seconds")
+    parser.add_argument("--confidence", default = 0.95, type = float,
+                        help = "confidence level of the estimated mutation score (default: 0.95)")
+    parser.add_argument("--sample", default = None, type = _parse_sample,
+                        help = "fraction of mutants (e.g. 0.1) or number of mutants per file (e.g. 20)")
+    parser.add_argument("--sample-by", default = None, choices = ["operator", "scope"],
+                        help = "draw the number of mutants given by --sample per operator or per scope")
+    parser.add_argument("--seed", default = 0, type = int,
+                        help = "seed for sampling mutants")
+    parser.add_argument("--profile", action = "store_true",
+                        help = "print where the time of mutant generation and execution goes")
+
+    config = parser.parse_args()
+
+    if config.sample_by is not None and not isinstance(config.sample, int):
+        parser.error("--sample-by requires a count for --sample (e.g. --sample 20)")
+
+    if config.serve and (config.ci_width is not None or config.budget is not None):
+        parser.error("--serve cannot be combined with --ci-width or --budget")
+
+    return config
+
+
+def parse_worker_arguments(argv):
+    parser = argparse.ArgumentParser(prog="cmutate worker")
+    parser.add_argument("address", type = str,
+                        help = "address of the coordinator started with `cmutate --serve` (HOST:PORT or unix:PATH)")
+    parser.add_argument("--batch-size", default = 8, type = int,
+                        help = "number of mutants requested at once (default: 8)")
+    _add_runner_arguments(parser, tests_required = True)
+
+    return parser.parse_args(argv)
 
-    return parser.parse_args()
+
+def _add_runner_arguments(parser, tests_required = False):
+    parser.add_argument("--tests", default = None, nargs = "+", type = str, required = tests_required,
+                        help = "unittest modules, classes or methods that are run for each mutant")
+    parser.add_argument("--timeout-factor", default = None, type = float,
+                        help = "derive the timeout per mutant as factor * test time on the unmutated code + --timeout-constant (implies --fork-server)")
+    parser.add_argument("--timeout-constant", default = 1.0, type = float,
+                        help = "seconds added to the calibrated timeout (default: 1.0)")
+    parser.add_argument("--memory-limit", default = None, type = float,
+                        help = "maximal memory per mutant in megabytes (implies --fork-server)")
+    parser.add_argument("--cpu-limit", default = None, type = float,
+                        help = "maximal CPU time per mutant in seconds (implies --fork-server)")
+    parser.add_argument("--fork-server", action = "store_true",
+                        help = "import the tests once and fork a process per mutant")
+    parser.add_argument("--failfast", action = "store_true",
+                        help = "stop the tests of a mutant at the first failing test")
+    parser.add_argument("--history", nargs = "?", default = None, const = DEFAULT_HISTORY_PATH,
+                        help = f"run the tests that killed mutants on the same line or of the same operator first (default: {DEFAULT_HISTORY_PATH})")
+    parser.add_argument("--schemata", action = "store_true",
+                        help = "compile all mutants of a module into a single switchable module")
+    parser.add_argument("--coverage", action = "store_true",
+                        help = "only run the tests that cover the mutated lines")
+    parser.add_argument("--cache", nargs = "?", default = None, const = DEFAULT_CACHE_PATH,
+                        help = f"reuse mutants and test results of unchanged code (default: {DEFAULT_CACHE_PATH})")
+
+
+def _parse_sample(value):
+    try:
+        count = int(value)
+    except ValueError:
+        pass
+    else:
+        if count < 1: raise argparse.ArgumentTypeError(f"expected a positive count but got {value}")
+        return count
+
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a fraction or a count but got {value}")
+
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"expected a fraction in (0, 1] but got {value}")
+    return fraction
 
 
 def guess_package_roots():
@@ -54,74 +177,405 @@ def walk_all_paths(start_prefix = None):
 
 def walk_all_modules(start_prefix = None):
     for file_path in walk_all_paths(start_prefix = start_prefix):
-        module = file_path
-        if os.path.basename(module) == "__init__.py":
-            module = os.path.dirname(module)
-        module = module.replace(os.sep, ".").replace(".py", "")
-        yield module, file_path
-
-
-# Module matching ---------------------
+        yield path_to_module(file_path), file_path
 
-def _match_module_name(pattern, module_name):
-    pattern = pattern.split(".") or []
-    module  = module_name.split(".") or []
 
-    positions = [(0, 0)]
-    while len(positions) > 0:
-        pi, mi = positions.pop(0)
-
-        if pi >= len(pattern) and mi >= len(module):
-            return True
-        
-        if pi >= len(pattern) or mi >= len(module): continue
-
-        if pattern[pi] == module[mi] or pattern[pi] == "*":
-            positions.append((pi + 1, mi + 1))
-        elif pattern[pi] == "**":
-            positions.append((pi + 1, mi + 1))
-            positions.append((pi, mi + 1))
-    
-    return False
+def path_to_module(file_path):
+    """Dotted name of the module in file_path relative to the working directory (e.g. ./calc/ops.py -> calc.ops)"""
+    module = os.path.normpath(os.path.relpath(file_path))
+    if os.path.basename(module) == "__init__.py":
+        module = os.path.dirname(module)
+    else:
+        module = os.path.splitext(module)[0]
+    return module.replace(os.sep, ".")
 
 
 # --------------------------------------
 
-def main():
-    config = parse_arguments()
-
+def generate_mutants(config, stats = None, profile = None):
     if os.path.exists(config.target):
-        modules = walk_all_modules(start_prefix=config.target)
+        modules = list(walk_all_modules(start_prefix=config.target))
         config.target = "*"
     else:
-        modules = walk_all_modules()
+        modules = list(walk_all_modules())
 
     if config.target != "*":
-        modules = filter(lambda module_file: _match_module_name(config.target, module_file[0]),
+        modules = filter(lambda module_file: match_scope(config.target, module_file[0]),
                          modules)
 
-    num_mutants = 0 
-    for module, file_path in modules:
-        with open(file_path, "r") as f:
-            content = f.read()
+    # Skip files without changes
+    changes = None
+    if config.since is not None:
+        changes = changed_lines(config.since)
+        modules = filter(lambda module_file: os.path.normpath(module_file[1]) in changes,
+                         modules)
+
+    cache = ResultCache(config.cache) if config.cache else None
+    sampler = init_sampler(config.sample, by = config.sample_by, seed = config.seed)
+    tasks = ((module, file_path, config.scope, cache, sampler, config.validate, config.tce,
+              changes[os.path.normpath(file_path)] if changes is not None else None,
+              profile is not None)
+             for module, file_path in modules)
+
+    if config.jobs == 1:
+        file_mutants = map(_generate_file_mutants, tasks)
+    else:
+        jobs = config.jobs if config.jobs > 0 else (os.cpu_count() or 1)
+        file_mutants = (result for _, result in imap_bounded(_generate_file_mutants, tasks, jobs))
+
+    for module, file_path, mutants, removed, file_stats in file_mutants:
+        if stats is not None:
+            for key, count in removed.items():
+                stats[key] = stats.get(key, 0) + count
+
+        if profile is not None and file_stats is not None:
+            profile.merge(file_stats)
 
-        for mutant in mutate(content, lang = "python"):
+        for precise_module, mutant, diff in mutants:
+            yield module, file_path, precise_module, mutant, diff
+
+
+def _generate_file_mutants(task):
+    module, file_path, scope, cache, sampler, validate, tce, lines, profile = task
+
+    # Skip files that cannot contain the selected scope
+    if scope and not match_scope(scope, module, prefix = True):
+        return module, file_path, [], {}, None
+
+    with open(file_path, "r") as f:
+        content = f.read()
+
+    buffer = SourceBuffer(content)
+    output = []
+    syntax = SyntaxFilter(buffer) if validate else None
+    equivalence = EquivalenceFilter(buffer) if tce else None
+    stats = Stats() if profile else None
+
+    # Mutants of the same function share their qualified name and scope match
+    precise_modules = {}
+    for mutant in _load_or_mutate(content, file_path, cache, module = module, scope = scope,
+                                  sampler = sampler, lines = lines, stats = stats):
+        try:
+            precise_module = precise_modules[mutant.scope]
+        except KeyError:
             precise_module = module
-            if mutant.scope: 
+            if mutant.scope:
                 precise_module = ".".join([precise_module, mutant.scope])
+            if scope and not match_scope(scope, precise_module):
+                precise_module = None
+            precise_modules[mutant.scope] = precise_module
+
+        if precise_module is None: continue
+
+        if syntax is not None:
+            with timer(stats, "validate"):
+                valid = syntax.check(mutant)
+            if not valid: continue
+
+        if equivalence is not None:
+            with timer(stats, "tce"):
+                equivalent = equivalence.check(mutant)
+            if equivalent is not None: continue
+
+        with timer(stats, "diff"):
+            diff = mutant.unified_diff(buffer,
+                                       fromfile=file_path,
+                                       tofile=file_path)
+        output.append((precise_module, mutant, diff))
+
+    removed = {}
+    if syntax is not None:
+        removed["invalid"] = syntax.invalid
+    if equivalence is not None:
+        removed.update(equivalent = equivalence.equivalent, duplicate = equivalence.duplicate)
+
+    return module, file_path, output, removed, stats
+
+
+def _load_or_mutate(content, file_path, cache = None, module = None, scope = None, sampler = None, lines = None,
+                    stats = None, ops = None):
+    source_code, class_index = content, None
+
+    # Inheritance operators look up base classes in the modules imported by the file
+    if module is not None and _uses_class_index(ops):
+        with timer(stats, "parse"):
+            source_code = ca.ast(content, lang = "python")
+        with timer(stats, "class_index"):
+            class_index = file_class_index(source_code, module, file_path)
+
+    if cache is None:
+        return mutate(source_code, ops = ops, lang = "python", scope = scope, module_name = module, sample = sampler,
+                      lines = lines, stats = stats, class_index = class_index)
+
+    # The cache stores all mutants of a file. Scope, lines and sample are applied afterwards.
+    # Inheritance mutants also depend on the imported base classes.
+    file_hash = hash_file(file_path)
+    if class_index is not None:
+        file_hash = hash_text(f"{file_hash}:{class_index.fingerprint()}")
+
+    with timer(stats, "cache"):
+        mutants = cache.load_mutants(file_hash, ops)
+
+    if mutants is None:
+        mutants = list(mutate(source_code, ops = ops, lang = "python", stats = stats, class_index = class_index))
+        with timer(stats, "cache"):
+            cache.store_mutants(file_hash, ops, mutants)
+
+    if scope:
+        scope_filter = ScopeFilter(scope, None, module_name = module)
+        mutants = [mutant for mutant in mutants if scope_filter.matches(mutant.scope)]
+
+    if lines is not None:
+        line_filter = LineFilter(lines)
+        mutants = [mutant for mutant in mutants if line_filter.matches(mutant)]
+
+    if sampler is not None:
+        mutants = sampler.sample(mutants)
+
+    return mutants
+
+
+def _uses_class_index(ops):
+    if ops is None: ops = STANDARD_OPERATORS["python"]
+    return any(op in CLASS_INDEX_OPERATORS for op in ops)
+
+
+def file_class_index(source_ast, module : str, file_path : str):
+    """Resolves the base classes of a module that are defined in the project files it imports"""
+    is_package = os.path.basename(file_path) == "__init__.py"
+    return imported_class_index(ModuleClasses(source_ast, module, is_package = is_package),
+                                _load_module_classes)
+
+
+# Classes and imports of the project modules parsed by this process
+_MODULE_CLASSES = {}
+
+def _load_module_classes(module):
+    key = (os.getcwd(), module)
+    try:
+        return _MODULE_CLASSES[key]
+    except KeyError:
+        pass
+
+    module_classes = None
+    file_path = module_path(module)
+    if file_path is not None:
+        with open(file_path, "r") as f:
+            content = f.read()
+        module_classes = ModuleClasses(ca.ast(content, lang = "python", syntax_error = "ignore"), module,
+                                       is_package = os.path.basename(file_path) == "__init__.py")
+
+    _MODULE_CLASSES[key] = module_classes
+    return module_classes
+
+
+def module_path(module : str):
+    """Returns the file of a module relative to the working directory or None (inverse of `path_to_module`)"""
+    path = os.path.join(*module.split("."))
+    for file_path in (path + ".py", os.path.join(path, "__init__.py")):
+        if os.path.isfile(file_path): return file_path
+    return None
+
+
+def print_mutant(num_mutant, precise_module, mutant, diff, result = None):
+    print(f"[#{num_mutant}] Mutation")
+    print(f"- [{mutant.op_type}] {precise_module}")
+    if result is not None:
+        print(f"- Result: {result.status}")
+    print("-"*80)
+    print(diff)
+    print("-"*80 + "\n\n")
+
+
+def print_summary(results):
+    statuses = [result.status for result in results]
+    num_error  = statuses.count(TestResult.ERROR)
+    num_killed = sum(result.detected for result in results)
+    num_valid  = len(statuses) - num_error
+
+    print(f"Mutants: {len(statuses)}")
+    for status in sorted(set(statuses)):
+        print(f"- {status}: {statuses.count(status)}")
+    if num_valid > 0:
+        print(f"Mutation score: {100 * num_killed / num_valid:.2f}%")
+
+    killed_tests_run = [result.tests_run for result in results if result.killed]
+    if killed_tests_run:
+        print(f"Tests per killed mutant: {sum(killed_tests_run) / len(killed_tests_run):.2f}")
+
+
+def build_runner(config, mutated_files = None):
+    runner = UnittestRunner(config.tests, failfast = config.failfast)
+
+    if config.schemata:
+        runner.schemata = MutantSchemata()
+
+    if config.coverage:
+        runner = CoverageGuidedRunner(runner, include = mutated_files)
+
+    # Limits and calibrated timeouts are enforced by killing the forked test process
+    if config.fork_server or config.memory_limit or config.cpu_limit or config.timeout_factor is not None:
+        memory_limit = int(config.memory_limit * 1024 * 1024) if config.memory_limit else None
+        runner = ForkServerRunner(runner, memory_limit = memory_limit, cpu_limit = config.cpu_limit)
+
+    if config.timeout_factor is not None:
+        runner = CalibratedTimeoutRunner(runner, factor = config.timeout_factor,
+                                         constant = config.timeout_constant)
+
+    if config.history:
+        runner = PrioritizedRunner(runner, KillHistory(config.history))
+
+    if config.cache:
+        runner = CachedRunner(runner, ResultCache(config.cache))
+
+    return runner
+
+
+def run_campaign(config, mutants, profile = None):
+    mutants = list(mutants)
+    runner  = None
+
+    # Mutants are executed by remote workers
+    if not config.serve:
+        # Mutated modules and tests are imported relative to the working directory
+        sys.path.insert(0, os.getcwd())
+
+        runner = build_runner(config, {file_path for _, file_path, _, _, _ in mutants})
+        runner.prepare()
+
+    journal = None
+    if config.journal or config.resume:
+        journal = Journal(config.journal or DEFAULT_JOURNAL_PATH, resume = config.resume)
+
+    try:
+        if config.ci_width is not None or config.budget is not None:
+            run_adaptive_campaign(config, runner, mutants, journal, profile)
+        else:
+            run_all_mutants(config, runner, mutants, journal, profile)
+    finally:
+        if journal is not None: journal.close()
+
+
+def _load_journal(journal, mutants):
+    """Returns the ids of all mutants and the recorded results by mutant index"""
+    mutant_ids = [mutant_id(file_path, mutant) for _, file_path, _, mutant, _ in mutants]
+
+    completed = {}
+    if journal is not None:
+        for num_mutant, mid in enumerate(mutant_ids):
+            record = journal.lookup(mid)
+            if record is not None: completed[num_mutant] = TestResult(**record)
+
+    return mutant_ids, completed
+
+
+def run_all_mutants(config, runner, mutants, journal = None, profile = None):
+    mutant_ids, completed = _load_journal(journal, mutants)
+
+    pending = ((module, mutant) for num_mutant, (module, _, _, mutant, _) in enumerate(mutants)
+               if num_mutant not in completed)
+
+    if config.serve:
+        results = Coordinator(config.serve, timeout = config.timeout).run(pending)
+    else:
+        results = run_mutants(runner, pending,
+                              jobs = config.jobs if config.jobs > 0 else None,
+                              timeout = config.timeout)
+
+    collected = []
+    for num_mutant, mutant_info in enumerate(mutants):
+        _, _, precise_module, mutant, diff = mutant_info
+
+        result = completed.get(num_mutant)
+        if result is None:
+            _, _, result = next(results)
+            if journal is not None: journal.append(mutant_ids[num_mutant], result)
+            if profile is not None: profile.add_result(result)
+
+        print_mutant(num_mutant, precise_module, mutant, diff, result)
+        collected.append(result)
+
+    print_summary(collected)
+    if completed:
+        print(f"Resumed {len(completed)} mutants from the journal")
+
+
+def run_adaptive_campaign(config, runner, mutants, journal = None, profile = None):
+    mutant_ids, completed = _load_journal(journal, mutants)
+
+    campaign = AdaptiveCampaign(runner,
+                                width = config.ci_width,
+                                budget = config.budget,
+                                confidence = config.confidence,
+                                seed = config.seed,
+                                jobs = config.jobs if config.jobs > 0 else None,
+                                timeout = config.timeout)
+
+    collected = list(completed.values())
+    results = campaign.run(((module, mutant) for module, _, _, mutant, _ in mutants),
+                           completed = completed)
+    for num_mutant, _, _, result in results:
+        _, _, precise_module, mutant, diff = mutants[num_mutant]
+        print_mutant(num_mutant, precise_module, mutant, diff, result)
+        collected.append(result)
+        if journal is not None: journal.append(mutant_ids[num_mutant], result)
+        if profile is not None: profile.add_result(result)
+
+    print_summary(collected)
+    if completed:
+        print(f"Resumed {len(completed)} mutants from the journal")
+
+    estimate = campaign.estimate
+    print(f"Executed {estimate.executed} of {estimate.population} mutants (stopped: {campaign.stop_reason})")
+    if estimate.score is not None:
+        lower, upper = estimate.interval()
+        print(f"Estimated mutation score: {100 * estimate.score:.2f}% "
+              f"[{100 * lower:.2f}%, {100 * upper:.2f}%] ({100 * config.confidence:g}% confidence)")
+
+
+def worker_main(argv):
+    config = parse_worker_arguments(argv)
+
+    # Mutated modules and tests are imported relative to the working directory
+    sys.path.insert(0, os.getcwd())
+
+    runner = build_runner(config)
+    runner.prepare()
+
+    try:
+        executed = Worker(runner, config.address, batch_size = config.batch_size).run()
+    except ConnectionError as e:
+        sys.exit(f"Lost connection to the coordinator: {e}")
+
+    print(f"Executed {executed} mutants")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        worker_main(sys.argv[2:])
+        return
+
+    config = parse_arguments()
+    stats = {}
+    profile = Stats() if config.profile else None
+    mutants = generate_mutants(config, stats, profile)
+
+    if config.tests or config.serve:
+        run_campaign(config, mutants, profile)
+    else:
+        for num_mutant, (_, _, precise_module, mutant, diff) in enumerate(mutants):
+            print_mutant(num_mutant, precise_module, mutant, diff)
+
+    if config.validate:
+        print(f"Syntax validation: dropped {stats.get('invalid', 0)} invalid mutants")
+
+    if config.tce:
+        print(f"Trivial compiler equivalence: dropped {stats.get('equivalent', 0)} equivalent "
+              f"and {stats.get('duplicate', 0)} duplicate mutants")
 
-            if config.scope:
-                if not _match_module_name(config.scope, precise_module):
-                    continue
-
-            print(f"[#{num_mutants}] Mutation")
-            print(f"- [{mutant.op_type}] {precise_module}")
-            print("-"*80)
-            print(mutant.unified_diff(content,
-                                      fromfile=file_path,
-                                      tofile=file_path))
-            print("-"*80 + "\n\n")
-            num_mutants += 1
+    if profile is not None:
+        print("\nProfile")
+        print(profile.format())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Trivial compiler equivalence
+
+Mutants that compile to the same bytecode as the original program or
+as another mutant cannot be distinguished by any test. They are detected
+by hashing the compiled code objects before any test is run.
+"""
+import ast
+import types
+import hashlib
+import __future__
+
+from bisect import bisect_right
+
+from .mutation import SourceBuffer
+
+
+class EquivalenceFilter:
+    """
+    Drops mutants that are equivalent to the original or to an earlier mutant
+
+    Instead of the complete module, only the top level statement
+    (e.g. the function or class definition) that contains the mutation is
+    compiled. Top level statements are compiled independently of each other.
+    Hence, two versions of a module compile to the same bytecode if all
+    their top level statements do.
+
+    Parameters
+    ----------
+    source_code : str or SourceBuffer
+        Original source code of the mutated module
+
+    Attributes
+    ----------
+    equivalent : int
+        Number of mutants dropped because they equal the original
+
+    duplicate : int
+        Number of mutants dropped because they equal an earlier mutant
+
+    """
+
+    def __init__(self, source_code):
+        if not isinstance(source_code, SourceBuffer):
+            source_code = SourceBuffer(source_code)
+
+        self.buffer = source_code
+        self.equivalent = 0
+        self.duplicate = 0
+
+        self._original_digests = {}
+        self._seen = set()
+
+        try:
+            module = ast.parse(self.buffer.text)
+        except (SyntaxError, ValueError):
+            # Mutants of invalid code are never filtered
+            module = None
+
+        self._flags = 0
+        self._chunks, self._chunk_starts = [], []
+        if module is not None:
+            self._flags = _future_flags(module)
+            self._chunks = _statement_chunks(module)
+            self._chunk_starts = [start for start, _ in self._chunks]
+        self.enabled = module is not None
+
+    @property
+    def removed(self):
+        return self.equivalent + self.duplicate
+
+    def _find_chunk(self, line):
+        index = bisect_right(self._chunk_starts, line) - 1
+        if index < 0: return None
+        start, end = self._chunks[index]
+        if line < end: return start, end
+        return None
+
+    def _compile_digest(self, code):
+        try:
+            code_obj = compile(code, "<mutant>", "exec", flags = self._flags, dont_inherit = True)
+        except (SyntaxError, ValueError):
+            return None
+        return code_digest(code_obj)
+
+    def _mutant_chunk(self, mutation):
+        buffer = self.buffer
+        start, end = buffer.span(mutation.source_pos)
+
+        start_chunk = self._find_chunk(mutation.source_pos[0])
+        end_chunk   = self._find_chunk(mutation.source_pos[2])
+
+        if start_chunk is None or end_chunk is None:
+            chunk = (0, len(buffer.lines))
+        else:
+            chunk = (start_chunk[0], end_chunk[1])
+
+        chunk_start = buffer.line_starts[chunk[0]]
+        chunk_end   = buffer.line_starts[chunk[1]]
+
+        if not (chunk_start <= start and end <= chunk_end):
+            chunk = (0, len(buffer.lines))
+            chunk_start, chunk_end = 0, len(buffer.text)
+
+        target_code = buffer.text[chunk_start:start] + mutation.target_text + buffer.text[end:chunk_end]
+        return chunk, buffer.text[chunk_start:chunk_end], target_code
+
+    def check(self, mutation):
+        """
+        Checks whether the mutant is redundant
+
+        Returns
+        -------
+        str
+            "equivalent" if the mutant compiles to the original bytecode,
+            "duplicate" if it compiles to the bytecode of an earlier mutant
+            and None otherwise
+
+        """
+        if not self.enabled: return None
+
+        chunk, original_code, target_code = self._mutant_chunk(mutation)
+
+        try:
+            original_digest = self._original_digests[chunk]
+        except KeyError:
+            original_digest = self._compile_digest(original_code)
+            self._original_digests[chunk] = original_digest
+
+        target_digest = self._compile_digest(target_code)
+        if target_digest is None: return None
+
+        if target_digest == original_digest:
+            self.equivalent += 1
+            return "equivalent"
+
+        if (chunk, target_digest) in self._seen:
+            self.duplicate += 1
+            return "duplicate"
+
+        self._seen.add((chunk, target_digest))
+        return None
+
+    def filter(self, mutations):
+        """Yields all mutations that are neither equivalent nor duplicates"""
+        for mutation in mutations:
+            if self.check(mutation) is None:
+                yield mutation
+
+
+def code_digest(code_obj : types.CodeType) -> str:
+    """
+    Hashes a code object including all nested code objects
+
+    Line numbers and file names are ignored such that code that
+    only moved produces the same digest.
+    """
+    digest = hashlib.sha256()
+    _update_digest(digest, code_obj)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, code_obj):
+    for value in (code_obj.co_name, code_obj.co_code, code_obj.co_names,
+                  code_obj.co_varnames, code_obj.co_freevars, code_obj.co_cellvars,
+                  code_obj.co_argcount, code_obj.co_posonlyargcount,
+                  code_obj.co_kwonlyargcount, code_obj.co_flags,
+                  getattr(code_obj, "co_exceptiontable", b"")):
+        digest.update(repr(value).encode("utf-8"))
+        digest.update(b"\0")
+
+    for const in code_obj.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_digest(digest, const)
+        else:
+            digest.update(repr((type(const).__name__, const)).encode("utf-8"))
+        digest.update(b"\0")
+
+
+def _future_flags(module):
+    flags = 0
+    for statement in module.body:
+        if isinstance(statement, ast.ImportFrom) and statement.module == "__future__":
+            for alias in statement.names:
+                feature = getattr(__future__, alias.name, None)
+                if feature is not None: flags |= feature.compiler_flag
+    return flags
+
+
+def _statement_chunks(module):
+    # Zero based line ranges [start, end) of top level statements.
+    # Statements that share a line are merged into one chunk.
+    chunks = []
+    for statement in module.body:
+        start = statement.lineno
+        for decorator in getattr(statement, "decorator_list", []):
+            start = min(start, decorator.lineno)
+        start, end = start - 1, statement.end_lineno
+
+        if chunks and start < chunks[-1][1]:
+            chunks[-1] = (chunks[-1][0], max(end, chunks[-1][1]))
+        else:
+            chunks.append((start, end))
+
+    return chunks
@@ -0,0 +1,154 @@
+import sqlite3
+
+from collections import Counter
+
+from .mutation import Mutation
+
+
+DEFAULT_HISTORY_PATH = ".cmutate-history.db"
+
+# Relative change of a test duration that is persisted
+DURATION_TOLERANCE = 0.1
+
+
+class KillHistory:
+    """
+    Persistent record of the tests that killed previous mutants
+
+    For every killed mutant, the killing tests are recorded per mutated
+    line and per mutation operator of the module. Together with the
+    duration of every test on the unmutated code, the history is used to run
+    the tests that most likely kill a mutant first.
+
+    Parameters
+    ----------
+    path : str
+        Path to the SQLite database. Default: .cmutate-history.db
+
+    """
+
+    def __init__(self, path : str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._connection = None
+        self._location_kills = None
+        self._operator_kills = None
+        self._durations = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout = 60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS kills (module TEXT, line INTEGER, op_type TEXT, test_id TEXT, "
+                "count INTEGER, PRIMARY KEY (module, line, op_type, test_id))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS durations (test_id TEXT PRIMARY KEY, duration REAL)"
+            )
+        return self._connection
+
+    def _load(self):
+        if self._durations is not None: return
+
+        self._location_kills = {}
+        self._operator_kills = {}
+        for module_name, line, op_type, test_id, count in self.connection.execute(
+            "SELECT module, line, op_type, test_id, count FROM kills"
+        ):
+            self._location_kills.setdefault((module_name, line), Counter())[test_id] += count
+            self._operator_kills.setdefault((module_name, op_type), Counter())[test_id] += count
+
+        self._durations = dict(self.connection.execute("SELECT test_id, duration FROM durations"))
+
+    # Recording ----------------------------------------------------------------
+
+    def record_kill(self, module_name : str, mutation : Mutation, test_ids):
+        self._load()
+        line, op_type = mutation.source_pos[0], mutation.op_type
+
+        location_kills = self._location_kills.setdefault((module_name, line), Counter())
+        operator_kills = self._operator_kills.setdefault((module_name, op_type), Counter())
+        for test_id in test_ids:
+            location_kills[test_id] += 1
+            operator_kills[test_id] += 1
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO kills VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (module, line, op_type, test_id) DO UPDATE SET count = count + 1",
+                [(module_name, line, op_type, test_id) for test_id in test_ids]
+            )
+
+    def record_durations(self, durations : dict):
+        """Stores the test durations that changed by more than `DURATION_TOLERANCE`"""
+        self._load()
+
+        changed = [(test_id, duration) for test_id, duration in durations.items()
+                   if not _similar(self._durations.get(test_id), duration)]
+        if not changed: return
+
+        self._durations.update(changed)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO durations VALUES (?, ?)", changed
+            )
+
+    # Prioritization ----------------------------------------------------------------
+
+    def prioritize(self, module_name : str, mutation : Mutation, tests):
+        """
+        Orders the given tests by how likely they kill the mutation
+
+        Tests that killed mutants on the same line come first, followed by
+        tests that killed mutants of the same operator in the module.
+        Ties are broken by the last measured test duration.
+
+        Parameters
+        ----------
+        module_name : str
+            Name of the mutated module
+
+        mutation : Mutation
+            Mutation that is tested
+
+        tests : list[str]
+            Ids of the tests that are executed for the mutation
+
+        Returns
+        -------
+        list[str]
+            the test ids ordered by descending kill probability
+
+        """
+        self._load()
+
+        location_kills = self._location_kills.get((module_name, mutation.source_pos[0]), {})
+        operator_kills = self._operator_kills.get((module_name, mutation.op_type), {})
+        durations = self._durations
+
+        def priority(test_id):
+            return (-location_kills.get(test_id, 0),
+                    -operator_kills.get(test_id, 0),
+                    durations.get(test_id, float("inf")))
+
+        return sorted(tests, key = priority)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __getstate__(self):
+        # Every process opens its own connection and reloads the history
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_location_kills"] = None
+        state["_operator_kills"] = None
+        state["_durations"] = None
+        return state
+
+
+def _similar(recorded, duration):
+    if recorded is None: return False
+    return abs(recorded - duration) <= DURATION_TOLERANCE * max(recorded, duration)
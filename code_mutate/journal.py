@@ -0,0 +1,123 @@
+import os
+import json
+import time
+
+from .cache import hash_text
+from .mutation import Mutation
+
+
+DEFAULT_JOURNAL_PATH = ".cmutate-journal.jsonl"
+
+
+def mutant_id(file_path : str, mutation : Mutation) -> str:
+    """Returns a stable id of a mutant that does not depend on the order of generation"""
+    file_path = os.path.normpath(os.path.relpath(file_path))
+    key = json.dumps([file_path.replace(os.sep, "/"), list(mutation.source_pos),
+                      mutation.op_type, mutation.target_text])
+    return hash_text(key)
+
+
+class Journal:
+    """
+    Append-only log of mutant verdicts that allows to resume a campaign
+
+    Every verdict is appended as a JSON line keyed by the mutant id (see `mutant_id`).
+    Lines are written in batches and synced to disk after `batch_size` verdicts
+    or `sync_interval` seconds. A crash therefore loses at most the last batch
+    which is rerun when the campaign is resumed.
+
+    Parameters
+    ----------
+    path : str
+        Path to the journal file. Default: .cmutate-journal.jsonl
+
+    resume : bool
+        Whether the verdicts of an existing journal are loaded and
+        new verdicts are appended. Otherwise, the journal is truncated.
+        Default: False
+
+    batch_size : int
+        Maximal number of buffered verdicts. Default: 100
+
+    sync_interval : float
+        Maximal time in seconds a verdict is buffered. Default: 1.0
+
+    """
+
+    def __init__(self, path : str = DEFAULT_JOURNAL_PATH, resume : bool = False,
+                 batch_size : int = 100, sync_interval : float = 1.0):
+        self.path = path
+        self.resume = resume
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+
+        self.records = self._load() if resume else {}
+        self._file = open(path, "a" if resume else "w")
+        self._buffer = []
+        self._last_sync = time.monotonic()
+
+    def _load(self):
+        records = {}
+        if not os.path.exists(self.path): return records
+
+        valid_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                # Stop at the incomplete line of an interrupted write
+                if not line.endswith(b"\n"): break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                records[record.pop("id")] = record
+                valid_size += len(line)
+
+        # New verdicts are appended after the last complete line
+        if valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+
+        return records
+
+    def __contains__(self, mutant_id):
+        return mutant_id in self.records
+
+    def lookup(self, mutant_id : str):
+        """Returns the recorded verdict of the mutant as keyword arguments of TestResult or None"""
+        return self.records.get(mutant_id)
+
+    def append(self, mutant_id : str, result):
+        record = {
+            "status": result.status,
+            "tests_run": result.tests_run,
+            "failed_tests": list(result.failed_tests),
+            "duration": result.duration,
+            "message": result.message,
+        }
+        self.records[mutant_id] = record
+        self._buffer.append(json.dumps({"id": mutant_id, **record}) + "\n")
+
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Writes all buffered verdicts and syncs the journal to disk"""
+        self._last_sync = time.monotonic()
+        if not self._buffer: return
+
+        self._file.write("".join(self._buffer))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer = []
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,5 +1,66 @@
+import weakref
+
 from typing import Tuple
-from difflib import unified_diff
+from bisect import bisect_right
+from difflib import SequenceMatcher, unified_diff
+
+from tree_sitter import Query, QueryCursor
+
+
+class SourceBuffer:
+    """
+    Source code with precomputed line offsets
+
+    Mutations can be applied to a buffer as a single slice operation.
+    A buffer should be reused for all mutations of the same source file.
+    """
+
+    def __init__(self, source_code : str):
+        self.text  = source_code
+        self.lines = source_code.splitlines(True)
+
+        self.line_starts = [0] * (len(self.lines) + 1)
+        position = 0
+        for i, line in enumerate(self.lines):
+            position += len(line)
+            self.line_starts[i + 1] = position
+
+    @property
+    def line_positions(self):
+        """Indices of all occurrences of every line"""
+        try:
+            return self._line_positions
+        except AttributeError:
+            self._line_positions = {}
+            for i, line in enumerate(self.lines):
+                self._line_positions.setdefault(line, []).append(i)
+            return self._line_positions
+
+    def offset(self, line : int, pos : int) -> int:
+        if line >= len(self.lines): return len(self.text)
+        return self.line_starts[line] + min(pos, len(self.lines[line]))
+
+    def span(self, source_pos : Tuple[int, int, int, int]) -> Tuple[int, int]:
+        start_line, start_pos, end_line, end_pos = source_pos
+        return self.offset(start_line, start_pos), self.offset(end_line, end_pos)
+
+    def replace(self, source_pos : Tuple[int, int, int, int], target_text : str) -> str:
+        start, end = self.span(source_pos)
+        return self.text[:start] + target_text + self.text[end:]
+
+    def apply_all(self, mutations):
+        """Yields the mutated source code for each of the given mutations"""
+        for mutation in mutations:
+            yield self.replace(mutation.source_pos, mutation.target_text)
+
+    def __len__(self):
+        return len(self.text)
+
+
+def _as_buffer(source_code):
+    if isinstance(source_code, SourceBuffer): return source_code
+    return SourceBuffer(source_code)
+
 
 class Mutation:
 
@@ -13,36 +74,25 @@ class Mutation:
         assert self.source_pos[0] != self.source_pos[2] or self.source_pos[1] < self.source_pos[3]
 
     def apply(self, source_code):
-        source_lines = source_code.splitlines(True)
-        start_line, start_pos, end_line, end_pos = self.source_pos
+        buffer = _as_buffer(source_code)
+        start, end = buffer.span(self.source_pos)
 
-        source_area = source_lines[start_line : end_line + 1]
-        
-        if start_line == end_line:
-            target_text = source_area[0][start_pos : end_pos]
-        else:
-            target_text = "".join(
-                [source_area[0][start_pos:]] + source_area[1:-1] + [source_area[-1][:end_pos]]
-            )
-        
-        target_lines = (source_lines[:start_line] + 
-                        [
-                            source_area[0][:start_pos] 
-                            + self.target_text 
-                            + source_area[-1][end_pos:]
-                        ]
-                        + source_lines[end_line+1:])
-
-        return "".join(target_lines), Mutation(self.source_pos, target_text)
+        target_code = buffer.text[:start] + self.target_text + buffer.text[end:]
+        return target_code, Mutation(self.source_pos, buffer.text[start:end])
 
     def unified_diff(self, source_code, fromfile = '', tofile = '', n = 3, lineterm = "\n"):
-        target_code, _ = self.apply(source_code)
-        return "".join(unified_diff(source_code.splitlines(True), 
-                                 target_code.splitlines(True),
-                                 fromfile = fromfile,
-                                 tofile = tofile,
-                                 n=n, 
-                                 lineterm=lineterm))
+        """
+        Renders the mutation as unified diff
+
+        The output follows `difflib.unified_diff` over the original
+        and mutated source code. However, only the lines touched by
+        the mutation are compared instead of the complete file.
+        The complete file is only compared if difflib could align
+        a changed line with an equal unchanged line or if difflib
+        ignores popular lines around the change (autojunk).
+        """
+        buffer = _as_buffer(source_code)
+        return "".join(_unified_diff(buffer, self, fromfile, tofile, n, lineterm))
 
     def __repr__(self):
         start_line, start_pos, end_line, end_pos = self.source_pos
@@ -54,16 +104,335 @@ class ASTMutation(Mutation):
 
     def __init__(self, source_node, target_text, **kwargs):
         self.source_node = source_node
+        self._scope = None
         position = source_node.start_point + source_node.end_point
 
-        super().__init__(
-            position, target_text, 
-            scope = _identify_scope(source_node), **kwargs
-        )
+        super().__init__(position, target_text, **kwargs)
+
+    @property
+    def scope(self):
+        # Operators assign scopes from the scope index of the AST.
+        # Otherwise, the scope is identified from the parents.
+        if self._scope is None:
+            self._scope = _identify_scope(self.source_node)
+        return self._scope
+
+    @scope.setter
+    def scope(self, scope):
+        self._scope = scope
+
+    def __reduce__(self):
+        # AST nodes cannot be transferred between processes
+        return (Mutation, (self.source_pos, self.target_text, self.op_type, self.scope))
+
+
+# Unified diff ------------------------------
+
+def _unified_diff(buffer, mutation, fromfile, tofile, n, lineterm):
+    source_lines = buffer.lines
+
+    # Only the lines touched by the mutation can change
+    start, end = buffer.span(mutation.source_pos)
+    start_line = bisect_right(buffer.line_starts, start) - 1
+    end_line   = min(bisect_right(buffer.line_starts, end), len(source_lines))
+    end_line   = max(start_line, end_line)
+
+    region_start, region_end = buffer.line_starts[start_line], buffer.line_starts[end_line]
+    target_lines = (buffer.text[region_start:start]
+                    + mutation.target_text
+                    + buffer.text[end:region_end]).splitlines(True)
+    region_lines = source_lines[start_line:end_line]
+
+    prefix = 0
+    while (prefix < len(region_lines) and prefix < len(target_lines)
+            and region_lines[prefix] == target_lines[prefix]):
+        prefix += 1
+
+    suffix = 0
+    while (suffix < len(region_lines) - prefix and suffix < len(target_lines) - prefix
+            and region_lines[-suffix - 1] == target_lines[-suffix - 1]):
+        suffix += 1
+
+    i1, i2 = start_line + prefix, end_line - suffix
+    j1, j2 = start_line + prefix, start_line + len(target_lines) - suffix
+    changed_lines = target_lines[prefix:len(target_lines) - suffix]
+
+    def target_line(j):
+        if j < j1: return source_lines[j]
+        if j < j2: return changed_lines[j - j1]
+        return source_lines[j - j2 + i2]
+
+    if i1 == i2 and j1 == j2:
+        # Mutation does not change the source code
+        return
+
+    # difflib might align the changed lines with equal unchanged lines.
+    # Then, the complete file is compared.
+    if _ambiguous(buffer, i1, i2, changed_lines):
+        target_lines = source_lines[:i1] + changed_lines + source_lines[i2:]
+        yield from unified_diff(source_lines, target_lines, fromfile = fromfile, tofile = tofile,
+                                n = n, lineterm = lineterm)
+        return
+
+    codes = []
+    if i1 > 0: codes.append(("equal", 0, i1, 0, j1))
+
+    local_codes = SequenceMatcher(None, source_lines[i1:i2], changed_lines, autojunk = False).get_opcodes()
+    for tag, ai1, ai2, bj1, bj2 in local_codes:
+        codes.append((tag, i1 + ai1, i1 + ai2, j1 + bj1, j1 + bj2))
+
+    if i2 < len(source_lines):
+        codes.append(("equal", i2, len(source_lines), j2, j2 + len(source_lines) - i2))
+
+    started = False
+    for group in _group_opcodes(codes, n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+
+        first, last = group[0], group[-1]
+        file1_range = _format_range(first[1], last[2])
+        file2_range = _format_range(first[3], last[4])
+        yield f"@@ -{file1_range} +{file2_range} @@{lineterm}"
+
+        for tag, ai1, ai2, bj1, bj2 in group:
+            if tag == "equal":
+                for line in source_lines[ai1:ai2]:
+                    yield " " + line
+                continue
+            if tag in ["replace", "delete"]:
+                for line in source_lines[ai1:ai2]:
+                    yield "-" + line
+            if tag in ["replace", "insert"]:
+                for j in range(bj1, bj2):
+                    yield "+" + target_line(j)
+
+
+def _ambiguous(buffer, i1, i2, changed_lines):
+    """
+    Checks whether difflib over the complete file might match differently than the local diff
+
+    difflib matches the longest block of equal lines first. The local diff
+    is equal as long as the unchanged prefix and suffix are matched before
+    any block that pairs a changed line with an unchanged line.
+
+    For files with at least 200 lines, difflib ignores popular lines
+    (autojunk) when it searches for a block. Then, the prefix and suffix
+    are only matched first if they contain a longer run of other lines.
+    """
+    source_lines, positions = buffer.lines, buffer.line_positions
+    j1, j2 = i1, i1 + len(changed_lines)
+    shortest_anchor = min(i1, len(source_lines) - i2)
+
+    def target_line(j):
+        if j < j1: return source_lines[j]
+        if j < j2: return changed_lines[j - j1]
+        return source_lines[j - j2 + i2]
+
+    num_target_lines = len(source_lines) - i2 + j2
+    is_popular = _popular_lines(positions, source_lines[i1:i2], changed_lines, num_target_lines)
+
+    # Changed lines that difflib ignores might be matched anywhere
+    if is_popular is not None:
+        if any(is_popular(line) for line in source_lines[i1:i2]): return True
+        if any(is_popular(line) for line in changed_lines): return True
+
+    def weight(line):
+        return 0 if is_popular is not None and is_popular(line) else 1
+
+    def block_weight(i, j):
+        # Extends the block of equal lines around (i, j) up to the shortest anchor
+        length, k = 1, 1
+        while length < shortest_anchor and i - k >= 0 and j - k >= 0 and source_lines[i - k] == target_line(j - k):
+            length, k = length + weight(source_lines[i - k]), k + 1
+        k = 1
+        while (length < shortest_anchor and i + k < len(source_lines) and j + k < num_target_lines
+                and source_lines[i + k] == target_line(j + k)):
+            length, k = length + weight(source_lines[i + k]), k + 1
+        return length
+
+    longest_block = 0
+
+    # Added lines that occur in the unchanged lines
+    for j in range(j1, j2):
+        for i in positions.get(target_line(j), ()):
+            if i < i1 or i >= i2:
+                longest_block = max(longest_block, block_weight(i, j))
+                if longest_block >= shortest_anchor: return True
+
+    # Removed lines that occur in the unchanged lines
+    for i in range(i1, i2):
+        for k in positions[source_lines[i]]:
+            if k < i1: longest_block = max(longest_block, block_weight(i, k))
+            if k >= i2: longest_block = max(longest_block, block_weight(i, k - i2 + j2))
+            if longest_block >= shortest_anchor: return True
+
+    # The prefix and suffix need a longer run of lines that are not ignored
+    if is_popular is not None:
+        prefix = (source_lines[i] for i in range(i1 - 1, -1, -1))
+        suffix = (source_lines[i] for i in range(i2, len(source_lines)))
+        if i1 > 0 and not _has_run(prefix, is_popular, longest_block + 1): return True
+        if i2 < len(source_lines) and not _has_run(suffix, is_popular, longest_block + 1): return True
+
+    # Lines are only inserted or deleted. The unchanged lines around the
+    # change are adjacent in one file and might match a repetition elsewhere.
+    if i1 == i2 or j1 == j2:
+        return i1 > 0 and len(positions[source_lines[i1 - 1]]) > 1
+
+    return False
+
+
+def _popular_lines(positions, removed_lines, added_lines, num_target_lines):
+    """
+    Returns a predicate for lines that difflib treats as popular in the target file
+
+    Follows the autojunk heuristic of difflib.SequenceMatcher. Returns None
+    if the target file is too short for the heuristic.
+    """
+    if num_target_lines < 200: return None
+    max_count = num_target_lines // 100 + 1
+
+    removed, added = {}, {}
+    for line in removed_lines: removed[line] = removed.get(line, 0) + 1
+    for line in added_lines: added[line] = added.get(line, 0) + 1
+
+    def is_popular(line):
+        count = len(positions.get(line, ())) - removed.get(line, 0) + added.get(line, 0)
+        return count > max_count
+
+    return is_popular
+
+
+def _has_run(lines, is_popular, length):
+    """Checks whether the lines contain length consecutive lines that are not popular"""
+    run = 0
+    for line in lines:
+        run = 0 if is_popular(line) else run + 1
+        if run >= length: return True
+    return False
+
+
+def _group_opcodes(codes, n):
+    # Follows difflib.SequenceMatcher.get_grouped_opcodes
+    if not codes: codes = [("equal", 0, 1, 0, 1)]
+
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start, stop):
+    beginning = start + 1
+    length = stop - start
+    if length == 1: return f"{beginning}"
+    if not length: beginning -= 1
+    return f"{beginning},{length}"
 
 
 # Identify scope ---------------------------
 
+class ScopeIndex:
+    """
+    Qualified names of all function and class definitions in an AST
+
+    Definitions are stored as byte intervals sorted by their start.
+    The scope of a node is found by bisecting the interval table.
+
+    Parameters
+    ----------
+    source_ast : SourceCodeAST
+        AST that is indexed
+
+    """
+
+    def __init__(self, source_ast = None):
+        self.starts  = []
+        self.ends    = []
+        self.types   = []
+        self.names   = []
+        self.parents = []
+
+        if source_ast is not None:
+            self.add_definitions(_find_definitions(source_ast.source_tree))
+
+    def add_definitions(self, definition_nodes):
+        definition_nodes = sorted(definition_nodes, key = lambda node: (node.start_byte, -node.end_byte))
+
+        stack = []
+        for node in definition_nodes:
+            while stack and self.ends[stack[-1]] <= node.start_byte:
+                stack.pop()
+
+            parent = stack[-1] if stack else -1
+            name   = node.child_by_field_name("name").text.decode()
+            if parent >= 0: name = f"{self.names[parent]}.{name}"
+
+            stack.append(len(self.starts))
+            self.starts.append(node.start_byte)
+            self.ends.append(node.end_byte)
+            self.types.append(node.type)
+            self.names.append(name)
+            self.parents.append(parent)
+
+    def scope_of(self, node):
+        """Returns the qualified name of the innermost definition containing node"""
+        start, end = node.start_byte, node.end_byte
+
+        index = bisect_right(self.starts, start) - 1
+        while index >= 0:
+            scope_start, scope_end = self.starts[index], self.ends[index]
+            if scope_start <= start and end <= scope_end:
+                # A node with the same span is only the definition itself
+                if (scope_start, scope_end) != (start, end) or node.type == self.types[index]:
+                    return self.names[index]
+            index = self.parents[index]
+
+        return ""
+
+    def __len__(self):
+        return len(self.starts)
+
+
+_SCOPE_QUERIES = {}
+
+def _find_definitions(source_tree):
+    language = source_tree.language
+    try:
+        query = _SCOPE_QUERIES[language]
+    except KeyError:
+        query = Query(language, "(function_definition) @scope (class_definition) @scope")
+        _SCOPE_QUERIES[language] = query
+
+    return QueryCursor(query).captures(source_tree.root_node).get("scope", [])
+
+
+_SCOPE_INDICES = weakref.WeakKeyDictionary()
+
+def get_scope_index(source_ast):
+    """Returns the scope index of the given AST (built once per AST)"""
+    try:
+        return _SCOPE_INDICES[source_ast]
+    except KeyError:
+        _SCOPE_INDICES[source_ast] = ScopeIndex(source_ast)
+        return _SCOPE_INDICES[source_ast]
+
+
 def _identify_scope(source_node):
     scopes = []
 
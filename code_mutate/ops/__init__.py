@@ -1,9 +1,12 @@
 
-from .base import CallableMutationOperator, MutationOperator
+from .base import CallableMutationOperator, MutationOperator, MutationDispatcher, ProfiledMutationDispatcher
 from .arithmetic import init_arithmetic_operator
 from .decorator import init_decorator_operator
 from .exception import init_exception_operator
-from .inheritance import init_inheritance_operator
+from .inheritance import (
+    init_inheritance_operator, ClassIndex, ModuleClasses, CLASS_INDEX_OPERATORS,
+    get_class_index, imported_class_index
+)
 from .logical import init_logical_operator
 from .misc import init_misc_operator
 
@@ -1,4 +1,12 @@
+import time
+
+from types import GeneratorType
+
 from code_ast import ASTVisitor
+from code_ast.visitor import ResumingVisitorComposition
+
+from ..mutation import get_scope_index
+
 
 class MutationOperator(ASTVisitor):
 
@@ -6,24 +14,57 @@ class MutationOperator(ASTVisitor):
         super().__init__()
         self.ast = ast
         self.mutations = []
+        self._scope_index = None
+
+    @property
+    def scope_index(self):
+        if self._scope_index is None:
+            self._scope_index = get_scope_index(self.ast)
+        return self._scope_index
 
     def mutate(self, node):
         return None
 
     def on_visit(self, node):
         if super().on_visit(node):
-            mutations = self.on_mutate(node)
-            if mutations:
-                try:
-                    self.mutations.extend(mutations)
-                except TypeError:
-                    self.mutations.append(mutations)
+            self.add_mutations(self.on_mutate(node))
             return True
         return False
     
     def on_mutate(self, node):
         mutate_fn = getattr(self, "mutate_%s" % node.type, self.mutate)
         return mutate_fn(node)
+
+    def add_mutations(self, mutations):
+        if not mutations: return
+
+        try:
+            mutations = list(mutations)
+        except TypeError:
+            mutations = [mutations]
+
+        for mutation in mutations:
+            try:
+                mutation.scope = self.scope_index.scope_of(mutation.source_node)
+            except AttributeError:
+                # Mutation is not attached to an AST node
+                pass
+
+        self.mutations.extend(mutations)
+
+    @classmethod
+    def node_handlers(cls):
+        """
+        Maps node types to the names of the `mutate_*` methods
+
+        Returns None if the operator has to inspect every node,
+        e.g. because it overrides `mutate` or a visitor method.
+        """
+        try:
+            return _NODE_HANDLERS[cls]
+        except KeyError:
+            _NODE_HANDLERS[cls] = _find_node_handlers(cls)
+            return _NODE_HANDLERS[cls]
     
 
 class CallableMutationOperator(MutationOperator):
@@ -33,4 +74,228 @@ class CallableMutationOperator(MutationOperator):
         self.callable = callable
 
     def mutate(self, node):
-        return self.callable(node)
\ No newline at end of file
+        return self.callable(node)
+
+
+# Dispatch ----------------------------------------------------------------
+
+class MutationDispatcher(ASTVisitor):
+    """
+    Runs a set of mutation operators in a single traversal
+
+    The `mutate_*` handlers of all operators are grouped by node type
+    once. Afterwards, every node only triggers the handlers registered
+    for its type. Operators that have to inspect every node
+    (e.g. callables) are visited as before.
+
+    Parameters
+    ----------
+    *operators : MutationOperator
+        Operators that collect mutations during the traversal
+
+    scope_filter : ScopeFilter
+        Skips definitions that cannot contain selected mutations.
+        Default: all nodes are visited
+
+    line_filter : LineFilter
+        Skips subtrees that do not touch the selected lines.
+        Default: all nodes are visited
+
+    """
+
+    def __init__(self, *operators, scope_filter = None, line_filter = None):
+        super().__init__()
+        self.operators = operators
+        self.scope_filter = scope_filter
+        self.line_filter = line_filter
+        self.dispatch_table = {}
+        self._pruned_node = None
+
+        generic_operators = []
+        for operator in operators:
+            handlers = operator.node_handlers()
+
+            if handlers is None:
+                generic_operators.append(operator)
+                continue
+
+            for node_type, handler_name in handlers.items():
+                self.dispatch_table.setdefault(node_type, []).append(
+                    (operator, getattr(operator, handler_name))
+                )
+
+        self.generic_visitor = None
+        if generic_operators:
+            self.generic_visitor = ResumingVisitorComposition(*generic_operators)
+
+    def on_visit(self, node):
+        if ((self.scope_filter is not None and not self.scope_filter.may_contain(node))
+                or (self.line_filter is not None and not self.line_filter.may_contain(node))):
+            self._pruned_node = node
+            return False
+
+        handlers = self.dispatch_table.get(node.type)
+        if handlers is not None:
+            for operator, handler in handlers:
+                operator.add_mutations(handler(node))
+
+        if self.generic_visitor is not None:
+            self.generic_visitor.on_visit(node)
+
+        return True
+
+    def iter_mutations(self, root_node):
+        """
+        Traverses the tree and yields mutations as soon as they are found
+
+        Mutations are produced in traversal order (and in operator order
+        for the same node). The traversal only advances as far as
+        mutations are consumed.
+        """
+        if root_node is None: return
+
+        cursor   = root_node.walk()
+        has_next = True
+
+        while has_next:
+            current_node = cursor.node
+            if self.on_visit(current_node):
+                has_next = cursor.goto_first_child()
+            else:
+                has_next = False
+
+            if not has_next:
+                self.on_leave(current_node)
+                has_next = cursor.goto_next_sibling()
+
+            while not has_next and cursor.goto_parent():
+                self.on_leave(cursor.node)
+                has_next = cursor.goto_next_sibling()
+
+            yield from self._collect_mutations()
+
+    def _collect_mutations(self):
+        for operator in self.operators:
+            if operator.mutations:
+                mutations, operator.mutations = operator.mutations, []
+                yield from mutations
+
+    def on_leave(self, node):
+        if self._pruned_node is not None:
+            # The pruned node was never visited by the operators
+            self._pruned_node = None
+            return
+
+        if self.generic_visitor is not None:
+            self.generic_visitor.on_leave(node)
+
+
+class ProfiledMutationDispatcher(MutationDispatcher):
+    """
+    Mutation dispatcher that records its work in a `Stats` object
+
+    Counts visited and pruned nodes, times every handler invocation
+    per operator and counts the mutations returned by the handlers
+    of every operator. Since handlers might return generators, their
+    mutations are materialized within the measured time. Mutations are
+    attributed to the operator that produced them and not to their
+    `op_type` (e.g. ROR produces mutations of type LOR).
+
+    Parameters
+    ----------
+    *operators : MutationOperator
+        Operators that collect mutations during the traversal
+
+    stats : Stats
+        Receives the counters `nodes`, `pruned_nodes` and `mutants.<name>`
+        and the timers `operator.<name>`
+
+    names : list[str]
+        Names of the operators in the report. Default: class names
+
+    scope_filter, line_filter
+        See `MutationDispatcher`
+
+    """
+
+    def __init__(self, *operators, stats, names = None, scope_filter = None, line_filter = None):
+        super().__init__(*operators, scope_filter = scope_filter, line_filter = line_filter)
+        self.stats = stats
+
+        if names is None: names = [type(operator).__name__ for operator in operators]
+        operator_names = {id(operator): name for operator, name in zip(operators, names)}
+
+        for handlers in self.dispatch_table.values():
+            handlers[:] = [(operator, _profile_handler(stats, operator_names[id(operator)], handler))
+                           for operator, handler in handlers]
+
+        if self.generic_visitor is not None:
+            self.generic_visitor = ResumingVisitorComposition(*[
+                _ProfiledVisitor(operator, stats, operator_names[id(operator)])
+                for operator in self.generic_visitor.visitors
+            ])
+
+    def on_visit(self, node):
+        if super().on_visit(node):
+            self.stats.count("nodes")
+            return True
+
+        self.stats.count("pruned_nodes")
+        return False
+
+
+def _profile_handler(stats, name, handler):
+    timer_name, counter_name = f"operator.{name}", f"mutants.{name}"
+
+    def profiled_handler(node):
+        start_time = time.perf_counter()
+        mutations  = handler(node)
+        if isinstance(mutations, GeneratorType): mutations = list(mutations)
+        stats.add_time(timer_name, time.perf_counter() - start_time)
+
+        if mutations:
+            stats.count(counter_name, len(mutations) if isinstance(mutations, (list, tuple)) else 1)
+        return mutations
+
+    return profiled_handler
+
+
+class _ProfiledVisitor:
+
+    def __init__(self, operator, stats, name):
+        self.operator = operator
+        self.stats = stats
+        self.timer_name = f"operator.{name}"
+        self.counter_name = f"mutants.{name}"
+
+    def on_visit(self, node):
+        num_mutations = len(self.operator.mutations)
+        start_time = time.perf_counter()
+        try:
+            return self.operator.on_visit(node)
+        finally:
+            self.stats.add_time(self.timer_name, time.perf_counter() - start_time)
+            num_mutations = len(self.operator.mutations) - num_mutations
+            if num_mutations > 0: self.stats.count(self.counter_name, num_mutations)
+
+    def on_leave(self, node):
+        self.operator.on_leave(node)
+
+
+_NODE_HANDLERS = {}
+
+_VISITOR_METHODS = ["mutate", "visit", "leave", "on_visit", "on_leave", "on_mutate"]
+
+def _find_node_handlers(cls):
+    for method_name in _VISITOR_METHODS:
+        if getattr(cls, method_name) is not getattr(MutationOperator, method_name):
+            return None
+
+    handlers = {}
+    for attr_name in dir(cls):
+        if attr_name.startswith(("visit_", "leave_")): return None
+
+        if attr_name.startswith("mutate_"):
+            handlers[attr_name[len("mutate_"):]] = attr_name
+
+    return handlers
@@ -1,3 +1,6 @@
+import weakref
+import hashlib
+
 from .base import MutationOperator
 from ..mutation import ASTMutation
 
@@ -17,6 +20,10 @@ def init_inheritance_operator(source_ast, op):
 
 class BaseOverridenElementMutation(MutationOperator):
 
+    @property
+    def class_index(self):
+        return get_class_index(self.ast)
+
     def _is_class_next_parent(self, node):
         current = node.parent
         while current:
@@ -25,19 +32,6 @@ class BaseOverridenElementMutation(MutationOperator):
             current = current.parent
 
         return True
-    
-    def _find_superclasses(self, node, superclasses):
-        module = node.parent
-        while module.type != "module":
-            module = module.parent
-        
-        def _find_superclasses(node):
-            if node.type == "class_definition":
-                name = node.child_by_field_name("name")
-                return name.text.decode() in superclasses
-            return False
-        
-        return find_ast_nodes(module, _find_superclasses)
 
     def is_overridden(self, node, name = None):
         if not self._is_class_next_parent(node):
@@ -51,40 +45,10 @@ class BaseOverridenElementMutation(MutationOperator):
             if parent.type == "class_definition": break
             parent = parent.parent
 
-        superclasses = []
-        superclasses_node = parent.child_by_field_name("superclasses")
-        if superclasses_node:
-            if superclasses_node.type == "identifier":
-                superclasses.append(superclasses_node.text.decode())
-            elif superclasses_node.type == "argument_list":
-                for identifier in superclasses_node.children:
-                    if identifier.type == "identifier":
-                        superclasses.append(identifier.text.decode())
-        
-        superclasses = self._find_superclasses(node, superclasses)
-        
-        def _is_assigment_to(node):
-            if node.type == "assignment":
-                left = node.child_by_field_name("left")
-                if left.type == "identifier": 
-                    return left.text.decode() == name
-                elif left.type == "pattern_list":
-                    return name in left.text.decode()
-
-            if node.type == "function_definition":
-                fn_name = node.child_by_field_name("name").text.decode()
-                return fn_name == name
-            
-            return False
-
-        for superclass_node in superclasses:
-            for node in find_ast_nodes(superclass_node, _is_assigment_to,
-                                       lambda node: node.type in ["function_definition"]):
-                return True
+        # Module level definitions cannot override anything
+        if parent is None: return False
 
-        return False
-
-        
+        return self.class_index.is_overridden(parent, name)
 
 
 class HidingVariableDeletion(BaseOverridenElementMutation):
@@ -239,6 +203,354 @@ class SuperCallingInsertion(BaseSuperCallingMutation, BaseOverridenElementMutati
 
 
 
+# Class index ---------------
+
+class ClassInfo:
+    """
+    Class definition with its base class names and the names of
+    all attributes and methods defined in the class body
+    """
+
+    def __init__(self, name, bases, members, node = None):
+        self.name = name
+        self.bases = bases
+        self.members = members
+        self.node = node
+
+    def __getstate__(self):
+        # AST nodes cannot be pickled
+        state = self.__dict__.copy()
+        state["node"] = None
+        return state
+
+    def __repr__(self):
+        return f"ClassInfo({self.name}, bases = {self.bases})"
+
+
+class ClassIndex:
+    """
+    Index of all class definitions in one or more modules
+
+    The index maps class names to their definitions. Modules can be added
+    incrementally such that base classes defined in other files are found
+    as well. Classes defined in the current module take precedence
+    over classes found in imports.
+
+    An index of whole modules only knows simple class names. Hence,
+    same-named classes of unrelated modules are merged and qualified names
+    (module.Base) are matched by their last component. This over-approximates
+    the overridden members. `imported_class_index` resolves base classes
+    through the imports of a module instead.
+
+    Parameters
+    ----------
+    *sources : SourceCodeAST or Node
+        Modules that are indexed
+
+    imports : ClassIndex
+        Index of other modules that is searched for classes
+        not defined in the indexed modules
+
+    """
+
+    def __init__(self, *sources, imports = None):
+        self.classes = {}
+        self.imports = imports
+
+        for source in sources:
+            self.add(source)
+
+    def add(self, source):
+        try:
+            root_node = source.root_node()
+        except AttributeError:
+            root_node = source
+
+        for class_node in find_ast_nodes(root_node, lambda node: node.type == "class_definition"):
+            name = class_node.child_by_field_name("name").text.decode()
+            info = ClassInfo(name,
+                             _superclass_names(class_node),
+                             _defined_names(class_node),
+                             node = class_node)
+            self.classes.setdefault(name, []).append(info)
+
+        return self
+
+    def update(self, other):
+        for name, infos in other.classes.items():
+            self.classes.setdefault(name, []).extend(infos)
+        return self
+
+    def lookup(self, name):
+        if "." in name:
+            # Qualified names (module.Base) refer to classes of other modules
+            if self.imports is None: return []
+            return self.imports.lookup_qualified(name)
+
+        try:
+            return self.classes[name]
+        except KeyError:
+            if self.imports is None: return []
+            return self.imports.lookup(name)
+
+    def lookup_qualified(self, name):
+        # Resolved imports are indexed by the qualified name
+        try:
+            return self.classes[name]
+        except KeyError:
+            return self.lookup(name.rsplit(".", 1)[-1])
+
+    def is_overridden(self, class_node, name):
+        """Checks whether a direct base class of class_node defines name"""
+        for superclass in _superclass_names(class_node):
+            for info in self.lookup(superclass):
+                if name in info.members: return True
+
+        return False
+
+    def fingerprint(self) -> str:
+        """Hash of all indexed names, base classes and members. Method bodies do not change the hash."""
+        classes = sorted((name, info.name, info.bases, sorted(info.members))
+                         for name, infos in self.classes.items() for info in infos)
+        return hashlib.sha256(repr(classes).encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return sum(len(infos) for infos in self.classes.values())
+
+    def __repr__(self):
+        return f"ClassIndex({list(self.classes)})"
+
+
+_CLASS_INDICES = weakref.WeakKeyDictionary()
+
+def get_class_index(source_ast, imports = None):
+    """
+    Returns the class index of the given AST
+
+    The index is built once per AST and shared between all operators.
+    If imports are given, the index is rebuilt with the new imports.
+    """
+    index = _CLASS_INDICES.get(source_ast)
+
+    if index is None or (imports is not None and index.imports is not imports):
+        index = ClassIndex(source_ast, imports = imports)
+        _CLASS_INDICES[source_ast] = index
+
+    return index
+
+
+# Imports ---------------
+
+# Operators that look up overridden members in the class index
+CLASS_INDEX_OPERATORS = ("IHD", "IOD", "SCI")
+
+# Maximal number of re-exports followed to find a class
+_MAX_REEXPORTS = 8
+
+
+class ModuleClasses:
+    """
+    Classes defined in a module and the names imported by the module
+
+    Parameters
+    ----------
+    source : SourceCodeAST or Node
+        AST of the module
+
+    module_name : str
+        Absolute name of the module used to resolve relative imports
+
+    is_package : bool
+        Whether the module is the __init__ of a package. Default: False
+
+    """
+
+    def __init__(self, source, module_name : str, is_package : bool = False):
+        try:
+            root_node = source.root_node()
+        except AttributeError:
+            root_node = source
+
+        self.module_name = module_name
+        self.classes = ClassIndex(root_node)
+        for infos in self.classes.classes.values():
+            for info in infos: info.node = None
+
+        # Imported names map to their module and name, imported modules to their module
+        self.names, self.modules, self.star_imports = {}, {}, []
+        package = module_name if is_package else module_name.rpartition(".")[0]
+        for node in find_ast_nodes(root_node, lambda node: node.type in ("import_statement", "import_from_statement")):
+            self._add_import(node, package)
+
+    def _add_import(self, node, package):
+        if node.type == "import_statement":
+            for name_node in node.children_by_field_name("name"):
+                if name_node.type == "aliased_import":
+                    module = name_node.child_by_field_name("name").text.decode()
+                    self.modules[name_node.child_by_field_name("alias").text.decode()] = module
+                else:
+                    # import a.b binds the package a
+                    root = name_node.text.decode().split(".")[0]
+                    self.modules[root] = root
+            return
+
+        module = _absolute_module(node.child_by_field_name("module_name"), package)
+        if module is None: return
+
+        if any(child.type == "wildcard_import" for child in node.children):
+            self.star_imports.append(module)
+            return
+
+        for name_node in node.children_by_field_name("name"):
+            if name_node.type == "aliased_import":
+                name  = name_node.child_by_field_name("name").text.decode()
+                alias = name_node.child_by_field_name("alias").text.decode()
+            else:
+                name = alias = name_node.text.decode()
+            self.names[alias] = (module, name)
+
+    def resolve(self, name : str, load_module, _depth : int = 0):
+        """
+        Returns the definitions of the class that name refers to in this module
+
+        Parameters
+        ----------
+        name : str
+            Simple or qualified (module.Base) class name
+
+        load_module : callable
+            Returns the `ModuleClasses` of an absolute module name or None
+
+        """
+        if _depth > _MAX_REEXPORTS: return []
+
+        if "." not in name:
+            if name in self.classes.classes: return self.classes.classes[name]
+
+            if name in self.names:
+                module, imported_name = self.names[name]
+                return _resolve_in(load_module(module), imported_name, load_module, _depth)
+
+            for module in self.star_imports:
+                infos = _resolve_in(load_module(module), name, load_module, _depth)
+                if infos: return infos
+
+            return []
+
+        path, _, name = name.rpartition(".")
+        head, _, tail = path.partition(".")
+
+        if head in self.modules:
+            module = self.modules[head]
+        elif head in self.names:
+            # from pkg import mod
+            module = ".".join(self.names[head])
+        else:
+            return []
+
+        if tail: module = f"{module}.{tail}"
+        return _resolve_in(load_module(module), name, load_module, _depth)
+
+
+def imported_class_index(module : ModuleClasses, load_module) -> ClassIndex:
+    """
+    Indexes the base classes that a module imports from other modules
+
+    Base classes that are not defined in the module are resolved through
+    its imports, including re-exports of packages. Resolved classes are
+    indexed under the name used in the module. Hence, same-named classes
+    of other modules are never confused with the imported base class.
+
+    Parameters
+    ----------
+    module : ModuleClasses
+        Module whose base classes are resolved
+
+    load_module : callable
+        Returns the `ModuleClasses` of an absolute module name or None if unknown
+
+    Returns
+    -------
+    ClassIndex
+        index that can be passed as `class_index` to `mutate`
+
+    """
+    index = ClassIndex()
+
+    for infos in list(module.classes.classes.values()):
+        for info in infos:
+            for base in info.bases:
+                if base in index.classes or base in module.classes.classes: continue
+                resolved = module.resolve(base, load_module)
+                if resolved: index.classes[base] = list(resolved)
+
+    return index
+
+
+def _resolve_in(module, name, load_module, depth):
+    if module is None: return []
+    return module.resolve(name, load_module, _depth = depth + 1)
+
+
+def _absolute_module(module_node, package):
+    if module_node.type != "relative_import":
+        return module_node.text.decode()
+
+    level, module = 0, None
+    for child in module_node.children:
+        if child.type == "import_prefix":
+            level = child.text.decode().count(".")
+        elif child.type == "dotted_name":
+            module = child.text.decode()
+
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts): return None
+    parts = parts[:len(parts) - (level - 1)]
+
+    if module is not None: parts.append(module)
+    return ".".join(parts) if parts else None
+
+
+def _superclass_names(class_node):
+    superclasses_node = class_node.child_by_field_name("superclasses")
+    if superclasses_node is None: return []
+
+    if superclasses_node.type == "argument_list":
+        candidates = superclasses_node.children
+    else:
+        candidates = [superclasses_node]
+
+    superclasses = []
+    for candidate in candidates:
+        if candidate.type == "identifier":
+            superclasses.append(candidate.text.decode())
+        elif candidate.type == "attribute":
+            superclasses.append(candidate.text.decode())
+
+    return superclasses
+
+
+def _defined_names(class_node):
+    names = set()
+
+    def _collect(node):
+        if node.type == "assignment":
+            left = node.child_by_field_name("left")
+            if left.type == "identifier":
+                names.add(left.text.decode())
+            elif left.type == "pattern_list":
+                names.update(n.text.decode() for n in find_ast_nodes(left, lambda n: n.type == "identifier"))
+
+        if node.type == "function_definition":
+            names.add(node.child_by_field_name("name").text.decode())
+
+        return False
+
+    # Method bodies do not define class members
+    find_ast_nodes(class_node, _collect, lambda node: node.type == "function_definition")
+    return names
+
+
 # Helper ---------------
 
 def find_ast_nodes(root_node, fn, stop_fn = None):
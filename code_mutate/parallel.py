@@ -0,0 +1,49 @@
+import multiprocessing
+
+from collections import deque
+
+
+def imap_bounded(fn, iterable, jobs : int, initializer = None, initargs = (), max_pending : int = None):
+    """
+    Maps a function over an iterable in a process pool
+
+    Unlike `Pool.imap`, the iterable is consumed lazily and at most
+    `max_pending` tasks are in flight. Therefore, memory stays bounded
+    even if the workers are faster than the consumer.
+
+    Parameters
+    ----------
+    fn : callable
+        Picklable function executed in the worker processes
+
+    iterable : iterable
+        Arguments passed to fn
+
+    jobs : int
+        Number of worker processes
+
+    max_pending : int
+        Maximal number of submitted but not yet consumed tasks.
+        Default: 2 * jobs
+
+    Yields
+    ------
+    (item, result)
+        the argument and the result of fn in the order of the iterable
+
+    """
+    if max_pending is None: max_pending = 2 * jobs
+
+    with multiprocessing.Pool(jobs, initializer = initializer, initargs = initargs) as pool:
+        pending = deque()
+
+        for item in iterable:
+            pending.append((item, pool.apply_async(fn, (item,))))
+
+            if len(pending) >= max_pending:
+                item, result = pending.popleft()
+                yield item, result.get()
+
+        while pending:
+            item, result = pending.popleft()
+            yield item, result.get()
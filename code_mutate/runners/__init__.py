@@ -0,0 +1,25 @@
+from .base import (
+    TestResult,
+    BaseTestRunner,
+    mutate_imports
+)
+
+from .unittest import UnittestRunner
+
+from .fork import ForkServerRunner
+
+from .coverage import CoverageGuidedRunner, CoverageMap, collect_coverage
+
+from .cached import CachedRunner
+
+from .timeout import CalibratedTimeoutRunner
+
+from .prioritized import PrioritizedRunner
+
+from .pool import run_mutants
+
+from .distributed import Coordinator, Worker
+
+from .subprocess import AsyncSubprocessRunner, run_campaign
+
+from .adaptive import AdaptiveCampaign, ScoreEstimate
@@ -0,0 +1,192 @@
+import math
+import time
+import random
+
+from statistics import NormalDist
+
+from .base import BaseTestRunner, TestResult
+from .pool import run_mutants
+
+
+class ScoreEstimate:
+    """
+    Estimates the mutation score from a random sample of mutants
+
+    The score is the fraction of killed (or timed out) mutants among all
+    mutants that did not produce an error. The confidence interval is a
+    Wilson score interval with a finite population correction, since
+    mutants are sampled without replacement.
+
+    Parameters
+    ----------
+    population : int
+        Total number of mutants in the campaign
+
+    confidence : float
+        Confidence level of the interval. Default: 0.95
+
+    """
+
+    def __init__(self, population : int, confidence : float = 0.95):
+        self.population = population
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+        self.executed = 0
+        self.errors = 0
+        self.killed = 0
+
+    def add(self, result : TestResult):
+        self.executed += 1
+        if result.status == TestResult.ERROR:
+            self.errors += 1
+        elif result.detected:
+            self.killed += 1
+
+    @property
+    def valid(self):
+        return self.executed - self.errors
+
+    @property
+    def score(self):
+        if self.valid == 0: return None
+        return self.killed / self.valid
+
+    def interval(self):
+        """Returns the lower and upper bound of the mutation score"""
+        n = self.valid
+        if n == 0: return 0.0, 1.0
+
+        p = self.score
+        population = self.population - self.errors
+        if n >= population: return p, p
+
+        # Finite population correction (mutants are not sampled twice):
+        # the variance shrinks as if the sample was larger
+        if population > 1:
+            n = n * (population - 1) / (population - n)
+
+        z = self.z
+        center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+        half_width = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+
+        return max(center - half_width, 0.0), min(center + half_width, 1.0)
+
+    @property
+    def width(self):
+        lower, upper = self.interval()
+        return upper - lower
+
+    def __repr__(self):
+        if self.score is None: return "ScoreEstimate(no valid mutants)"
+        lower, upper = self.interval()
+        return (f"ScoreEstimate({100 * self.score:.2f}% [{100 * lower:.2f}%, {100 * upper:.2f}%], "
+                f"{self.executed}/{self.population} mutants)")
+
+
+class AdaptiveCampaign:
+    """
+    Runs mutants in random order until the mutation score is known precisely enough
+
+    The campaign stops as soon as the confidence interval of the mutation
+    score is narrower than the given width or the time budget is used up.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the tests for each mutant
+
+    width : float
+        Maximal width of the confidence interval (e.g. 0.1 for +-5%).
+        Default: None (only stop at the budget)
+
+    budget : float
+        Wall clock budget in seconds. Default: None (no budget)
+
+    confidence : float
+        Confidence level of the interval. Default: 0.95
+
+    seed : int
+        Seed for the execution order of the mutants. Default: 0
+
+    jobs : int
+        Number of worker processes (see `run_mutants`). Default: 1
+
+    timeout : int
+        Timeout per mutant in seconds that is passed to the runner
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, width : float = None, budget : float = None,
+                 confidence : float = 0.95, seed : int = 0, jobs : int = 1, timeout : int = -1):
+        self.runner = runner
+        self.width = width
+        self.budget = budget
+        self.confidence = confidence
+        self.seed = seed
+        self.jobs = jobs
+        self.timeout = timeout
+
+        self.estimate = None
+        self.stop_reason = None
+
+    def should_stop(self, start_time):
+        if self.estimate.executed >= self.estimate.population: return False
+
+        if self.width is not None and self.estimate.valid > 0 and self.estimate.width <= self.width:
+            self.stop_reason = "interval"
+            return True
+
+        if self.budget is not None and time.monotonic() - start_time >= self.budget:
+            self.stop_reason = "budget"
+            return True
+
+        return False
+
+    def run(self, mutants, completed = None):
+        """
+        Runs the mutants in random order until the campaign stops
+
+        Parameters
+        ----------
+        mutants : list of (str, Mutation)
+            Pairs of module name and mutation applied to the module
+
+        completed : dict[int, TestResult]
+            Results of mutants (by index) that were executed in an earlier
+            run of the campaign. They count towards the estimate but are not executed again.
+
+        Yields
+        ------
+        (int, str, Mutation, TestResult)
+            the index of the mutant in mutants, the module name,
+            the mutation and the test result
+
+        """
+        mutants = list(mutants)
+        completed = completed or {}
+        order = [index for index in range(len(mutants)) if index not in completed]
+        random.Random(self.seed).shuffle(order)
+
+        self.estimate = ScoreEstimate(len(mutants), confidence = self.confidence)
+        for result in completed.values():
+            self.estimate.add(result)
+
+        self.stop_reason = "exhausted"
+        start_time = time.monotonic()
+        if self.should_stop(start_time): return
+
+        results = run_mutants(self.runner,
+                              (mutants[index] for index in order),
+                              jobs = self.jobs,
+                              timeout = self.timeout)
+
+        try:
+            for index, (module_name, mutation, result) in zip(order, results):
+                self.estimate.add(result)
+                yield index, module_name, mutation, result
+
+                if self.should_stop(start_time): break
+        finally:
+            # Stops the worker processes of pending mutants
+            results.close()
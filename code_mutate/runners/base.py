@@ -1,4 +1,7 @@
+import os
 import sys
+import time
+import types
 from typing import Tuple
 
 import importlib
@@ -6,20 +9,72 @@ from importlib.abc import Loader, MetaPathFinder
 
 from contextlib import contextmanager
 
-from ..mutation import Mutation
+from ..mutation import Mutation, SourceBuffer
+from ..schemata import SWITCH_NAME
 
 
 class TestResult:
-    pass
+
+    KILLED   = "killed"
+    SURVIVED = "survived"
+    TIMEOUT  = "timeout"
+    RESOURCE = "resource"
+    ERROR    = "error"
+    NO_COVERAGE = "no_coverage"
+
+    def __init__(self, status : str, tests_run : int = 0, failed_tests = None, duration : float = 0.0, message : str = None,
+                 test_durations = None, timings = None):
+        self.status = status
+        self.tests_run = tests_run
+        self.failed_tests = failed_tests or []
+        self.duration = duration
+        self.message = message
+        self.test_durations = test_durations or {}
+        # Seconds per phase of the mutant execution (apply, compile, import and test)
+        self.timings = timings or {}
+
+    @property
+    def killed(self):
+        return self.status == TestResult.KILLED
+
+    @property
+    def detected(self):
+        """Whether the mutant was killed, timed out or exceeded a resource limit"""
+        return self.status in (TestResult.KILLED, TestResult.TIMEOUT, TestResult.RESOURCE)
+
+    def __repr__(self):
+        message = f", {self.message}" if self.message else ""
+        return f"TestResult({self.status}, tests_run={self.tests_run}{message})"
 
 
 class BaseTestRunner:
 
-    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1) -> TestResult:
-        with mutate_imports(module_name, mutation):
-            return self.run_tests(module_name, timeout = timeout)
-        
-    def run_tests(self, target_name : str, timeout : int = -1) -> TestResult:
+    # Optional MutantSchemata used to load mutants without recompiling
+    schemata = None
+
+    def prepare(self):
+        """Called once before the first mutant is executed"""
+        pass
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        """Returns the ids of the tests executed for the given mutant or None for all tests"""
+        return None
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        with mutate_imports(module_name, mutation, schemata = self.schemata) as timings:
+            result = self.run_tests(module_name, timeout = timeout, tests = tests)
+
+        # The import phase is recorded whenever the mutated module is executed
+        if "import" not in timings and result.status != TestResult.ERROR:
+            return TestResult(TestResult.ERROR, result.tests_run, duration = result.duration,
+                              message = f"Mutated module {module_name} was not imported by the tests")
+
+        # The mutated module is loaded while the tests are imported
+        timings["test"] = max(0.0, result.duration - sum(timings.values()))
+        result.timings = timings
+        return result
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
         raise NotImplementedError()
 
 
@@ -27,32 +82,77 @@ class BaseTestRunner:
 
 class MutationLoader(Loader):
 
-    def __init__(self, module_name : str, origin: str, mutation : Mutation):
+    def __init__(self, module_name : str, origin: str, mutation : Mutation, schemata = None, timings = None):
         self.module_name = module_name
         self.origin = origin
         self.mutation = mutation
+        self.schemata = schemata
+        self.timings = timings if timings is not None else {}
 
     def create_module(self, spec):
         return None
     
     def exec_module(self, module):
         origin = self.origin
-        with open(origin, "r") as f:
-            source_code = f.read()
 
-        target_source_code, _ = self.mutation.apply(source_code)
+        if self.schemata is not None:
+            schema = self.schemata.lookup(origin, self.mutation)
+            if schema is not None:
+                code_obj, mutant_id = schema
+                module.__dict__[SWITCH_NAME] = mutant_id
+                self._exec(code_obj, module)
+                return
+
+        start_time = time.perf_counter()
+        target_source_code, _ = self.mutation.apply(_load_source_buffer(origin))
+        apply_time = time.perf_counter()
         target_code_obj = compile(target_source_code, origin, "exec")
-        exec(target_code_obj, module.__dict__)
+        compile_time = time.perf_counter()
+
+        self._add_time("apply", apply_time - start_time)
+        self._add_time("compile", compile_time - apply_time)
+        self._exec(target_code_obj, module)
+
+    def _exec(self, code_obj, module):
+        start_time = time.perf_counter()
+        try:
+            exec(code_obj, module.__dict__)
+        finally:
+            self._add_time("import", time.perf_counter() - start_time)
+
+    def _add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+
+_SOURCE_BUFFERS = {}
+
+def _load_source_buffer(origin):
+    stat = os.stat(origin)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _SOURCE_BUFFERS.get(origin)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(origin, "r") as f:
+        buffer = SourceBuffer(f.read())
+
+    _SOURCE_BUFFERS[origin] = (version, buffer)
+    return buffer
 
 
 class MutationEntryFinder(MetaPathFinder):
 
-    def __init__(self, module_prefix : str, mutation : Mutation):
-        self.module_prefix = module_prefix
+    def __init__(self, module_name : str, mutation : Mutation, schemata = None):
+        self.module_name = module_name
         self.mutation = mutation
+        self.schemata = schemata
+        self.timings = {}
 
     def find_spec(self, fullname, path, target = None):
-        if not self.module_prefix or not fullname.startswith(self.module_prefix):
+        # The mutation positions only refer to the source of the mutated module.
+        # Submodules of a mutated package are imported unchanged.
+        if not self.module_name or fullname != self.module_name:
             return None
         
         spec = importlib.machinery.PathFinder.find_spec(fullname, path)
@@ -61,7 +161,7 @@ class MutationEntryFinder(MetaPathFinder):
         
         if spec.loader and isinstance(spec.loader, importlib.machinery.SourceFileLoader):
             spec.loader = MutationLoader(
-                fullname, spec.origin, self.mutation
+                fullname, spec.origin, self.mutation, self.schemata, self.timings
             )
             return spec
         
@@ -69,25 +169,106 @@ class MutationEntryFinder(MetaPathFinder):
     
 
 @contextmanager
-def mutate_imports(module_name, mutation):
-    finder = MutationEntryFinder(module_name, mutation)
+def mutate_imports(module_name, mutation, schemata = None):
+    finder = MutationEntryFinder(module_name, mutation, schemata)
+
+    # Evict the loaded module and all modules that hold objects of it to force reload
+    dependents = dependent_modules(module_name)
+    evict_modules(module_name)
+    for name in dependents:
+        evict_modules(name)
 
-    # Evict all already loaded modules to force reload
-    to_evict = [name for name in list(sys.modules)
-                if name.startswith(module_name)]
-    for name in to_evict:
-        del sys.modules[name]
+    package_name = module_name.split(".")[0]
+    loaded = set(sys.modules)
 
     # Inject custom mutation loader
     sys.meta_path.insert(0, finder)
     try:
-        yield
+        # Seconds spent applying, compiling and executing mutated modules
+        yield finder.timings
     finally:
         try:
             sys.meta_path.remove(finder)
         except ValueError:
             pass
-            
+
+        # Modules of the package imported during the test run might refer to the mutant
+        evict_modules(module_name)
         for name in list(sys.modules):
-            if name.startswith(module_name):
-                del sys.modules[name]
\ No newline at end of file
+            if name not in loaded and _in_package(name, package_name):
+                del sys.modules[name]
+
+
+def evict_modules(module_prefix):
+    """Removes the given module and all of its submodules from sys.modules"""
+    for name in list(sys.modules):
+        if _in_package(name, module_prefix):
+            del sys.modules[name]
+
+
+def module_origin(module_name : str):
+    """
+    Returns the source file of a module without importing it
+
+    Unlike `importlib.util.find_spec`, parent packages are located
+    on the file system and are not imported. Otherwise, they would
+    stay loaded with the unmutated module.
+    """
+    spec, path = None, None
+    parts = module_name.split(".")
+
+    for i in range(len(parts)):
+        if i > 0 and path is None: return None
+        spec = importlib.machinery.PathFinder.find_spec(".".join(parts[:i + 1]), path)
+        if spec is None: return None
+        path = spec.submodule_search_locations
+
+    if not spec.origin or not spec.has_location: return None
+    return spec.origin
+
+
+def _in_package(name, package_name):
+    return name == package_name or name.startswith(package_name + ".")
+
+
+def dependent_modules(module_name : str):
+    """
+    Returns the loaded modules of the same package that depend on the given module
+
+    A module depends on another module if it references the module
+    or a function or class defined in it, e.g. via `from .ops import add`.
+    Dependencies are followed transitively.
+    """
+    package_name = module_name.split(".")[0]
+    candidates = {name: module for name, module in list(sys.modules.items())
+                  if module is not None and name != module_name and _in_package(name, package_name)}
+
+    dependencies = {module_name}
+    dependents = []
+
+    changed = True
+    while changed:
+        changed = False
+        for name, module in list(candidates.items()):
+            if not _references(module, dependencies): continue
+            dependencies.add(name)
+            dependents.append(name)
+            del candidates[name]
+            changed = True
+
+    return dependents
+
+
+def _references(module, module_names):
+    for name, value in list(getattr(module, "__dict__", {}).items()):
+        if isinstance(value, types.ModuleType):
+            # Importing a submodule binds it in its package again
+            if value.__name__ == f"{module.__name__}.{name}": continue
+            if value.__name__ in module_names: return True
+            continue
+        try:
+            if getattr(value, "__module__", None) in module_names: return True
+        except Exception:
+            # Lazy objects might fail on attribute access
+            continue
+    return False
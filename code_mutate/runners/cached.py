@@ -0,0 +1,117 @@
+import sys
+import importlib.util
+
+from .base import BaseTestRunner, TestResult, module_origin
+from ..cache import ResultCache, hash_file, hash_text, mutant_key
+from ..mutation import Mutation
+
+
+class CachedRunner(BaseTestRunner):
+    """
+    Reuses test results of mutants that did not change since the last run
+
+    Results are keyed by the content hash of the mutated file, the mutation
+    and a fingerprint of the tests that are executed for the mutant
+    (test ids and content hashes of the test modules). Timeouts and exceeded
+    resource limits depend on the limits of the run and are never reused.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes mutants that are not cached
+
+    cache : ResultCache
+        Persistent cache for test results
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, cache : ResultCache):
+        self.runner = runner
+        self.cache = cache
+        self._all_tests = None
+
+    @property
+    def schemata(self):
+        return self.runner.schemata
+
+    def prepare(self):
+        self.runner.prepare()
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        return self.runner.select_tests(module_name, mutation)
+
+    def tests_fingerprint(self, tests):
+        if tests is None:
+            if self._all_tests is None:
+                try:
+                    self._all_tests = self.runner.list_tests()
+                except AttributeError:
+                    # Runner cannot enumerate its tests
+                    self._all_tests = []
+            tests = self._all_tests
+
+        fingerprint = []
+        for test_id in sorted(tests):
+            test_file = _find_test_file(test_id)
+            fingerprint.append((test_id, hash_file(test_file) if test_file else ""))
+
+        return hash_text(repr(fingerprint))
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        origin = module_origin(module_name)
+        if origin is None:
+            return self.runner.run_tests_with_mutant(module_name, mutation, timeout = timeout, tests = tests)
+
+        selected_tests = self.select_tests(module_name, mutation)
+        if selected_tests is None: selected_tests = tests
+
+        key = mutant_key(hash_file(origin), mutation, self.tests_fingerprint(selected_tests))
+
+        cached = self.cache.load_result(key)
+        if cached is not None:
+            return TestResult(**cached)
+
+        result = self.runner.run_tests_with_mutant(module_name, mutation, timeout = timeout, tests = tests)
+
+        # Errors might be caused by the environment and are not reused.
+        # Timeouts and resource verdicts change with --timeout, --timeout-factor and the limits.
+        if result.status not in (TestResult.ERROR, TestResult.TIMEOUT, TestResult.RESOURCE):
+            self.cache.store_result(key, {
+                "status": result.status,
+                "tests_run": result.tests_run,
+                "failed_tests": list(result.failed_tests),
+                "duration": result.duration,
+                "message": result.message,
+            })
+
+        return result
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return self.runner.run_tests(target_name, timeout = timeout, tests = tests)
+
+    def load_tests(self, tests = None):
+        return self.runner.load_tests(tests)
+
+    def list_tests(self):
+        return self.runner.list_tests()
+
+
+def _find_test_file(test_id):
+    parts = test_id.split(".")
+
+    for i in range(len(parts), 0, -1):
+        module_name = ".".join(parts[:i])
+
+        module = sys.modules.get(module_name)
+        if module is not None and getattr(module, "__file__", None):
+            return module.__file__
+
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, AttributeError, ValueError):
+            continue
+
+        if spec is not None and spec.origin and spec.has_location:
+            return spec.origin
+
+    return None
@@ -0,0 +1,217 @@
+import os
+import sys
+import sysconfig
+
+from .base import BaseTestRunner, TestResult, module_origin
+from ..mutation import Mutation
+
+
+class CoverageMap:
+    """
+    Maps executed source lines to the tests that execute them
+
+    Lines executed while the tests are loaded (e.g. module level code,
+    class bodies and function definitions) are attributed to all tests.
+    """
+
+    def __init__(self, tests = None):
+        self.tests = list(tests or [])
+        self.line_tests = {}
+        self.import_lines = set()
+
+    def add_import_lines(self, lines):
+        self.import_lines.update(lines)
+
+    def add_test_lines(self, test_id, lines):
+        if test_id not in self.tests: self.tests.append(test_id)
+        for line in lines:
+            self.line_tests.setdefault(line, set()).add(test_id)
+
+    def tests_for(self, filename : str, start_line : int, end_line : int):
+        """Returns all tests that execute one of the given (one-based) lines in filename"""
+        filename = _normalize(filename)
+        covering = set()
+
+        for line in range(start_line, end_line + 1):
+            if (filename, line) in self.import_lines:
+                return list(self.tests)
+            covering.update(self.line_tests.get((filename, line), ()))
+
+        return [test_id for test_id in self.tests if test_id in covering]
+
+    def tests_for_mutation(self, filename : str, mutation : Mutation):
+        start_line, _, end_line, _ = mutation.source_pos
+        return self.tests_for(filename, start_line + 1, end_line + 1)
+
+
+class CoverageGuidedRunner(BaseTestRunner):
+    """
+    Runs only the tests that execute the mutated lines
+
+    Before the first mutant is executed, every test is run once on
+    the unmutated code to record which lines it executes. Mutants
+    that are not executed by any test are reported as not covered
+    without running any test.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the selected tests. Has to support `list_tests`.
+
+    include : list[str]
+        Source files for which coverage is recorded.
+        Default: all files outside of the Python installation
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, include = None):
+        self.runner = runner
+        self.include = include
+        self.coverage = None
+
+    @property
+    def schemata(self):
+        return self.runner.schemata
+
+    def prepare(self):
+        if self.coverage is None:
+            self.coverage = collect_coverage(self.runner, include = self.include)
+        self.runner.prepare()
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        # Wrapping runners select the tests before the first mutant is executed
+        if self.coverage is None: self.prepare()
+
+        origin = module_origin(module_name)
+        if origin is None: return None
+        return self.coverage.tests_for_mutation(origin, mutation)
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        if self.coverage is None: self.prepare()
+
+        covering_tests = self.select_tests(module_name, mutation)
+        if covering_tests is not None:
+            if tests is not None:
+                # Keep the order of the given tests
+                covering_tests = set(covering_tests)
+                covering_tests = [test_id for test_id in tests if test_id in covering_tests]
+            if not covering_tests:
+                return TestResult(TestResult.NO_COVERAGE)
+            tests = covering_tests
+
+        return self.runner.run_tests_with_mutant(module_name, mutation, timeout = timeout, tests = tests)
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return self.runner.run_tests(target_name, timeout = timeout, tests = tests)
+
+    def load_tests(self, tests = None):
+        return self.runner.load_tests(tests)
+
+    def list_tests(self):
+        return self.runner.list_tests()
+
+
+def collect_coverage(runner : BaseTestRunner, include = None) -> CoverageMap:
+    """
+    Runs every test of the runner once and records the executed lines
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that supports `list_tests` and test selection in `run_tests`
+
+    include : list[str]
+        Source files for which coverage is recorded.
+        Default: all files outside of the Python installation
+
+    Returns
+    -------
+    CoverageMap
+        covered lines per test
+
+    """
+    tracer = _LineTracer(include)
+
+    # Loaded modules have to be reimported to trace module level code
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and tracer.is_traced(module_file):
+            del sys.modules[name]
+
+    with tracer:
+        test_ids = runner.list_tests()
+    coverage = CoverageMap(test_ids)
+    coverage.add_import_lines(tracer.reset())
+
+    for test_id in test_ids:
+        with tracer:
+            runner.run_tests(None, tests = [test_id])
+        coverage.add_test_lines(test_id, tracer.reset())
+
+    return coverage
+
+
+# Tracing ----------------------------------------------------------------
+
+def _normalize(filename):
+    return os.path.realpath(filename)
+
+
+# Never trace the Python installation and code_mutate itself
+_EXCLUDED_PATHS = tuple({
+    _normalize(sysconfig.get_paths()["stdlib"]),
+    _normalize(sysconfig.get_paths()["purelib"]),
+    _normalize(sysconfig.get_paths()["platlib"]),
+    _normalize(os.path.dirname(os.path.dirname(__file__))),
+})
+
+
+class _LineTracer:
+
+    def __init__(self, include = None):
+        self.include = None if include is None else {_normalize(f) for f in include}
+        self.lines = set()
+        self._traced_files = {}
+        self._previous_trace = None
+
+    def _traced_path(self, filename):
+        try:
+            return self._traced_files[filename]
+        except KeyError:
+            path = _normalize(filename)
+            if self.include is not None:
+                traced = path in self.include
+            else:
+                traced = os.path.isfile(path) and not path.startswith(_EXCLUDED_PATHS)
+            self._traced_files[filename] = path if traced else None
+            return self._traced_files[filename]
+
+    def is_traced(self, filename):
+        return self._traced_path(filename) is not None
+
+    def _trace_call(self, frame, event, arg):
+        path = self._traced_path(frame.f_code.co_filename)
+        if path is None: return None
+
+        lines = self.lines
+
+        def _trace_line(frame, event, arg):
+            if event == "line":
+                lines.add((path, frame.f_lineno))
+            return _trace_line
+
+        lines.add((path, frame.f_lineno))
+        return _trace_line
+
+    def reset(self):
+        lines = self.lines
+        self.lines = set()
+        return lines
+
+    def __enter__(self):
+        self._previous_trace = sys.gettrace()
+        sys.settrace(self._trace_call)
+        return self
+
+    def __exit__(self, *args):
+        sys.settrace(self._previous_trace)
@@ -0,0 +1,349 @@
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import threading
+import socketserver
+
+from collections import deque
+
+from .base import BaseTestRunner, TestResult
+from .pool import _run_mutant
+from ..mutation import Mutation
+
+
+class Coordinator:
+    """
+    Distributes mutants over workers that connect via TCP or a Unix socket
+
+    Workers (see `Worker`) pull batches of mutants, execute them with their
+    own test runner and report every verdict as soon as it is known.
+    If the queue is empty, an idle worker steals the not yet started half
+    of the batch of the busiest worker. Mutants of workers that disconnect
+    or stay silent longer than `worker_timeout` are put back into the queue.
+
+    Parameters
+    ----------
+    address : str
+        Address to listen on. Either HOST:PORT or unix:PATH.
+        Port 0 selects a free port (see `address` after `start`).
+
+    batch_size : int
+        Maximal number of mutants per batch. Default: 8
+
+    timeout : int
+        Timeout per mutant in seconds that is passed to the workers
+
+    worker_timeout : float
+        Seconds without any message after which a worker is considered lost.
+        Has to be larger than the time of the slowest mutant. Default: 600
+
+    """
+
+    def __init__(self, address : str, batch_size : int = 8, timeout : int = -1, worker_timeout : float = 600.0):
+        self.address = address
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.worker_timeout = worker_timeout
+
+        self._condition = threading.Condition()
+        self._server = None
+        self._tasks = None
+        self._pending = deque()
+        self._assigned = {}
+        self._cancelled = {}
+        self._results = {}
+        self._num_workers = 0
+
+    # Server ----------------------------------------------------------------
+
+    def start(self):
+        family, server_address = parse_address(self.address)
+
+        coordinator = self
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator._serve_worker(self.request)
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(server_address): os.unlink(server_address)
+            self._server = _UnixServer(server_address, Handler)
+            self.address = f"unix:{server_address}"
+        else:
+            self._server = _TCPServer(server_address, Handler)
+            host, port = self._server.server_address[:2]
+            self.address = f"{host}:{port}"
+
+        threading.Thread(target = self._server.serve_forever, daemon = True).start()
+        return self.address
+
+    def close(self):
+        if self._server is None: return
+
+        self._server.shutdown()
+        self._server.server_close()
+
+        family, server_address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(server_address):
+            os.unlink(server_address)
+
+        self._server = None
+
+    def run(self, mutants):
+        """
+        Executes the mutants on all connected workers
+
+        Parameters
+        ----------
+        mutants : iterable of (str, Mutation)
+            Pairs of module name and mutation applied to the module
+
+        Yields
+        ------
+        (str, Mutation, TestResult)
+            the module name, the mutation and the test result in the order of the given mutants
+
+        """
+        with self._condition:
+            self._tasks = list(mutants)
+            self._pending = deque(range(len(self._tasks)))
+            self._results = {}
+
+        if self._server is None: self.start()
+        print(f"Waiting for workers on {self.address}", file = sys.stderr)
+
+        try:
+            for index, (module_name, mutation) in enumerate(self._tasks):
+                with self._condition:
+                    while index not in self._results:
+                        self._condition.wait()
+                    result = self._results[index]
+
+                yield module_name, mutation, result
+        finally:
+            self.close()
+
+    # Scheduling ----------------------------------------------------------------
+
+    def _done(self):
+        return len(self._results) >= len(self._tasks)
+
+    def _assign(self, worker_id, max_tasks):
+        """Returns the next batch of the worker, an empty batch to wait or None if all mutants are done"""
+        with self._condition:
+            # Workers that connect before the campaign is started wait
+            if self._tasks is None: return []
+            if self._done(): return None
+
+            assigned = self._assigned.setdefault(worker_id, [])
+            batch = []
+            while self._pending and len(batch) < max_tasks:
+                index = self._pending.popleft()
+                if index not in self._results: batch.append(index)
+
+            if not batch: batch = self._steal(worker_id)
+
+            assigned.extend(batch)
+            return batch
+
+    def _steal(self, worker_id):
+        # The first mutant of a batch is already running
+        victim, victim_tasks = max(((other, tasks) for other, tasks in self._assigned.items()
+                                    if other != worker_id),
+                                   key = lambda item: len(item[1]), default = (None, []))
+        if len(victim_tasks) < 2: return []
+
+        num_stolen = len(victim_tasks) // 2
+        stolen = victim_tasks[-num_stolen:]
+        del victim_tasks[-num_stolen:]
+
+        self._cancelled.setdefault(victim, set()).update(stolen)
+        return stolen
+
+    def _complete(self, worker_id, index, result):
+        """Records the result and returns the mutants the worker should drop"""
+        with self._condition:
+            assigned = self._assigned.get(worker_id, [])
+            if index in assigned: assigned.remove(index)
+
+            if index not in self._results:
+                self._results[index] = result
+                self._condition.notify_all()
+
+            return sorted(self._cancelled.pop(worker_id, ()))
+
+    def _release(self, worker_id):
+        """Puts the unfinished mutants of a lost worker back into the queue"""
+        with self._condition:
+            assigned = self._assigned.pop(worker_id, [])
+            self._cancelled.pop(worker_id, None)
+            self._pending.extendleft(index for index in reversed(assigned)
+                                     if index not in self._results)
+
+    def _serve_worker(self, connection):
+        with self._condition:
+            worker_id = self._num_workers
+            self._num_workers += 1
+
+        connection.settimeout(self.worker_timeout)
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        try:
+            while True:
+                message = recv_message(connection)
+                if message is None: break
+
+                if message["type"] == "request":
+                    batch = self._assign(worker_id, min(message.get("max", self.batch_size), self.batch_size))
+                    if batch is None:
+                        send_message(connection, {"type": "done"})
+                        break
+                    if not batch:
+                        send_message(connection, {"type": "wait", "delay": 0.1})
+                        continue
+                    send_message(connection, {
+                        "type": "tasks",
+                        "timeout": self.timeout,
+                        "tasks": [_encode_task(index, *self._tasks[index]) for index in batch],
+                    })
+
+                elif message["type"] == "result":
+                    cancel = self._complete(worker_id, message["task"], _decode_result(message["result"]))
+                    send_message(connection, {"type": "ack", "cancel": cancel})
+
+        except (OSError, ValueError):
+            # Lost connection, timeout or corrupted message
+            pass
+        finally:
+            self._release(worker_id)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class Worker:
+    """
+    Pulls mutants from a `Coordinator` and executes them with a test runner
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the tests for each mutant
+
+    address : str
+        Address of the coordinator. Either HOST:PORT or unix:PATH.
+
+    batch_size : int
+        Maximal number of mutants requested at once. Default: 8
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, address : str, batch_size : int = 8):
+        self.runner = runner
+        self.address = address
+        self.batch_size = batch_size
+        self.executed = 0
+
+    def run(self) -> int:
+        """Executes mutants until the coordinator has no more work and returns their number"""
+        family, address = parse_address(self.address)
+
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(address)
+
+            while True:
+                send_message(connection, {"type": "request", "max": self.batch_size})
+                message = recv_message(connection)
+                if message is None or message["type"] == "done": break
+
+                if message["type"] == "wait":
+                    time.sleep(message["delay"])
+                    continue
+
+                self._run_batch(connection, message["tasks"], message["timeout"])
+
+        return self.executed
+
+    def _run_batch(self, connection, tasks, timeout):
+        tasks = deque(tasks)
+
+        while tasks:
+            index, module_name, mutation = _decode_task(tasks.popleft())
+            result = _run_mutant(self.runner, module_name, mutation, timeout)
+            self.executed += 1
+
+            send_message(connection, {"type": "result", "task": index, "result": _encode_result(result)})
+            message = recv_message(connection)
+            if message is None: raise ConnectionError("Coordinator closed the connection")
+
+            # Mutants stolen by other workers
+            cancel = set(message["cancel"])
+            if cancel: tasks = deque(task for task in tasks if task["task"] not in cancel)
+
+
+# Protocol ----------------------------------------------------------------
+
+def parse_address(address : str):
+    """Returns the socket family and address for HOST:PORT or unix:PATH"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT or unix:PATH but got {address}")
+
+    return socket.AF_INET, (host, int(port))
+
+
+def send_message(connection, message):
+    payload = json.dumps(message).encode("utf-8")
+    connection.sendall(struct.pack("!I", len(payload)) + payload)
+
+
+def recv_message(connection):
+    header = _recv_exactly(connection, 4)
+    if header is None: return None
+
+    payload = _recv_exactly(connection, struct.unpack("!I", header)[0])
+    if payload is None: return None
+
+    return json.loads(payload.decode("utf-8"))
+
+
+def _recv_exactly(connection, size):
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 65536))
+        if not chunk: return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _encode_task(index, module_name, mutation):
+    return {"task": index, "module": module_name, "source_pos": list(mutation.source_pos),
+            "target_text": mutation.target_text, "op_type": mutation.op_type}
+
+
+def _decode_task(task):
+    mutation = Mutation(tuple(task["source_pos"]), task["target_text"], op_type = task["op_type"])
+    return task["task"], task["module"], mutation
+
+
+def _encode_result(result):
+    return {"status": result.status, "tests_run": result.tests_run,
+            "failed_tests": list(result.failed_tests), "duration": result.duration,
+            "message": result.message, "timings": result.timings}
+
+
+def _decode_result(result):
+    return TestResult(**result)
@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import pickle
+import select
+import signal
+import importlib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .base import BaseTestRunner, TestResult, evict_modules, dependent_modules, module_origin
+from ..mutation import Mutation
+
+
+class ForkServerRunner(BaseTestRunner):
+    """
+    Imports the test environment once and forks a child process per mutant
+
+    The parent process imports the tests, their dependencies and the
+    unmutated project. Each mutant is then executed in a forked child
+    that only re-imports the mutated module (and the test modules).
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the tests inside the forked child
+
+    preload : list[str]
+        Additional modules that are imported once in the parent process
+
+    reload_package : bool
+        Whether all modules of the mutated package are re-imported in the child.
+        Otherwise, only the mutated module and the modules of its package that
+        imported it or names defined in it are re-imported. Modules that only
+        imported constants from the mutated module keep the original values.
+        Default: False
+
+    memory_limit : int
+        Maximal address space of a child process in bytes. Mutants that
+        exceed the limit are reported as `resource`. Default: no limit
+
+    cpu_limit : float
+        Maximal CPU time of a child process in seconds. Mutants that
+        exceed the limit are reported as `resource`. Default: no limit
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, preload = None, reload_package : bool = False,
+                 memory_limit : int = None, cpu_limit : float = None):
+        if not hasattr(os, "fork"):
+            raise OSError("Fork server runner requires os.fork which is not supported on this platform")
+
+        if (memory_limit or cpu_limit) and resource is None:
+            raise OSError("Resource limits require the resource module which is not supported on this platform")
+
+        self.runner = runner
+        self.preload = list(preload or [])
+        self.reload_package = reload_package
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self._prepared_pid = None
+        self._dependents = {}
+
+    def prepare(self):
+        if self._prepared_pid == os.getpid(): return
+        self.runner.prepare()
+
+        for module_name in self.preload:
+            importlib.import_module(module_name)
+
+        # Loading the tests imports all dependencies of the tests
+        try:
+            self.runner.load_tests()
+        except AttributeError:
+            # Runner does not support preloading tests
+            pass
+
+        self._prepared_pid = os.getpid()
+
+    def load_tests(self, tests = None):
+        return self.runner.load_tests(tests)
+
+    def list_tests(self):
+        return self.runner.list_tests()
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        return self.runner.select_tests(module_name, mutation)
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        self.prepare()
+
+        # Build the schema once in the parent such that all children share it
+        if self.runner.schemata is not None:
+            origin = module_origin(module_name)
+            if origin is not None:
+                self.runner.schemata.load(origin)
+
+        # Modules that are re-imported in the child besides the mutated module
+        if self.reload_package:
+            evicted = [module_name.split(".")[0]]
+        else:
+            evicted = self._dependent_modules(module_name)
+
+        start_time = time.perf_counter()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            os.close(read_fd)
+            _set_limits(self.memory_limit, self.cpu_limit)
+            _run_child(self.runner, module_name, mutation, tests, write_fd, evicted)
+
+        os.close(write_fd)
+        try:
+            payload, timed_out = _read_with_timeout(read_fd, timeout)
+        finally:
+            os.close(read_fd)
+
+        if timed_out:
+            os.kill(pid, signal.SIGKILL)
+        _, exit_status = os.waitpid(pid, 0)
+        duration = time.perf_counter() - start_time
+
+        if timed_out:
+            return TestResult(TestResult.TIMEOUT, duration = duration)
+
+        if not payload:
+            if _exceeded_limit(exit_status):
+                return TestResult(TestResult.RESOURCE, duration = duration,
+                                  message = f"Test process exceeded a resource limit (status {exit_status})")
+            return TestResult(TestResult.ERROR, duration = duration,
+                              message = f"Test process exited unexpectedly (status {exit_status})")
+
+        result = pickle.loads(payload)
+        result.duration = duration
+        return result
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return self.runner.run_tests(target_name, timeout = timeout, tests = tests)
+
+    def _dependent_modules(self, module_name):
+        # The parent holds the unmutated modules. Therefore, dependents are found once.
+        try:
+            return self._dependents[module_name]
+        except KeyError:
+            dependents = dependent_modules(module_name)
+            self._dependents[module_name] = dependents
+            return dependents
+
+
+# Child process ----------------------------------------------------------------
+
+# Exit code of a child process that ran out of memory outside of a test
+_OUT_OF_MEMORY = 3
+
+
+def _set_limits(memory_limit, cpu_limit):
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (int(memory_limit), int(memory_limit)))
+
+    if cpu_limit:
+        # The soft limit sends SIGXCPU, the hard limit one second later SIGKILL
+        cpu_limit = max(1, int(cpu_limit + 0.5))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+
+
+def _exceeded_limit(exit_status):
+    if os.WIFSIGNALED(exit_status):
+        return os.WTERMSIG(exit_status) in (signal.SIGXCPU, signal.SIGKILL)
+    return os.WIFEXITED(exit_status) and os.WEXITSTATUS(exit_status) == _OUT_OF_MEMORY
+
+
+def _run_child(runner, module_name, mutation, tests, write_fd, evicted):
+    exit_code = 0
+    try:
+        for name in evicted:
+            evict_modules(name)
+
+        result = runner.run_tests_with_mutant(module_name, mutation, tests = tests)
+
+        payload = pickle.dumps(result)
+        with os.fdopen(write_fd, "wb") as f:
+            f.write(payload)
+    except MemoryError:
+        exit_code = _OUT_OF_MEMORY
+    except BaseException:
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+
+def _read_with_timeout(read_fd, timeout):
+    deadline = time.monotonic() + timeout if timeout is not None and timeout > 0 else None
+    chunks = []
+
+    while True:
+        wait_time = None
+        if deadline is not None:
+            wait_time = deadline - time.monotonic()
+            if wait_time <= 0: return b"".join(chunks), True
+
+        ready, _, _ = select.select([read_fd], [], [], wait_time)
+        if not ready: continue
+
+        chunk = os.read(read_fd, 65536)
+        if not chunk: return b"".join(chunks), False
+        chunks.append(chunk)
@@ -0,0 +1,71 @@
+import os
+
+from .base import BaseTestRunner, TestResult
+from ..parallel import imap_bounded
+
+
+def run_mutants(runner : BaseTestRunner, mutants, jobs : int = 1, timeout : int = -1):
+    """
+    Runs the tests of the given runner for each mutant
+
+    Mutants are distributed over a pool of worker processes. Every
+    worker loads the mutated module via `mutate_imports`.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Test runner that is executed for each mutant. Has to be picklable
+        if more than one job is used.
+
+    mutants : iterable of (str, Mutation)
+        Pairs of module name and mutation applied to the module
+
+    jobs : int
+        Number of worker processes. If None, one process per CPU is used.
+        Default: 1 (runs in the current process)
+
+    timeout : int
+        Timeout per mutant in seconds that is passed to the runner
+
+    Yields
+    ------
+    (str, Mutation, TestResult)
+        the module name, the mutation and the test result. Results are
+        produced in the order of the given mutants independent of the number of jobs.
+
+    """
+    if jobs is None: jobs = os.cpu_count() or 1
+
+    if jobs <= 1:
+        for module_name, mutation in mutants:
+            yield module_name, mutation, _run_mutant(runner, module_name, mutation, timeout)
+        return
+
+    tasks = ((module_name, mutation, timeout) for module_name, mutation in mutants)
+    results = imap_bounded(_run_worker_task, tasks, jobs,
+                           initializer = _init_worker,
+                           initargs = (runner,))
+
+    for (module_name, mutation, _), result in results:
+        yield module_name, mutation, result
+
+
+def _run_mutant(runner, module_name, mutation, timeout):
+    try:
+        return runner.run_tests_with_mutant(module_name, mutation, timeout = timeout)
+    except Exception as e:
+        return TestResult(TestResult.ERROR, message = f"{type(e).__name__}: {e}")
+
+
+# Worker ----------------------------------------------------------------
+
+_worker_runner = None
+
+def _init_worker(runner):
+    global _worker_runner
+    _worker_runner = runner
+
+
+def _run_worker_task(task):
+    module_name, mutation, timeout = task
+    return _run_mutant(_worker_runner, module_name, mutation, timeout)
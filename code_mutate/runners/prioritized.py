@@ -0,0 +1,86 @@
+from .base import BaseTestRunner, TestResult
+from ..history import KillHistory
+from ..mutation import Mutation
+
+
+class PrioritizedRunner(BaseTestRunner):
+    """
+    Runs the tests that most likely kill a mutant first
+
+    The tests of every mutant are ordered by a persisted history of the
+    tests that killed mutants on the same line or of the same operator
+    (see `KillHistory.prioritize`). Killing tests are recorded after every
+    mutant. Test durations are recorded once from the unmutated code
+    since mutants stop tests early. Combined with a fail-fast runner,
+    most killed mutants only execute a single test.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the tests in the given order. Has to support `list_tests`.
+
+    history : KillHistory
+        Persistent history of killing tests
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, history : KillHistory):
+        self.runner = runner
+        self.history = history
+        self._all_tests = None
+        self._durations_recorded = False
+
+    @property
+    def schemata(self):
+        return self.runner.schemata
+
+    def prepare(self):
+        self.runner.prepare()
+        if not self._durations_recorded: self.record_durations()
+
+    def record_durations(self):
+        """Records the test durations on the unmutated code"""
+        try:
+            # The calibration run of CalibratedTimeoutRunner already measured the durations
+            durations = self.runner.test_durations
+        except AttributeError:
+            durations = self.runner.run_tests(None).test_durations
+
+        if durations: self.history.record_durations(durations)
+        self._durations_recorded = True
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        return self.runner.select_tests(module_name, mutation)
+
+    def all_tests(self):
+        if self._all_tests is None:
+            try:
+                self._all_tests = self.runner.list_tests()
+            except AttributeError:
+                # Runner cannot enumerate its tests
+                self._all_tests = []
+        return self._all_tests
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        selected_tests = self.select_tests(module_name, mutation)
+        if selected_tests is None: selected_tests = tests
+        if selected_tests is None: selected_tests = self.all_tests()
+
+        if selected_tests:
+            tests = self.history.prioritize(module_name, mutation, selected_tests)
+
+        result = self.runner.run_tests_with_mutant(module_name, mutation, timeout = timeout, tests = tests)
+
+        if result.killed and result.failed_tests:
+            self.history.record_kill(module_name, mutation, result.failed_tests)
+
+        return result
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return self.runner.run_tests(target_name, timeout = timeout, tests = tests)
+
+    def load_tests(self, tests = None):
+        return self.runner.load_tests(tests)
+
+    def list_tests(self):
+        return self.runner.list_tests()
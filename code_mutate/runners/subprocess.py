@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import asyncio
+
+from .base import BaseTestRunner, TestResult
+from ..mutation import Mutation
+
+
+# Prefix of the line that carries the test result of the child process
+RESULT_MARKER = "__cmutate_result__ "
+
+# Maximal length of an output line in bytes
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class AsyncSubprocessRunner(BaseTestRunner):
+    """
+    Runs the tests of every mutant in a fresh Python subprocess using asyncio
+
+    At most `concurrency` subprocesses run at the same time. Since waiting for
+    a subprocess does not block a thread, many mutants of I/O-bound test
+    suites can be executed concurrently by a single process. The output
+    of the subprocesses is streamed line by line to the `output` callback.
+
+    Use `run_mutant` within an event loop or `run_campaign` to execute
+    many mutants. The synchronous `run_tests_with_mutant` runs
+    a single mutant in a new event loop.
+
+    Parameters
+    ----------
+    test_names : str or list[str]
+        Names of test modules, classes or methods (see `UnittestRunner`)
+
+    concurrency : int
+        Maximal number of concurrently running subprocesses.
+        Default: one per CPU
+
+    failfast : bool
+        Whether the test run stops at the first failing test. Default: False
+
+    output : callable
+        Called with the module name, the mutation (None for unmutated tests),
+        the stream name ("stdout" or "stderr") and every line printed by a subprocess.
+        Default: output is discarded
+
+    python : str
+        Python interpreter used for the subprocesses. Default: sys.executable
+
+    """
+
+    def __init__(self, test_names, concurrency : int = None, failfast : bool = False,
+                 output = None, python : str = None):
+        if isinstance(test_names, str): test_names = [test_names]
+        self.test_names = list(test_names)
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.failfast = failfast
+        self.output = output
+        self.python = python or sys.executable
+
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    @property
+    def semaphore(self):
+        # Semaphores are bound to the event loop they are used in
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        """Runs the tests against the mutated module (or the unmutated code if mutation is None)"""
+        task = {
+            "tests": self.test_names if tests is None else list(tests),
+            "failfast": self.failfast,
+            "module": module_name,
+            "mutation": None if mutation is None else {
+                "source_pos": list(mutation.source_pos),
+                "target_text": mutation.target_text,
+                "op_type": mutation.op_type,
+            },
+        }
+
+        async with self.semaphore:
+            return await self._run_subprocess(module_name, mutation, task, timeout)
+
+    async def _run_subprocess(self, module_name, mutation, task, timeout):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        process = await asyncio.create_subprocess_exec(
+            self.python, "-c", f"from {__name__} import _main; _main()",
+            stdin  = asyncio.subprocess.PIPE,
+            stdout = asyncio.subprocess.PIPE,
+            stderr = asyncio.subprocess.PIPE,
+            env = _child_environment(),
+            limit = _LINE_LIMIT,
+        )
+
+        process.stdin.write(json.dumps(task).encode("utf-8"))
+        process.stdin.close()
+
+        lines = {"stdout": [], "stderr": []}
+        communicate = asyncio.gather(
+            self._read_stream(process.stdout, "stdout", module_name, mutation, lines),
+            self._read_stream(process.stderr, "stderr", module_name, mutation, lines),
+            process.wait(),
+        )
+
+        try:
+            await asyncio.wait_for(communicate, timeout if timeout is not None and timeout > 0 else None)
+        except asyncio.TimeoutError:
+            await _kill(process)
+            return TestResult(TestResult.TIMEOUT, duration = loop.time() - start_time)
+        except asyncio.CancelledError:
+            await _kill(process)
+            raise
+
+        duration = loop.time() - start_time
+
+        result = lines.get("result")
+        if result is None:
+            message = lines["stderr"][-1] if lines["stderr"] else None
+            return TestResult(TestResult.ERROR, duration = duration,
+                              message = f"Test process exited with code {process.returncode}: {message}")
+
+        result = TestResult(**json.loads(result))
+        result.duration = duration
+        return result
+
+    async def _read_stream(self, stream, name, module_name, mutation, lines):
+        while True:
+            line = await stream.readline()
+            if not line: return
+
+            line = line.decode("utf-8", errors = "replace").rstrip("\n")
+            if name == "stdout" and line.startswith(RESULT_MARKER):
+                lines["result"] = line[len(RESULT_MARKER):]
+                continue
+
+            if name == "stderr":
+                # Only the last line is kept as error message
+                lines["stderr"][-1:] = [line]
+
+            if self.output is not None:
+                self.output(module_name, mutation, name, line)
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        return asyncio.run(self.run_mutant(module_name, mutation, timeout = timeout, tests = tests))
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return asyncio.run(self.run_mutant(target_name, None, timeout = timeout, tests = tests))
+
+    def list_tests(self):
+        from .unittest import UnittestRunner
+        return UnittestRunner(self.test_names).list_tests()
+
+
+async def run_campaign(runner : AsyncSubprocessRunner, mutants, timeout : int = -1, max_pending : int = None):
+    """
+    Runs the tests for each mutant concurrently
+
+    Parameters
+    ----------
+    runner : AsyncSubprocessRunner
+        Runner that executes the mutants in subprocesses. The number of
+        concurrently running mutants is bounded by its concurrency.
+
+    mutants : iterable of (str, Mutation)
+        Pairs of module name and mutation applied to the module
+
+    timeout : int
+        Timeout per mutant in seconds
+
+    max_pending : int
+        Maximal number of mutants that are scheduled at once.
+        Default: 2 * runner.concurrency
+
+    Yields
+    ------
+    (str, Mutation, TestResult)
+        the module name, the mutation and the test result in the order of completion
+
+    """
+    if max_pending is None: max_pending = 2 * runner.concurrency
+
+    async def _run(module_name, mutation):
+        result = await runner.run_mutant(module_name, mutation, timeout = timeout)
+        return module_name, mutation, result
+
+    mutants = iter(mutants)
+    pending = set()
+
+    try:
+        while True:
+            for module_name, mutation in mutants:
+                pending.add(asyncio.ensure_future(_run(module_name, mutation)))
+                if len(pending) >= max_pending: break
+
+            if not pending: return
+
+            done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # Kills the subprocesses of mutants that are still running
+        for task in pending: task.cancel()
+        await asyncio.gather(*pending, return_exceptions = True)
+
+
+async def _kill(process):
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+def _child_environment():
+    # The child has to import code_mutate even if it is not installed
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = os.environ.copy()
+    python_path = env.get("PYTHONPATH")
+    env["PYTHONPATH"] = package_root if not python_path else os.pathsep.join([python_path, package_root])
+    return env
+
+
+# Child process ----------------------------------------------------------------
+
+def _main():
+    from .unittest import UnittestRunner
+
+    task = json.load(sys.stdin)
+
+    # Mutated modules and tests are imported relative to the working directory
+    sys.path.insert(0, os.getcwd())
+
+    runner = UnittestRunner(task["tests"], failfast = task["failfast"])
+    if task["mutation"] is None:
+        result = runner.run_tests(task["module"])
+    else:
+        mutation = task["mutation"]
+        mutation = Mutation(tuple(mutation["source_pos"]), mutation["target_text"], op_type = mutation["op_type"])
+        result = runner.run_tests_with_mutant(task["module"], mutation)
+
+    result = {"status": result.status, "tests_run": result.tests_run,
+              "failed_tests": list(result.failed_tests), "duration": result.duration,
+              "message": result.message, "test_durations": result.test_durations,
+              "timings": result.timings}
+
+    sys.stdout.flush()
+    print(RESULT_MARKER + json.dumps(result), flush = True)
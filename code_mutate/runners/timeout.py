@@ -0,0 +1,87 @@
+from .base import BaseTestRunner, TestResult
+from ..mutation import Mutation
+
+
+class CalibratedTimeoutRunner(BaseTestRunner):
+    """
+    Derives the timeout of every mutant from the test time on the unmutated code
+
+    Before the first mutant is executed, the tests are run once on the
+    unmutated code. The timeout of a mutant is then computed as
+    `factor * baseline + constant` where the baseline is the time of the
+    tests selected for the mutant (or of the full suite).
+
+    To reliably stop mutants that hang (e.g. infinite loops), the runner
+    should wrap a `ForkServerRunner` which kills the test process on timeout.
+
+    Parameters
+    ----------
+    runner : BaseTestRunner
+        Runner that executes the tests
+
+    factor : float
+        Factor applied to the baseline time. Default: 2.0
+
+    constant : float
+        Seconds added to the scaled baseline time. Default: 1.0
+
+    """
+
+    def __init__(self, runner : BaseTestRunner, factor : float = 2.0, constant : float = 1.0):
+        self.runner = runner
+        self.factor = factor
+        self.constant = constant
+        self.baseline = None
+        self.test_durations = {}
+
+    @property
+    def schemata(self):
+        return self.runner.schemata
+
+    def prepare(self):
+        self.runner.prepare()
+        if self.baseline is None: self.calibrate()
+
+    def calibrate(self):
+        result = self.runner.run_tests(None)
+        if result.status != TestResult.SURVIVED:
+            raise RuntimeError(f"Cannot calibrate the timeout since the tests fail on the unmutated code: {result}")
+
+        self.baseline = result.duration
+        self.test_durations = dict(result.test_durations)
+
+    def timeout_for(self, tests = None) -> float:
+        """Returns the timeout in seconds for running the given tests (or all tests)"""
+        baseline = self.baseline
+
+        if tests is not None and all(test_id in self.test_durations for test_id in tests):
+            # Loading the tests takes the same time independent of the selection
+            overhead = max(0.0, self.baseline - sum(self.test_durations.values()))
+            baseline = overhead + sum(self.test_durations[test_id] for test_id in tests)
+
+        return self.factor * baseline + self.constant
+
+    def select_tests(self, module_name : str, mutation : Mutation):
+        return self.runner.select_tests(module_name, mutation)
+
+    def run_tests_with_mutant(self, module_name : str, mutation : Mutation, timeout : int = -1, tests = None) -> TestResult:
+        if self.baseline is None: self.prepare()
+
+        selected_tests = self.select_tests(module_name, mutation)
+        if selected_tests is None: selected_tests = tests
+
+        # An explicit timeout is an upper bound for the calibrated timeout
+        calibrated = self.timeout_for(selected_tests)
+        if timeout is None or timeout <= 0 or calibrated < timeout:
+            timeout = calibrated
+
+        return self.runner.run_tests_with_mutant(module_name, mutation, timeout = timeout, tests = tests)
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        return self.runner.run_tests(target_name, timeout = timeout, tests = tests)
+
+    def load_tests(self, tests = None):
+        return self.runner.load_tests(tests)
+
+    def list_tests(self):
+        return self.runner.list_tests()
@@ -0,0 +1,152 @@
+import time
+import signal
+import threading
+import unittest
+
+from .base import BaseTestRunner, TestResult, evict_modules
+
+
+class UnittestRunner(BaseTestRunner):
+    """
+    Runs a fixed set of unittest targets against the (mutated) code
+
+    Parameters
+    ----------
+    test_names : str or list[str]
+        Names of test modules, classes or methods as accepted
+        by `unittest.TestLoader.loadTestsFromNames`
+
+    failfast : bool
+        Whether the test run stops at the first failing test. Default: False
+
+    """
+
+    def __init__(self, test_names, failfast : bool = False):
+        if isinstance(test_names, str): test_names = [test_names]
+        self.test_names = list(test_names)
+        self.failfast = failfast
+
+    def load_tests(self, tests = None):
+        test_names = self.test_names if tests is None else tests
+
+        # Test modules hold references to the code under test.
+        # Therefore, we have to reimport them for every mutant.
+        for test_name in test_names:
+            evict_modules(test_name.split(".")[0])
+
+        return unittest.defaultTestLoader.loadTestsFromNames(test_names)
+
+    def list_tests(self):
+        return [test.id() for test in _iter_tests(self.load_tests())]
+
+    def run_tests(self, target_name : str, timeout : int = -1, tests = None) -> TestResult:
+        start_time = time.perf_counter()
+
+        try:
+            suite = self.load_tests(tests)
+        except Exception as e:
+            return TestResult(TestResult.ERROR,
+                              duration = time.perf_counter() - start_time,
+                              message = f"{type(e).__name__}: {e}")
+
+        result = _TimedTestResult()
+        result.failfast = self.failfast
+        with _time_limit(result, timeout) as timer:
+            suite.run(result)
+
+        failed_tests = [test.id() for test, _ in result.failures + result.errors]
+        duration     = time.perf_counter() - start_time
+
+        if timer.timed_out:
+            return TestResult(TestResult.TIMEOUT, result.testsRun, failed_tests, duration)
+
+        if result.out_of_memory:
+            return TestResult(TestResult.RESOURCE, result.testsRun, failed_tests, duration,
+                              message = "MemoryError")
+
+        if failed_tests:
+            return TestResult(TestResult.KILLED, result.testsRun, failed_tests, duration,
+                              test_durations = result.durations)
+
+        return TestResult(TestResult.SURVIVED, result.testsRun, duration = duration,
+                          test_durations = result.durations)
+
+
+class _TimedTestResult(unittest.TestResult):
+    """Records the duration of every test and whether a test ran out of memory"""
+
+    def __init__(self):
+        super().__init__()
+        self.durations = {}
+        self.out_of_memory = False
+        self._start_time = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._start_time = time.perf_counter()
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.durations[test.id()] = time.perf_counter() - self._start_time
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        if issubclass(err[0], MemoryError): self.out_of_memory = True
+
+
+def _iter_tests(suite):
+    if isinstance(suite, unittest.TestSuite):
+        for test in suite:
+            yield from _iter_tests(test)
+    else:
+        yield suite
+
+
+# Timeout ----------------------------------------------------------------
+
+class TestTimeout(BaseException):
+    """Not an Exception such that `except Exception` in the tested code cannot swallow it"""
+
+
+class _time_limit:
+    """
+    Interrupts the current test run via SIGALRM after timeout seconds.
+
+    The alarm is repeated until the test run returns since code
+    under test might still swallow the timeout with a bare except.
+    Only available in the main thread of Unix processes. In all other cases,
+    the time limit is silently ignored.
+    """
+
+    # Seconds between repeated alarms after the timeout
+    REPEAT_INTERVAL = 0.1
+
+    def __init__(self, result, timeout):
+        self.result = result
+        self.timeout = timeout
+        self.timed_out = False
+        self._previous_handler = None
+
+    def _is_supported(self):
+        return (self.timeout is not None and self.timeout > 0
+                and hasattr(signal, "setitimer")
+                and threading.current_thread() is threading.main_thread())
+
+    def _on_timeout(self, signum, frame):
+        self.timed_out = True
+        self.result.stop()
+        raise TestTimeout()
+
+    def __enter__(self):
+        if self._is_supported():
+            self._previous_handler = signal.signal(signal.SIGALRM, self._on_timeout)
+            signal.setitimer(signal.ITIMER_REAL, self.timeout, self.REPEAT_INTERVAL)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._previous_handler is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+
+        # A repeated alarm might interrupt the test run after the test
+        return exc_type is not None and issubclass(exc_type, TestTimeout)
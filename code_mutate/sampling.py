@@ -0,0 +1,160 @@
+"""
+Deterministic mutant sampling
+
+Samplers select a reproducible subset of the mutants of a file.
+The same seed and source code always produce the same sample.
+
+Samplers select from mutations that were already produced by the
+operators. Sampling therefore reduces the number of mutants that
+are validated, cached and tested, but not the cost of generating them.
+"""
+import random
+import hashlib
+
+
+class MutantSampler:
+    """
+    Base class for mutant samplers
+
+    Parameters
+    ----------
+    seed : int
+        Seed that determines the sample. Default: 0
+
+    """
+
+    def __init__(self, seed : int = 0):
+        self.seed = seed
+
+    def sample(self, mutations):
+        """Selects a subset of mutations (in their original order)"""
+        raise NotImplementedError()
+
+
+class FractionSampler(MutantSampler):
+    """
+    Keeps each mutant independently with the given probability
+
+    The decision only depends on the seed and the mutant itself
+    (position, replacement and type). Hence, the sample of a file does
+    not change if other files change and mutants loaded from the cache
+    are sampled exactly like freshly generated mutants. Since the
+    replacement is part of the decision, every candidate mutant is
+    built before it is dropped.
+
+    Parameters
+    ----------
+    fraction : float
+        Probability that a mutant is kept (0 < fraction <= 1)
+
+    seed : int
+        Seed that determines the sample. Default: 0
+
+    """
+
+    def __init__(self, fraction : float, seed : int = 0):
+        super().__init__(seed)
+        if not 0 < fraction <= 1: raise ValueError(f"Fraction has to be in (0, 1]: {fraction}")
+        self.fraction = fraction
+
+    def keep(self, mutation):
+        key = f"{self.seed}:{tuple(mutation.source_pos)}:{mutation.target_text}:{mutation.op_type}"
+        value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size = 8).digest(), "big")
+        return value < self.fraction * 2**64
+
+    def sample(self, mutations):
+        return (mutation for mutation in mutations if self.keep(mutation))
+
+
+class CountSampler(MutantSampler):
+    """
+    Keeps a fixed number of mutants per stratum
+
+    Mutants are grouped into strata (all mutants, per file, per operator or
+    per scope) and a uniform sample of at most `count` mutants is drawn from every
+    stratum by reservoir sampling. Hence, the sampler only keeps the selected
+    mutants in memory while consuming a stream of mutants (`mutate(..., stream = True)`).
+    All mutants of the file are still generated.
+
+    Parameters
+    ----------
+    count : int
+        Maximal number of mutants per stratum
+
+    by : str
+        Stratum of a mutant: None (all mutants), "file" (all mutants
+        of the sampled file), "operator" or "scope". Since mutants are
+        sampled per file, "file" is equivalent to None. Default: None
+
+    seed : int
+        Seed that determines the sample. Default: 0
+
+    """
+
+    STRATA = {
+        None: lambda mutation: None,
+        "file": lambda mutation: None,
+        "operator": lambda mutation: mutation.op_type,
+        "scope": lambda mutation: mutation.scope,
+    }
+
+    def __init__(self, count : int, by : str = None, seed : int = 0):
+        super().__init__(seed)
+        if count < 0: raise ValueError(f"Count has to be positive: {count}")
+        if by not in CountSampler.STRATA: raise ValueError(f"Unknown stratum {by}")
+        self.count = count
+        self.by = by
+
+    def sample(self, mutations):
+        stratum_fn = CountSampler.STRATA[self.by]
+        rng = random.Random(self.seed)
+        reservoirs, seen = {}, {}
+
+        for index, mutation in enumerate(mutations):
+            stratum = stratum_fn(mutation)
+            reservoir = reservoirs.setdefault(stratum, [])
+            seen[stratum] = seen.get(stratum, 0) + 1
+
+            if len(reservoir) < self.count:
+                reservoir.append((index, mutation))
+            else:
+                position = rng.randrange(seen[stratum])
+                if position < self.count:
+                    reservoir[position] = (index, mutation)
+
+        selected = sorted((entry for reservoir in reservoirs.values() for entry in reservoir),
+                          key = lambda entry: entry[0])
+        return [mutation for _, mutation in selected]
+
+
+def init_sampler(sample, by = None, seed : int = 0) -> MutantSampler:
+    """
+    Creates a sampler from a fraction (float) or a count (int)
+
+    Parameters
+    ----------
+    sample : MutantSampler, float or int
+        Sampler, fraction of mutants (0 < fraction <= 1) or number of mutants per stratum
+
+    by : str
+        Stratum for count based sampling: None, "file", "operator" or "scope".
+        Fractions cannot be combined with a stratum.
+
+    seed : int
+        Seed that determines the sample. Default: 0
+
+    Returns
+    -------
+    MutantSampler
+        the sampler or None if no sample is given
+
+    """
+    if sample is None or isinstance(sample, MutantSampler): return sample
+
+    # Fractions are applied to every mutant independently
+    # and hence sample every stratum with the same rate
+    if isinstance(sample, float):
+        if by is not None: raise ValueError(f"A fraction cannot be sampled by {by}. Use a count instead.")
+        return FractionSampler(sample, seed = seed)
+
+    return CountSampler(int(sample), by = by, seed = seed)
@@ -0,0 +1,541 @@
+import os
+import ast
+import textwrap
+import tokenize
+from io import StringIO
+
+import code_ast as ca
+
+from . import mutate
+from .mutation import SourceBuffer
+
+
+SWITCH_NAME = "__mutant_id__"
+
+
+class MutantSchema:
+    """
+    Compiles all mutants of a source file into a single code object
+
+    Every mutation site is guarded by a runtime switch that compares
+    the module global `__mutant_id__` against the id of the mutant.
+    Executing the code object with `__mutant_id__ = 0` behaves like
+    the original module. Mutants that cannot be guarded by a switch
+    are not part of the schema (see `mutant_id`). This includes mutants
+    that add or remove a local name, a yield or an await of a function,
+    since the switch compiles the original code into the same function.
+
+    Parameters
+    ----------
+    source_code : str
+        Source code of the module
+
+    mutations : list[Mutation]
+        Mutations that should be embedded into the schema.
+        Default: all mutations produced by `mutate`
+
+    ops : list[str]
+        Mutation operators used if no mutations are given
+
+    filename : str
+        File name used for compiling the schema
+
+    """
+
+    def __init__(self, source_code : str, mutations = None, ops = None, lang = "python", filename = "<schema>"):
+        self.source_code = source_code
+        self.filename = filename
+
+        source_ast = ca.ast(source_code, lang = lang)
+        if mutations is None:
+            mutations = mutate(source_ast, ops = ops, lang = lang)
+
+        self._buffer = SourceBuffer(source_code)
+        self._sites  = _collect_sites(source_ast.root_node(), self._buffer, mutations)
+
+        self.source, self.code = self._build()
+        self.mutant_ids = {key: mutant_id
+                           for site in _iter_sites(self._sites) if site.enabled
+                           for mutant_id, key, _ in site.variants}
+
+    def mutant_id(self, mutation):
+        """Returns the id of the given mutation or None if it is not part of the schema"""
+        return self.mutant_ids.get(_mutation_key(mutation))
+
+    def __len__(self):
+        return len(self.mutant_ids)
+
+    # Build schema --------------------------------
+
+    def _compile(self, source):
+        try:
+            return compile(source, self.filename, "exec", dont_inherit = True)
+        except (SyntaxError, ValueError):
+            return None
+
+    def _render_with(self, enabled_sites):
+        for site in _iter_sites(self._sites):
+            site.enabled = site in enabled_sites
+        source = _render_span(self._buffer, 0, len(self._buffer.text), self._sites)
+        return source, self._compile(source)
+
+    def _build(self):
+        candidates = [site for site in _iter_sites(self._sites) if site.variants]
+
+        source, code = self._render_with(set(candidates))
+        if code is not None: return source, code
+
+        # Some sites cannot be guarded by a switch. Isolate and disable them.
+        invalid = self._find_invalid(candidates)
+        enabled = set(candidates) - set(invalid)
+
+        source, code = self._render_with(enabled)
+        if code is not None: return source, code
+
+        return self._render_with(set())
+
+    def _find_invalid(self, sites):
+        if not sites: return []
+        _, code = self._render_with(set(sites))
+        if code is not None: return []
+        if len(sites) == 1: return sites
+
+        mid = len(sites) // 2
+        return self._find_invalid(sites[:mid]) + self._find_invalid(sites[mid:])
+
+
+class MutantSchemata:
+    """
+    Lazily builds and caches a mutant schema per source file
+
+    Parameters
+    ----------
+    ops : list[str]
+        Mutation operators embedded into each schema.
+        Default: all standard operators
+
+    """
+
+    def __init__(self, ops = None, lang = "python"):
+        self.ops = ops
+        self.lang = lang
+        self._schemata = {}
+
+    def load(self, origin : str) -> MutantSchema:
+        stat = os.stat(origin)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._schemata.get(origin)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with open(origin, "r") as f:
+            source_code = f.read()
+
+        try:
+            schema = MutantSchema(source_code, ops = self.ops, lang = self.lang, filename = origin)
+        except (SyntaxError, ValueError):
+            schema = None
+
+        self._schemata[origin] = (version, schema)
+        return schema
+
+    def lookup(self, origin : str, mutation):
+        """Returns the compiled schema and the mutant id or None if the mutant is not supported"""
+        schema = self.load(origin)
+        if schema is None: return None
+
+        mutant_id = schema.mutant_id(mutation)
+        if mutant_id is None: return None
+
+        return schema.code, mutant_id
+
+    def __getstate__(self):
+        # Code objects cannot be pickled. Schemata are rebuilt on demand.
+        state = self.__dict__.copy()
+        state["_schemata"] = {}
+        return state
+
+
+# Mutation sites ----------------------------------------------------------------
+
+EXPRESSION_TYPES = {
+    "attribute", "await", "binary_operator", "boolean_operator", "call",
+    "comparison_operator", "concatenated_string", "conditional_expression",
+    "dictionary", "dictionary_comprehension", "false", "float", "integer",
+    "list", "list_comprehension", "none", "not_operator", "parenthesized_expression",
+    "set", "set_comprehension", "string", "subscript", "true", "tuple", "unary_operator",
+}
+
+TARGET_FIELDS = {
+    ("assignment", "left"),
+    ("augmented_assignment", "left"),
+    ("for_statement", "left"),
+    ("for_in_clause", "left"),
+    ("named_expression", "name"),
+    ("as_pattern", "alias"),
+    ("keyword_argument", "name"),
+}
+
+INVALID_PARENTS = {
+    "concatenated_string", "decorator", "list_pattern", "pattern_list", "tuple_pattern",
+}
+
+INVALID_ANCESTORS = {
+    "case_pattern", "delete_statement", "interpolation",
+}
+
+
+class _Site:
+
+    def __init__(self, node, kind, start, end, depth):
+        self.node = node
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.depth = depth
+        self.variants = []
+        self.children = []
+        self.enabled = False
+        # Scope features of the original site (see _preserves_scope)
+        self.features = None
+
+
+def _collect_sites(root_node, buffer, mutations):
+    sites = {}
+    mutant_keys = set()
+
+    for mutation in mutations:
+        key = _mutation_key(mutation)
+        if key in mutant_keys: continue
+        mutant_keys.add(key)
+
+        start_line, start_pos, end_line, end_pos = mutation.source_pos
+        node = root_node.descendant_for_point_range((start_line, start_pos), (end_line, end_pos))
+
+        # The mutation might replace a statement or block that spans the same range as its content
+        while node.parent is not None and node.parent.byte_range == node.byte_range:
+            node = node.parent
+
+        site_node, kind = _find_site(node, buffer)
+        if site_node is None: continue
+
+        site_key = (site_node.start_byte, site_node.end_byte, site_node.type)
+        if site_key not in sites:
+            sites[site_key] = _Site(site_node, kind,
+                                    buffer.offset(*site_node.start_point),
+                                    buffer.offset(*site_node.end_point),
+                                    _depth(site_node))
+
+        site = sites[site_key]
+        if not _preserves_scope(buffer, site, mutation): continue
+
+        mutant_id = len(mutant_keys)
+        site.variants.append((mutant_id, key, mutation))
+
+    # Nest sites by containment
+    roots, stack = [], []
+    for site in sorted(sites.values(), key = lambda s: (s.start, -s.end, s.depth)):
+        while stack and not (stack[-1].start <= site.start and site.end <= stack[-1].end):
+            stack.pop()
+        (stack[-1].children if stack else roots).append(site)
+        stack.append(site)
+
+    return roots
+
+
+def _iter_sites(sites):
+    for site in sites:
+        yield site
+        yield from _iter_sites(site.children)
+
+
+def _find_site(node, buffer):
+    current = node
+    while current is not None and current.type != "module":
+        if _is_expression_site(current):
+            return current, "expression"
+        if _is_statement(current) and _is_statement_site(current, buffer):
+            return current, "statement"
+        current = current.parent
+    return None, None
+
+
+def _is_expression_site(node):
+    if not node.is_named or node.type not in EXPRESSION_TYPES: return False
+
+    parent = node.parent
+    if parent is None or parent.type in INVALID_PARENTS: return False
+    if (parent.type, _field_name(parent, node)) in TARGET_FIELDS: return False
+    if _is_docstring(parent): return False
+
+    current = parent
+    while current is not None and not _is_statement(current):
+        if current.type in INVALID_ANCESTORS: return False
+        current = current.parent
+
+    return current is None or current.type not in INVALID_ANCESTORS
+
+
+def _is_statement(node):
+    return node.parent is not None and node.parent.type in ["block", "module"]
+
+
+def _is_statement_site(node, buffer):
+    if node.type == "future_import_statement" or _is_docstring(node): return False
+
+    start_line, start_pos = node.start_point
+    end_line, end_pos     = node.end_point
+
+    if buffer.lines[start_line][:start_pos].strip(): return False
+
+    remainder = buffer.lines[end_line][end_pos:].strip()
+    return not remainder or remainder.startswith("#")
+
+
+def _is_docstring(node):
+    if node.type != "expression_statement" or not _is_statement(node): return False
+    if node.children[0].type not in ["string", "concatenated_string"]: return False
+
+    for sibling in node.parent.named_children:
+        if sibling.type == "comment": continue
+        return sibling == node
+    return False
+
+
+def _field_name(parent, node):
+    for i, child in enumerate(parent.children):
+        if child == node: return parent.field_name_for_child(i)
+
+
+def _depth(node):
+    depth = 0
+    while node.parent is not None:
+        node = node.parent
+        depth += 1
+    return depth
+
+
+# Scope ----------------------------------------------------------------
+
+SCOPE_TYPES = {"function_definition", "lambda", "class_definition"}
+
+
+def _preserves_scope(buffer, site, mutation):
+    """
+    Checks whether the mutant compiles to the same kind of function in the schema
+
+    The schema compiles the original site and its variants into the same
+    function. A variant that adds or removes a local name, a yield or
+    an await would change the locals or the kind of the function.
+    Such mutants are executed by applying and compiling them instead.
+    """
+    function_node = _enclosing_scope(site.node)
+    if function_node is None or function_node.type == "class_definition": return True
+
+    if site.features is None:
+        site.features = _site_features(buffer, site, buffer.text[site.start:site.end])
+
+    mutation_start, mutation_end = buffer.span(mutation.source_pos)
+    variant = buffer.text[site.start:mutation_start] + mutation.target_text + buffer.text[mutation_end:site.end]
+
+    features = _site_features(buffer, site, variant)
+    if features is None or site.features is None: return False
+
+    changed = features ^ site.features
+    if not changed: return True
+
+    # Changes are harmless if the remaining function has the same features
+    remaining = _function_features(buffer, function_node, site)
+    return remaining is not None and changed <= remaining
+
+
+def _enclosing_scope(node):
+    current = node.parent
+    while current is not None:
+        if current.type in SCOPE_TYPES: return current
+        current = current.parent
+    return None
+
+
+def _site_features(buffer, site, text):
+    try:
+        if site.kind == "expression":
+            tree = ast.parse(f"({text}\n)", mode = "eval")
+        else:
+            start_line, start_pos = site.node.start_point
+            tree = ast.parse(textwrap.dedent(buffer.lines[start_line][:start_pos] + text))
+    except (SyntaxError, ValueError):
+        return None
+    return _scope_features([tree])
+
+
+def _function_features(buffer, function_node, site):
+    """Returns the scope features of a function without the given site"""
+    start = buffer.offset(*function_node.start_point)
+    placeholder = "None" if site.kind == "expression" else "pass"
+    text = buffer.text[start:site.start] + placeholder + buffer.text[site.end:buffer.offset(*function_node.end_point)]
+
+    try:
+        if function_node.type == "lambda":
+            function = ast.parse(f"({text}\n)", mode = "eval").body
+        else:
+            start_line, start_pos = function_node.start_point
+            function = ast.parse(textwrap.dedent(buffer.lines[start_line][:start_pos] + text)).body[0]
+    except (SyntaxError, ValueError, IndexError):
+        return None
+
+    arguments = function.args
+    parameters = arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+    parameters += [arg for arg in (arguments.vararg, arguments.kwarg) if arg is not None]
+
+    features = _scope_features(function.body if isinstance(function.body, list) else [function.body])
+    return features | {("bind", arg.arg) for arg in parameters}
+
+
+def _scope_features(nodes):
+    """Collects the names bound or declared in a scope and whether it yields or awaits"""
+    features = set()
+    stack = list(nodes)
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            # Only the name, decorators and defaults belong to the enclosing scope
+            features.add(("bind", node.name))
+            stack.extend(node.decorator_list)
+            if isinstance(node, ast.ClassDef):
+                stack.extend(node.bases)
+                stack.extend(keyword.value for keyword in node.keywords)
+            else:
+                stack.extend(node.args.defaults)
+                stack.extend(d for d in node.args.kw_defaults if d is not None)
+            continue
+
+        if isinstance(node, ast.Lambda):
+            stack.extend(node.args.defaults)
+            stack.extend(d for d in node.args.kw_defaults if d is not None)
+            continue
+
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            # Comprehensions only bind assignment expressions in the enclosing scope
+            features.update(("bind", n.target.id) for n in ast.walk(node)
+                            if isinstance(n, ast.NamedExpr))
+            stack.append(node.generators[0].iter)
+            continue
+
+        if isinstance(node, (ast.Yield, ast.YieldFrom)):
+            features.add(("yield",))
+        elif isinstance(node, ast.Await):
+            features.add(("await",))
+        elif isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            features.add(("bind", node.id))
+        elif isinstance(node, ast.alias):
+            features.add(("bind", (node.asname or node.name).split(".")[0]))
+        elif isinstance(node, ast.Global):
+            features.update(("global", name) for name in node.names)
+        elif isinstance(node, ast.Nonlocal):
+            features.update(("nonlocal", name) for name in node.names)
+        elif isinstance(getattr(node, "name", None), str):
+            # Exception handlers and capture patterns
+            features.add(("bind", node.name))
+        elif isinstance(getattr(node, "rest", None), str):
+            features.add(("bind", node.rest))
+
+        stack.extend(ast.iter_child_nodes(node))
+
+    return frozenset(features)
+
+
+# Rendering ----------------------------------------------------------------
+
+class _UnsupportedSite(Exception):
+    pass
+
+
+def _render_span(buffer, start, end, sites):
+    output = []
+    position = start
+    for site in sites:
+        output.append(buffer.text[position:site.start])
+        output.append(_render_site(buffer, site))
+        position = site.end
+    output.append(buffer.text[position:end])
+    return "".join(output)
+
+
+def _render_site(buffer, site):
+    original = _render_span(buffer, site.start, site.end, site.children)
+    if not site.enabled: return original
+
+    site_text = buffer.text[site.start:site.end]
+    variants  = []
+    for mutant_id, _, mutation in site.variants:
+        mutation_start, mutation_end = buffer.span(mutation.source_pos)
+        mutation_start -= site.start
+        mutation_end   -= site.start
+        variant = site_text[:mutation_start] + mutation.target_text + site_text[mutation_end:]
+        variants.append((mutant_id, variant))
+
+    if site.kind == "expression":
+        switches = "".join(f"({variant}) if {SWITCH_NAME} == {mutant_id} else "
+                           for mutant_id, variant in variants)
+        return f"({switches}({original}))"
+
+    start_line, start_pos = site.node.start_point
+    indent = buffer.lines[start_line][:start_pos]
+    unit   = "\t" if "\t" in indent else "    "
+
+    try:
+        output = []
+        for i, (mutant_id, variant) in enumerate(variants):
+            keyword = "if" if i == 0 else f"{indent}elif"
+            output.append(f"{keyword} {SWITCH_NAME} == {mutant_id}:\n")
+            output.append(f"{indent}{unit}{_reindent(variant, indent, unit)}\n")
+        output.append(f"{indent}else:\n")
+        output.append(f"{indent}{unit}{_reindent(original, indent, unit)}")
+    except _UnsupportedSite:
+        site.enabled = False
+        return original
+
+    return "".join(output)
+
+
+def _reindent(text, indent, unit):
+    string_lines = _string_continuation_lines(indent + text)
+    lines = text.split("\n")
+
+    for i in range(1, len(lines)):
+        if i in string_lines or not lines[i].strip(): continue
+        lines[i] = unit + lines[i]
+
+    return "\n".join(lines)
+
+
+def _string_continuation_lines(text):
+    """Returns all (zero-based) lines that start inside a multi-line string"""
+    lines = set()
+    fstring_starts = []
+
+    fstring_start = getattr(tokenize, "FSTRING_START", None)
+    fstring_end   = getattr(tokenize, "FSTRING_END", None)
+
+    try:
+        for token in tokenize.generate_tokens(StringIO(text).readline):
+            if token.type == tokenize.STRING:
+                lines.update(range(token.start[0], token.end[0]))
+            elif token.type == fstring_start:
+                fstring_starts.append(token.start[0])
+            elif token.type == fstring_end:
+                lines.update(range(fstring_starts.pop(), token.end[0]))
+    except (tokenize.TokenError, SyntaxError, IndexError):
+        raise _UnsupportedSite()
+
+    return lines
+
+
+# Helper ----------------------------------------------------------------
+
+def _mutation_key(mutation):
+    return (tuple(mutation.source_pos), mutation.target_text)
@@ -0,0 +1,95 @@
+"""
+Scope patterns
+
+Patterns select qualified names (module.Class.method) part by part.
+`*` matches exactly one part and `**` matches one or more parts.
+"""
+
+
+def match_scope(pattern : str, qualified_name : str, prefix : bool = False) -> bool:
+    """
+    Matches a qualified name against a scope pattern
+
+    Parameters
+    ----------
+    pattern : str
+        Scope pattern, e.g. `calculator.**.mul`
+
+    qualified_name : str
+        Dotted name of a module, class or function
+
+    prefix : bool
+        Whether names are accepted that only match after appending
+        further parts (e.g. nested definitions). Default: False
+
+    Returns
+    -------
+    bool
+        whether the qualified name matches
+
+    """
+    pattern = pattern.split(".") or []
+    module  = qualified_name.split(".") or []
+
+    positions = [(0, 0)]
+    while len(positions) > 0:
+        pi, mi = positions.pop(0)
+
+        if pi >= len(pattern) and mi >= len(module):
+            return True
+
+        if prefix and mi >= len(module):
+            return True
+
+        if pi >= len(pattern) or mi >= len(module): continue
+
+        if pattern[pi] == module[mi] or pattern[pi] == "*":
+            positions.append((pi + 1, mi + 1))
+        elif pattern[pi] == "**":
+            positions.append((pi + 1, mi + 1))
+            positions.append((pi, mi + 1))
+
+    return False
+
+
+class ScopeFilter:
+    """
+    Selects mutations and AST subtrees by a scope pattern
+
+    Parameters
+    ----------
+    pattern : str
+        Scope pattern that is matched against the qualified names
+
+    scope_index : ScopeIndex
+        Qualified names of the definitions in the mutated AST
+
+    module_name : str
+        Module name that prefixes all qualified names. Default: no prefix
+
+    """
+
+    def __init__(self, pattern : str, scope_index, module_name : str = None):
+        self.pattern = pattern
+        self.scope_index = scope_index
+        self.module_name = module_name
+        self._matches = {}
+
+    def qualified_name(self, scope : str) -> str:
+        if not self.module_name: return scope
+        if not scope: return self.module_name
+        return f"{self.module_name}.{scope}"
+
+    def matches(self, scope : str) -> bool:
+        """Checks whether mutations in the given scope are selected"""
+        try:
+            return self._matches[scope]
+        except KeyError:
+            self._matches[scope] = match_scope(self.pattern, self.qualified_name(scope))
+            return self._matches[scope]
+
+    def may_contain(self, node) -> bool:
+        """Checks whether the subtree rooted at node may contain selected mutations"""
+        if node.type not in ["function_definition", "class_definition"]: return True
+        scope = self.qualified_name(self.scope_index.scope_of(node))
+        return match_scope(self.pattern, scope, prefix = True)
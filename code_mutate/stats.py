@@ -0,0 +1,155 @@
+"""
+Profiling
+
+Counters and timers that show where the time of a run goes,
+e.g. parsing, single operators, diffing or test execution.
+Nothing is recorded unless a `Stats` object is passed.
+"""
+
+import time
+
+from contextlib import contextmanager, nullcontext
+
+
+# Stages of the mutant generation in the order of the report
+GENERATION_TIMERS = ["parse", "class_index", "scope_index", "traverse", "select", "cache", "validate", "tce", "diff"]
+
+# Phases of a mutant execution in the order of the report (see `TestResult.timings`)
+EXECUTION_TIMERS = ["apply", "compile", "import", "test", "total"]
+
+
+class Stats:
+    """
+    Collects counters and timers
+
+    Counters map a name to a number. Timers map a name to the number
+    of measurements and the accumulated seconds. Stats of several
+    processes can be combined with `merge`.
+
+    Recorded names:
+
+    - `nodes` / `pruned_nodes`: AST nodes visited by the mutation operators or skipped by filters
+    - `operator.<op>`: timer of the handler invocations of an operator
+    - `mutants.<op>`: mutants produced by the handlers of an operator (before scope, line and sample filters)
+    - `mutants`: mutants emitted by `mutate`
+    - `parse`, `scope_index`, `traverse`, `select`, ...: timers of the generation stages
+    - `run.<phase>`: timers of apply, compile, import and test time per mutant
+
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timers   = {}
+
+    def count(self, name : str, n : int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name : str, seconds : float, n : int = 1):
+        try:
+            timer = self.timers[name]
+        except KeyError:
+            timer = self.timers[name] = [0, 0.0]
+
+        timer[0] += n
+        timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name : str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def calls(self, name : str) -> int:
+        return self.timers.get(name, (0, 0.0))[0]
+
+    def seconds(self, name : str) -> float:
+        return self.timers.get(name, (0, 0.0))[1]
+
+    def add_result(self, result):
+        """Records the execution timings of a `TestResult`"""
+        for phase, seconds in result.timings.items():
+            self.add_time(f"run.{phase}", seconds)
+        self.add_time("run.total", result.duration)
+
+    def merge(self, other : "Stats"):
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+        for name, (calls, seconds) in other.timers.items():
+            self.add_time(name, seconds, n = calls)
+
+        return self
+
+    def count_mutants(self, mutations, timer : str = None):
+        """Counts the emitted mutants and optionally times their production"""
+        mutations = iter(mutations)
+        seconds   = 0.0
+
+        try:
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    mutation = next(mutations)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start_time
+
+                self.count("mutants")
+                yield mutation
+        finally:
+            if timer is not None: self.add_time(timer, seconds)
+
+    # Report ----------------------------------------------------------------
+
+    def format(self) -> str:
+        lines = []
+
+        generation = [name for name in GENERATION_TIMERS if name in self.timers]
+        if generation or "nodes" in self.counters:
+            lines.append(f"{'Generation':<24} {'calls':>10} {'total [s]':>10} {'mean [ms]':>10}")
+            lines.extend(self._format_timer(name, name) for name in generation)
+            if "nodes" in self.counters:
+                lines.append(f"Nodes visited: {self.counters['nodes']} "
+                             f"(pruned: {self.counters.get('pruned_nodes', 0)})")
+            if "mutants" in self.counters:
+                lines.append(f"Mutants emitted: {self.counters['mutants']}")
+            lines.append("")
+
+        operators = sorted({name.split(".", 1)[1] for name in list(self.timers) + list(self.counters)
+                            if name.startswith(("operator.", "mutants."))})
+        if operators:
+            lines.append(f"{'Operator':<24} {'calls':>10} {'total [s]':>10} {'mutants':>10}")
+            for op in operators:
+                name = f"operator.{op}"
+                lines.append(f"- {op:<22} {self.calls(name):>10} {self.seconds(name):>10.3f} "
+                             f"{self.counters.get(f'mutants.{op}', 0):>10}")
+            lines.append("(operator time is included in traverse, mutants are counted before filtering)")
+            lines.append("")
+
+        execution = [name for name in EXECUTION_TIMERS if f"run.{name}" in self.timers]
+        if execution:
+            lines.append(f"{'Execution per mutant':<24} {'calls':>10} {'total [s]':>10} {'mean [ms]':>10}")
+            lines.extend(self._format_timer(name, f"run.{name}") for name in execution)
+            lines.append("")
+
+        return "\n".join(lines).rstrip("\n")
+
+    def _format_timer(self, label, name):
+        calls, seconds = self.timers[name]
+        mean = 1000 * seconds / calls if calls else 0.0
+        return f"- {label:<22} {calls:>10} {seconds:>10.3f} {mean:>10.3f}"
+
+    def __repr__(self):
+        return f"Stats(counters={self.counters}, timers={self.timers})"
+
+
+def timer(stats : Stats, name : str):
+    """Returns `stats.timer(name)` or a context manager that does nothing if stats is None"""
+    if stats is None: return _NO_TIMER
+    return stats.timer(name)
+
+
+_NO_TIMER = nullcontext()
@@ -0,0 +1,139 @@
+"""
+Syntax validation of mutants
+
+Mutants are validated by applying their edit to the already parsed
+tree-sitter tree and reparsing incrementally. Only the edited part
+of the tree is parsed again.
+"""
+import code_ast as ca
+
+from bisect import bisect_right
+from tree_sitter import Parser
+
+from .mutation import SourceBuffer
+
+
+class SyntaxFilter:
+    """
+    Rejects mutants whose code does not parse
+
+    A mutant is rejected if the reparsed tree contains ERROR or MISSING
+    nodes. If the original code already contains syntax errors (or syntax
+    that tree-sitter does not support), all mutants are accepted.
+
+    Parameters
+    ----------
+    source_code : str or SourceBuffer
+        Original code of the mutated module.
+        Default: the code is recovered from source_ast
+
+    source_ast : SourceCodeAST
+        AST parsed from source_code. Default: source_code is parsed
+
+    lang : str
+        Language of the source code. Default: python
+
+    Attributes
+    ----------
+    invalid : int
+        Number of rejected mutants
+
+    """
+
+    def __init__(self, source_code = None, source_ast = None, lang = "python"):
+        if source_code is None:
+            source_code = source_text(source_ast)
+        if not isinstance(source_code, SourceBuffer):
+            source_code = SourceBuffer(source_code)
+        self.buffer = source_code
+
+        if source_ast is None:
+            source_ast = ca.ast(self.buffer.text, lang = lang)
+
+        self.tree = source_ast.source_tree
+        self.parser = Parser(self.tree.language)
+        self.enabled = not self.tree.root_node.has_error
+        self.invalid = 0
+
+        text = self.buffer.text
+        self._source_bytes = None
+        self._line_byte_starts = None
+        if not text.isascii():
+            self._line_byte_starts = [0]
+            for line in self.buffer.lines:
+                self._line_byte_starts.append(self._line_byte_starts[-1] + len(line.encode("utf-8")))
+
+    @property
+    def source_bytes(self):
+        if self._source_bytes is None:
+            self._source_bytes = self.buffer.text.encode("utf-8")
+        return self._source_bytes
+
+    def _byte_offset(self, offset):
+        if self._line_byte_starts is None: return offset
+        line = bisect_right(self.buffer.line_starts, offset) - 1
+        line_start = self.buffer.line_starts[line]
+        return self._line_byte_starts[line] + len(self.buffer.text[line_start:offset].encode("utf-8"))
+
+    def _point(self, offset, byte_offset):
+        line = bisect_right(self.buffer.line_starts, offset) - 1
+        line = min(line, len(self.buffer.lines))
+        line_byte_start = (self.buffer.line_starts[line] if self._line_byte_starts is None
+                           else self._line_byte_starts[line])
+        return (line, byte_offset - line_byte_start)
+
+    def is_valid(self, mutation):
+        """Checks whether the mutated code parses without errors"""
+        if not self.enabled: return True
+
+        start, end = self.buffer.span(mutation.source_pos)
+        start_byte, old_end_byte = self._byte_offset(start), self._byte_offset(end)
+
+        target_bytes = mutation.target_text.encode("utf-8")
+        new_end_byte = start_byte + len(target_bytes)
+
+        start_point   = self._point(start, start_byte)
+        old_end_point = self._point(end, old_end_byte)
+
+        newlines = target_bytes.count(b"\n")
+        if newlines == 0:
+            new_end_point = (start_point[0], start_point[1] + len(target_bytes))
+        else:
+            new_end_point = (start_point[0] + newlines, len(target_bytes) - target_bytes.rfind(b"\n") - 1)
+
+        source_bytes = self.source_bytes
+        target_code  = source_bytes[:start_byte] + target_bytes + source_bytes[old_end_byte:]
+
+        edited_tree = self.tree.copy()
+        edited_tree.edit(start_byte, old_end_byte, new_end_byte,
+                         start_point, old_end_point, new_end_point)
+
+        target_tree = self.parser.parse(target_code, old_tree = edited_tree)
+        return not target_tree.root_node.has_error
+
+    def check(self, mutation):
+        if self.is_valid(mutation): return True
+        self.invalid += 1
+        return False
+
+    def filter(self, mutations):
+        """Yields all mutations that produce syntactically valid code"""
+        for mutation in mutations:
+            if self.check(mutation):
+                yield mutation
+
+
+def source_text(source_ast):
+    """
+    Recovers the parsed source code from the tree of the AST
+
+    In contrast to joining `source_ast.source_lines`, line endings
+    and form feeds are preserved. Only the whitespace before the
+    first node is replaced by blank lines of the same size.
+    """
+    root_node = source_ast.source_tree.root_node
+    row, column = root_node.start_point
+    padding = root_node.start_byte - row - column
+
+    prefix = " " * padding + "\n" * row + " " * column
+    return prefix + root_node.text.decode("utf-8")
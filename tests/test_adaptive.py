@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+from code_mutate.mutation import Mutation
+from code_mutate.runners.adaptive import ScoreEstimate, AdaptiveCampaign
+from code_mutate.runners.base import TestResult as Result
+
+from .test_runners import _StatusRunner
+
+
+# Practically infinite population without finite population correction
+LARGE_POPULATION = 10**9
+
+
+def _estimate(population, killed, survived, errors = 0):
+    estimate = ScoreEstimate(population)
+    for status, count in [(Result.KILLED, killed), (Result.SURVIVED, survived), (Result.ERROR, errors)]:
+        for _ in range(count):
+            estimate.add(Result(status))
+    return estimate
+
+
+def _mutants(count):
+    return [("calc.ops", Mutation((1, 13, 1, 14), str(i))) for i in range(count)]
+
+
+class ScoreEstimateTest(TestCase):
+
+    def test_wilson_interval(self):
+        # Wilson score interval of 50 killed out of 100 mutants
+        lower, upper = _estimate(LARGE_POPULATION, 50, 50).interval()
+        self.assertAlmostEqual(lower, 0.4038, places = 4)
+        self.assertAlmostEqual(upper, 0.5962, places = 4)
+
+    def test_finite_population(self):
+        # Sampling half of the population is as precise as a sample of n (N - 1) / (N - n) = 199 mutants
+        lower, upper = _estimate(200, 50, 50).interval()
+        self.assertAlmostEqual(lower, 0.4312, places = 4)
+        self.assertAlmostEqual(upper, 0.5688, places = 4)
+        self.assertLess(upper - lower, _estimate(LARGE_POPULATION, 50, 50).width)
+
+    def test_complete_population(self):
+        estimate = _estimate(100, 40, 60)
+        self.assertEqual(estimate.interval(), (0.4, 0.4))
+        self.assertEqual(estimate.width, 0.0)
+
+        # Errors are excluded from the population
+        self.assertEqual(_estimate(110, 40, 60, errors = 10).width, 0.0)
+
+    def test_all_killed(self):
+        estimate = _estimate(LARGE_POPULATION, 100, 0)
+        lower, upper = estimate.interval()
+        self.assertEqual(estimate.score, 1.0)
+        self.assertAlmostEqual(lower, 100 / (100 + estimate.z**2))
+        self.assertAlmostEqual(upper, 1.0)
+
+    def test_none_killed(self):
+        estimate = _estimate(LARGE_POPULATION, 0, 100)
+        lower, upper = estimate.interval()
+        self.assertEqual(estimate.score, 0.0)
+        self.assertEqual(lower, 0.0)
+        self.assertAlmostEqual(upper, 1 - 100 / (100 + estimate.z**2))
+
+    def test_no_valid_mutants(self):
+        estimate = _estimate(100, 0, 0, errors = 5)
+        self.assertIsNone(estimate.score)
+        self.assertEqual(estimate.interval(), (0.0, 1.0))
+
+
+class AdaptiveCampaignTest(TestCase):
+
+    def test_stops_at_width(self):
+        runner = _StatusRunner(*[Result.KILLED, Result.SURVIVED] * 200)
+        campaign = AdaptiveCampaign(runner, width = 0.2)
+        results = list(campaign.run(_mutants(400)))
+
+        self.assertEqual(campaign.stop_reason, "interval")
+        self.assertEqual(len(results), runner.executed)
+        self.assertLess(runner.executed, 400)
+        self.assertLessEqual(campaign.estimate.width, 0.2)
+
+        # The campaign stops at the first mutant that reaches the width
+        previous = _estimate(400, *_verdict_counts(results[:-1]))
+        self.assertGreater(previous.width, 0.2)
+
+    def test_exhausted(self):
+        runner = _StatusRunner(*[Result.KILLED, Result.SURVIVED] * 10)
+        campaign = AdaptiveCampaign(runner, width = 0.01)
+        results = list(campaign.run(_mutants(20)))
+
+        self.assertEqual(campaign.stop_reason, "exhausted")
+        self.assertEqual(sorted(index for index, *_ in results), list(range(20)))
+        self.assertEqual(campaign.estimate.width, 0.0)
+
+    def test_completed_mutants(self):
+        completed = {index: Result(Result.KILLED) for index in range(10)}
+        runner = _StatusRunner(*[Result.SURVIVED] * 10)
+        campaign = AdaptiveCampaign(runner)
+        results = list(campaign.run(_mutants(20), completed = completed))
+
+        self.assertEqual(sorted(index for index, *_ in results), list(range(10, 20)))
+        self.assertEqual(campaign.estimate.score, 0.5)
+
+
+def _verdict_counts(results):
+    killed = sum(result.detected for *_, result in results)
+    return killed, len(results) - killed
@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+from code_mutate.bench import compare_results, config_mismatch, corpus_fingerprint, merge_rounds, run_benchmarks
+
+
+CORPUS = [
+    ("/corpus/calc.py", "def add(x, y):\n    return x + y\n"),
+    ("/corpus/pkg/flags.py", "def is_set(x):\n    return x is not None and x > 0\n"),
+]
+
+
+def _results(mutants_per_sec, spread = 0.0, peak_memory_mb = 100.0, **config):
+    config = {"corpus": "abc", "max_files": 50, "max_mutants": None, "ops": ["AOR"], "python": "3.11.7", **config}
+    return {
+        "config": config,
+        "stages": {"generate": {"seconds": 1.0, "spread": spread, "mutants_per_sec": mutants_per_sec,
+                                "peak_memory_mb": peak_memory_mb}},
+    }
+
+
+def _regressed(comparison):
+    return [entry["metric"] for entry in comparison if entry["regressed"]]
+
+
+class MergeRoundsTest(TestCase):
+
+    def test_fastest_round(self):
+        rounds = [
+            {"seconds": 2.0, "mutants_per_sec": 50.0, "peak_memory_mb": 10.0,
+             "diff": {"seconds": 1.0, "mutants_per_sec": 100.0}},
+            {"seconds": 1.0, "mutants_per_sec": 100.0, "peak_memory_mb": 12.0,
+             "diff": {"seconds": 4.0, "mutants_per_sec": 25.0}},
+            {"seconds": 4.0, "mutants_per_sec": 25.0, "peak_memory_mb": 11.0,
+             "diff": {"seconds": 2.0, "mutants_per_sec": 50.0}},
+        ]
+        merged = merge_rounds(rounds)
+
+        self.assertEqual((merged["seconds"], merged["mutants_per_sec"]), (1.0, 100.0))
+        self.assertEqual((merged["median_seconds"], merged["spread"]), (2.0, 1.0))
+        self.assertEqual(merged["peak_memory_mb"], 12.0)
+
+        # Nested measurements are merged independently
+        self.assertEqual((merged["diff"]["seconds"], merged["diff"]["mutants_per_sec"]), (1.0, 100.0))
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(CORPUS, stages = ["parse", "apply"], isolate = False, repeat = 2, max_files = 2)
+
+        self.assertEqual(results["repeat"], 2)
+        self.assertEqual(results["config"]["max_files"], 2)
+        self.assertEqual(results["config"]["corpus"], corpus_fingerprint(CORPUS))
+        self.assertIn("spread", results["stages"]["parse"])
+        self.assertIn("spread", results["stages"]["apply"]["diff"])
+        self.assertEqual(config_mismatch(results, results), [])
+
+
+class CorpusFingerprintTest(TestCase):
+
+    def test_location_independent(self):
+        moved = [(file_path.replace("/corpus", "/other/corpus"), source_code) for file_path, source_code in CORPUS]
+        self.assertEqual(corpus_fingerprint(moved), corpus_fingerprint(CORPUS))
+
+    def test_content(self):
+        self.assertNotEqual(corpus_fingerprint(CORPUS[:1]), corpus_fingerprint(CORPUS))
+
+        changed = [(CORPUS[0][0], CORPUS[0][1].replace("+", "-"))] + CORPUS[1:]
+        self.assertNotEqual(corpus_fingerprint(changed), corpus_fingerprint(CORPUS))
+
+
+class CompareResultsTest(TestCase):
+
+    def test_unchanged(self):
+        self.assertEqual(_regressed(compare_results(_results(100.0), _results(100.0))), [])
+
+    def test_regression(self):
+        self.assertEqual(_regressed(compare_results(_results(70.0), _results(100.0))),
+                         ["stages.generate.mutants_per_sec"])
+        self.assertEqual(_regressed(compare_results(_results(100.0, peak_memory_mb = 130.0), _results(100.0))),
+                         ["stages.generate.peak_memory_mb"])
+
+    def test_spread_tolerance(self):
+        # Noisy measurements widen the tolerance of their throughputs
+        self.assertEqual(_regressed(compare_results(_results(70.0, spread = 0.3), _results(100.0))), [])
+        self.assertEqual(_regressed(compare_results(_results(70.0), _results(100.0, spread = 0.3))), [])
+        self.assertEqual(_regressed(compare_results(_results(40.0, spread = 0.3), _results(100.0))),
+                         ["stages.generate.mutants_per_sec"])
+
+    def test_different_config(self):
+        for key, value in [("corpus", "def"), ("max_files", 5), ("max_mutants", 10),
+                           ("ops", ["AOR", "ROR"]), ("python", "3.12.0")]:
+            current = _results(100.0, **{key: value})
+            self.assertEqual(config_mismatch(current, _results(100.0)), [key])
+            with self.assertRaises(ValueError):
+                compare_results(current, _results(100.0))
+
+    def test_baseline_without_config(self):
+        baseline = _results(100.0)
+        del baseline["config"]
+        self.assertTrue(config_mismatch(_results(100.0), baseline))
+        with self.assertRaises(ValueError):
+            compare_results(_results(100.0), baseline)
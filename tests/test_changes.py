@@ -0,0 +1,140 @@
+import textwrap
+
+from unittest import TestCase
+
+from code_mutate.changes import parse_unified_diff, LineFilter
+from code_mutate.mutation import Mutation
+
+
+def _parse(diff):
+    return parse_unified_diff(textwrap.dedent(diff))
+
+
+class ParseUnifiedDiffTest(TestCase):
+
+    def test_additions(self):
+        changes = _parse("""\
+            diff --git a/calc.py b/calc.py
+            index 1b2c3d4..5e6f7a8 100644
+            --- a/calc.py
+            +++ b/calc.py
+            @@ -3,0 +4,2 @@ def add(x, y):
+            +def sub(x, y):
+            +    return x - y
+            @@ -10 +12 @@ def mul(x, y):
+            -    return x * y
+            +    return y * x
+        """)
+        self.assertEqual(changes, {"calc.py": [(4, 5), (12, 12)]})
+
+    def test_deletions(self):
+        changes = _parse("""\
+            diff --git a/calc.py b/calc.py
+            --- a/calc.py
+            +++ b/calc.py
+            @@ -1,2 +0,0 @@
+            -import os
+            -
+            @@ -8,3 +5,0 @@ def add(x, y):
+            -def sub(x, y):
+            -    return x - y
+            -
+        """)
+        # The lines around a deletion are selected
+        self.assertEqual(changes, {"calc.py": [(1, 1), (5, 6)]})
+
+    def test_new_and_deleted_files(self):
+        changes = _parse("""\
+            diff --git a/old.py b/old.py
+            deleted file mode 100644
+            --- a/old.py
+            +++ /dev/null
+            @@ -1 +0,0 @@
+            -x = 1
+            diff --git a/pkg/new.py b/pkg/new.py
+            new file mode 100644
+            --- /dev/null
+            +++ b/pkg/new.py
+            @@ -0,0 +1,2 @@
+            +y = 2
+            +z = 3
+        """)
+        self.assertEqual(changes, {"pkg/new.py": [(1, 2)]})
+
+    def test_renames(self):
+        changes = _parse("""\
+            diff --git a/calc.py b/pkg/calc.py
+            similarity index 90%
+            rename from calc.py
+            rename to pkg/calc.py
+            --- a/calc.py
+            +++ b/pkg/calc.py
+            @@ -2 +2 @@ def add(x, y):
+            -    return x + y
+            +    return y + x
+            diff --git a/ops.py b/pkg/ops.py
+            similarity index 100%
+            rename from ops.py
+            rename to pkg/ops.py
+        """)
+        # Renamed files are keyed by their new path and pure renames change no lines
+        self.assertEqual(changes, {"pkg/calc.py": [(2, 2)]})
+
+    def test_no_newline_at_end_of_file(self):
+        changes = _parse("""\
+            diff --git a/calc.py b/calc.py
+            --- a/calc.py
+            +++ b/calc.py
+            @@ -2 +2,2 @@ def add(x, y):
+            -    return x + y
+            \\ No newline at end of file
+            +    return x + y
+            +
+            @@ -5 +6 @@ def sub(x, y):
+            -    return x - y
+            +    return y - x
+            \\ No newline at end of file
+        """)
+        self.assertEqual(changes, {"calc.py": [(2, 3), (6, 6)]})
+
+    def test_hunk_lines_like_headers(self):
+        changes = _parse("""\
+            diff --git a/notes.py b/notes.py
+            --- a/notes.py
+            +++ b/notes.py
+            @@ -1,2 +1,2 @@
+            --- old = 1
+            -@@ -1 +1 @@
+            +++ new = 2
+            +@@ -7 +7 @@
+        """)
+        self.assertEqual(changes, {"notes.py": [(1, 2)]})
+
+    def test_empty(self):
+        self.assertEqual(parse_unified_diff(""), {})
+
+
+class LineFilterTest(TestCase):
+
+    def test_merged_ranges(self):
+        line_filter = LineFilter([(5, 6), (1, 2), (3, 3), (10, 10)])
+        # Adjacent one-based ranges are merged into zero-based spans
+        self.assertEqual((line_filter.starts, line_filter.ends), ([0, 4, 9], [2, 5, 9]))
+
+    def test_intersects(self):
+        line_filter = LineFilter([(2, 3), (10, 10)])
+        self.assertFalse(line_filter.intersects(0, 0))
+        self.assertTrue(line_filter.intersects(0, 1))
+        self.assertTrue(line_filter.intersects(2, 2))
+        self.assertFalse(line_filter.intersects(3, 8))
+        self.assertTrue(line_filter.intersects(4, 20))
+        self.assertFalse(line_filter.intersects(10, 12))
+
+    def test_matches(self):
+        line_filter = LineFilter([(2, 2)])
+        self.assertTrue(line_filter.matches(Mutation((1, 4, 1, 5), "-")))
+        self.assertTrue(line_filter.matches(Mutation((0, 4, 3, 1), "pass")))
+        self.assertFalse(line_filter.matches(Mutation((2, 4, 2, 5), "-")))
+
+    def test_empty(self):
+        self.assertFalse(LineFilter([]).intersects(0, 100))
@@ -0,0 +1,133 @@
+import os
+
+from unittest import TestCase, mock
+
+import code_ast as ca
+
+from code_mutate import cli
+from code_mutate.cache import ResultCache
+from code_mutate.cli import path_to_module, module_path, file_class_index, _load_or_mutate
+
+from .test_runners import ProjectTestCase, write_project
+
+
+class PathToModuleTest(TestCase):
+
+    def test_relative_prefix(self):
+        for file_path in ["calc/ops.py", "./calc/ops.py", "calc/../calc/ops.py", os.path.abspath("calc/ops.py")]:
+            self.assertEqual(path_to_module(file_path), "calc.ops", file_path)
+
+    def test_package(self):
+        self.assertEqual(path_to_module("./calc/__init__.py"), "calc")
+
+    def test_py_in_name(self):
+        self.assertEqual(path_to_module("./calc/pyops.py"), "calc.pyops")
+
+
+class FileClassIndexTest(ProjectTestCase):
+
+    files = {
+        "shapes/__init__.py": """\
+            from .base import Shape
+        """,
+        "shapes/base.py": """\
+            class Shape:
+                sides = 0
+
+                def area(self):
+                    return 0
+        """,
+        "shapes/other.py": """\
+            class Shape:
+
+                def perimeter(self):
+                    return 0
+        """,
+        "shapes/square.py": """\
+            from .base import Shape
+
+
+            class Square(Shape):
+                sides = 4
+
+                def area(self):
+                    return self.size * self.size
+
+                def perimeter(self):
+                    return 4 * self.size
+        """,
+        "shapes/qualified.py": """\
+            import shapes.base
+            from shapes import Shape as Reexported
+
+
+            class Triangle(shapes.base.Shape):
+
+                def area(self):
+                    return 1
+
+
+            class Hexagon(Reexported):
+                sides = 6
+        """,
+    }
+    modules = ("shapes",)
+
+    def setUp(self):
+        super().setUp()
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(cli._MODULE_CLASSES.clear)
+
+    def inheritance_mutants(self, module = "shapes.square", cache = None, ops = None):
+        file_path = module_path(module)
+        with open(file_path) as f:
+            content = f.read()
+
+        mutants = _load_or_mutate(content, file_path, cache, module = module, ops = ops)
+        return sorted((mutant.op_type, mutant.source_pos[0]) for mutant in mutants
+                      if mutant.op_type in ("IHD", "IOD"))
+
+    def test_module_path(self):
+        self.assertEqual(module_path("shapes.base"), os.path.join("shapes", "base.py"))
+        self.assertEqual(module_path("shapes"), os.path.join("shapes", "__init__.py"))
+        self.assertIsNone(module_path("shapes.missing"))
+
+    def test_base_in_other_module(self):
+        # perimeter is only defined by the unrelated class shapes.other.Shape
+        self.assertEqual(self.inheritance_mutants(), [("IHD", 4), ("IOD", 6)])
+
+    def test_qualified_and_reexported(self):
+        self.assertEqual(self.inheritance_mutants("shapes.qualified"), [("IHD", 11), ("IOD", 6)])
+
+    def test_resolved_names(self):
+        source_ast = ca.ast(module_content("shapes/qualified.py"), lang = "python")
+        class_index = file_class_index(source_ast, "shapes.qualified", "shapes/qualified.py")
+        self.assertEqual(sorted(class_index.classes), ["Reexported", "shapes.base.Shape"])
+
+    def test_without_inheritance_operators(self):
+        with mock.patch.object(cli, "_load_module_classes") as load_module:
+            self.assertEqual(self.inheritance_mutants(ops = ["AOR"]), [])
+        load_module.assert_not_called()
+
+    def test_cached_mutants(self):
+        cache = ResultCache("cache.db")
+        self.assertEqual(len(self.inheritance_mutants(cache = cache)), 2)
+
+        # Unrelated classes do not invalidate the cached mutants
+        source_ast = ca.ast(module_content("shapes/square.py"), lang = "python")
+        fingerprint = file_class_index(source_ast, "shapes.square", "shapes/square.py").fingerprint()
+        write_project(self.directory, {"shapes/other.py": "class Shape:\n    area = 1\n"})
+        cli._MODULE_CLASSES.clear()
+        self.assertEqual(file_class_index(source_ast, "shapes.square", "shapes/square.py").fingerprint(), fingerprint)
+
+        # Changed base classes do
+        write_project(self.directory, {"shapes/base.py": "class Shape:\n    pass\n"})
+        cli._MODULE_CLASSES.clear()
+        self.assertEqual(self.inheritance_mutants(cache = cache), [])
+
+
+def module_content(file_path):
+    with open(file_path) as f:
+        return f.read()
@@ -0,0 +1,118 @@
+import os
+import random
+import difflib
+
+from glob import glob
+from unittest import TestCase
+
+import code_mutate
+from code_mutate import mutate
+from code_mutate.mutation import Mutation, SourceBuffer
+
+
+def _difflib_diff(buffer, mutation, n = 3):
+    target_code, _ = mutation.apply(buffer)
+    return "".join(difflib.unified_diff(buffer.lines, target_code.splitlines(True),
+                                        fromfile = "a.py", tofile = "b.py", n = n))
+
+
+def _corpus():
+    package_dir = os.path.dirname(code_mutate.__file__)
+    for file_path in sorted(glob(os.path.join(package_dir, "**", "*.py"), recursive = True)):
+        with open(file_path, "r") as f:
+            yield f.read()
+
+
+def _random_source(rng, alphabet, num_lines):
+    return "".join(rng.choice(alphabet) for _ in range(num_lines))
+
+
+def _random_mutation(rng, source_code, replacements):
+    lines = source_code.splitlines(True)
+    start_line = rng.randrange(len(lines))
+    end_line   = min(len(lines) - 1, start_line + rng.randint(0, 2))
+    start_pos  = rng.randint(0, len(lines[start_line].rstrip("\n")))
+    end_pos    = rng.randint(0, len(lines[end_line].rstrip("\n")))
+    if start_line == end_line and start_pos >= end_pos: return None
+
+    return Mutation((start_line, start_pos, end_line, end_pos), rng.choice(replacements))
+
+
+class UnifiedDiffTest(TestCase):
+
+    def assertDifflib(self, source_code, mutation, n = 3):
+        buffer = SourceBuffer(source_code)
+        self.assertEqual(mutation.unified_diff(buffer, fromfile = "a.py", tofile = "b.py", n = n),
+                         _difflib_diff(buffer, mutation, n = n))
+
+    def test_mutated_line_equals_context_line(self):
+        self.assertDifflib("a = 1\nb = 2\nc = 2\n", Mutation((1, 0, 1, 1), "c"))
+
+    def test_deleted_lines_between_repetitions(self):
+        self.assertDifflib("\nb = 2\n\n\n", Mutation((0, 0, 2, 0), "\n"), n = 0)
+        self.assertDifflib("\npass\n\n\n", Mutation((0, 0, 2, 0), "\n"))
+
+    def test_no_change(self):
+        self.assertEqual(Mutation((0, 4, 0, 5), "1").unified_diff("a = 1\n"), "")
+
+    def test_missing_final_newline(self):
+        self.assertDifflib("a = 1\nb = 2", Mutation((1, 4, 1, 5), "3"))
+
+    def test_corpus(self):
+        num_mutants, num_long_mutants = 0, 0
+        for source_code in _corpus():
+            buffer = SourceBuffer(source_code)
+            mutations = list(mutate(source_code, lang = "python"))
+
+            # difflib only uses its autojunk heuristic for files with at least 200 lines.
+            # The reference diffs the complete file. Therefore, long files are sampled.
+            if len(buffer.lines) >= 200:
+                mutations = mutations[::5]
+                num_long_mutants += len(mutations)
+
+            for mutation in mutations:
+                for n in [0, 3]:
+                    self.assertEqual(mutation.unified_diff(buffer, fromfile = "a.py", tofile = "b.py", n = n),
+                                     _difflib_diff(buffer, mutation, n = n), msg = repr(mutation))
+                num_mutants += 1
+
+        self.assertGreater(num_mutants, 100)
+        self.assertGreater(num_long_mutants, 100)
+
+    def test_popular_trailing_lines(self):
+        # The blank lines after the last function are popular and ignored by difflib
+        functions = "".join(f"def f{i}(x):\n    y = x * {i}\n    return y + {i}\n\n\n" for i in range(100))
+        source_code = functions + "def last(x):\n    return x + 1\n\n\n"
+        self.assertGreater(source_code.count("\n"), 200)
+
+        last_line = source_code.count("\n") - 3
+        self.assertDifflib(source_code, Mutation((last_line, 13, last_line, 14), "-"))
+        self.assertDifflib(source_code, Mutation((last_line, 13, last_line, 14), "-"), n = 0)
+
+    def test_random_repetitive_sources(self):
+        rng = random.Random(0)
+        alphabet = ["a = 1\n", "b = 2\n", "c = 2\n", "pass\n", "\n"]
+        replacements = ["c", "b", "1", "x\nc = 2", "", "pass\na = 1", "\n", "\nb"]
+
+        for _ in range(3000):
+            source_code = _random_source(rng, alphabet, rng.randint(1, 40))
+            if rng.random() < 0.2: source_code = source_code.rstrip("\n")
+            if not source_code: continue
+
+            mutation = _random_mutation(rng, source_code, replacements)
+            if mutation is None: continue
+            self.assertDifflib(source_code, mutation, n = rng.choice([0, 1, 3]))
+
+    def test_random_long_sources(self):
+        # Lines that occur in more than 1% of a long file are popular for difflib
+        rng = random.Random(0)
+        alphabet = ["a = 1\n", "b = 2\n", "c = 2\n", "pass\n", "\n"]
+        replacements = ["c", "b", "1", "x\nc = 2", "", "pass\na = 1", "\n", "\nb", "y = 3"]
+
+        for _ in range(300):
+            rare_lines = [f"x{i} = {i}\n" for i in range(rng.randint(0, 300))]
+            source_code = _random_source(rng, alphabet + rare_lines, rng.randint(200, 300))
+
+            mutation = _random_mutation(rng, source_code, replacements)
+            if mutation is None: continue
+            self.assertDifflib(source_code, mutation, n = rng.choice([0, 1, 3]))
@@ -0,0 +1,176 @@
+import os
+import sys
+import socket
+import threading
+import multiprocessing
+
+from unittest import skipUnless
+
+from code_mutate import mutate
+from code_mutate.mutation import Mutation
+from code_mutate.runners import BaseTestRunner, TestResult as Result, UnittestRunner, Coordinator, Worker, run_mutants
+from code_mutate.runners.distributed import send_message, recv_message, parse_address
+
+from .test_runners import ProjectTestCase
+
+
+class _VerdictRunner(BaseTestRunner):
+    """Kills every mutant that replaces the operator by a minus without importing anything"""
+
+    def __init__(self, delay = None, on_run = None):
+        self.delay = delay
+        self.on_run = on_run
+
+    def run_tests_with_mutant(self, module_name, mutation, timeout = -1, tests = None):
+        if self.on_run is not None: self.on_run()
+        if self.delay is not None: self.delay.wait(timeout = 10)
+
+        if mutation.target_text == "-":
+            return Result(Result.KILLED, 1, [f"test_{mutation.source_pos[0]}"])
+        return Result(Result.SURVIVED, 1)
+
+
+def _mutants(count):
+    return [("lib", Mutation((i, 4, i, 5), "-" if i % 3 else "*")) for i in range(count)]
+
+
+def _verdicts(results):
+    return [(module_name, mutation.source_pos, mutation.target_text, result.status, result.failed_tests)
+            for module_name, mutation, result in results]
+
+
+class _Campaign:
+    """Runs the coordinator in a background thread"""
+
+    def __init__(self, coordinator, mutants):
+        self.results = None
+        self._thread = threading.Thread(target = self._run, args = (coordinator, mutants), daemon = True)
+        self._thread.start()
+
+    def _run(self, coordinator, mutants):
+        self.results = list(coordinator.run(mutants))
+
+    def join(self):
+        self._thread.join(timeout = 30)
+        return self.results
+
+
+def _start_worker(worker):
+    thread = threading.Thread(target = worker.run, daemon = True)
+    thread.start()
+    return thread
+
+
+def _run_process_worker(address, directory):
+    sys.path.insert(0, directory)
+    Worker(UnittestRunner("test_calc"), address, batch_size = 2).run()
+
+
+class DistributedTestMixin:
+
+    def address(self):
+        raise NotImplementedError()
+
+    def test_matches_local_run(self):
+        mutants = _mutants(12)
+        local = _verdicts(run_mutants(_VerdictRunner(), mutants))
+
+        coordinator = Coordinator(self.address(), batch_size = 3)
+        address = coordinator.start()
+        campaign = _Campaign(coordinator, mutants)
+
+        workers = [Worker(_VerdictRunner(), address, batch_size = 3) for _ in range(3)]
+        threads = [_start_worker(worker) for worker in workers]
+
+        self.assertEqual(_verdicts(campaign.join()), local)
+        for thread in threads: thread.join(timeout = 10)
+        self.assertEqual(sum(worker.executed for worker in workers), len(mutants))
+
+    def test_requeues_lost_worker(self):
+        mutants = _mutants(6)
+        local = _verdicts(run_mutants(_VerdictRunner(), mutants))
+
+        coordinator = Coordinator(self.address(), batch_size = 4)
+        address = coordinator.start()
+        campaign = _Campaign(coordinator, mutants)
+
+        # The first worker takes a batch and disconnects without reporting any result
+        family, server_address = parse_address(address)
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(server_address)
+            message = {"type": "wait"}
+            while message["type"] == "wait":
+                send_message(connection, {"type": "request", "max": 4})
+                message = recv_message(connection)
+            self.assertEqual(len(message["tasks"]), 4)
+
+        workers = [Worker(_VerdictRunner(), address, batch_size = 2) for _ in range(2)]
+        threads = [_start_worker(worker) for worker in workers]
+
+        self.assertEqual(_verdicts(campaign.join()), local)
+        for thread in threads: thread.join(timeout = 10)
+        self.assertEqual(sum(worker.executed for worker in workers), len(mutants))
+
+    def test_steals_work(self):
+        mutants = _mutants(8)
+        local = _verdicts(run_mutants(_VerdictRunner(), mutants))
+
+        started, released = threading.Event(), threading.Event()
+
+        coordinator = Coordinator(self.address(), batch_size = 8)
+        address = coordinator.start()
+        campaign = _Campaign(coordinator, mutants)
+
+        # The busy worker holds all mutants and blocks on its first mutant
+        busy = Worker(_VerdictRunner(delay = released, on_run = started.set), address, batch_size = 8)
+        busy_thread = _start_worker(busy)
+        self.assertTrue(started.wait(timeout = 10))
+
+        idle = Worker(_VerdictRunner(on_run = released.set), address, batch_size = 8)
+        idle_thread = _start_worker(idle)
+
+        self.assertEqual(_verdicts(campaign.join()), local)
+        busy_thread.join(timeout = 10)
+        idle_thread.join(timeout = 10)
+
+        self.assertGreater(idle.executed, 0)
+        self.assertEqual(busy.executed + idle.executed, len(mutants))
+
+    @skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_worker_processes(self):
+        # Workers in separate processes import the mutated project
+        with open(os.path.join(self.directory, "calc", "ops.py")) as f:
+            mutants = [("calc.ops", mutation) for mutation in mutate(f.read(), lang = "python")]
+        mutants.append(("calc", Mutation((0, 0, 0, 13), 'NAME = "x"')))
+
+        local = _verdicts(run_mutants(UnittestRunner("test_calc"), mutants))
+
+        coordinator = Coordinator(self.address(), batch_size = 1)
+        address = coordinator.start()
+
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target = _run_process_worker, args = (address, self.directory))
+                     for _ in range(2)]
+        for process in processes: process.start()
+
+        try:
+            self.assertEqual(_verdicts(coordinator.run(mutants)), local)
+        finally:
+            for process in processes:
+                process.join(timeout = 10)
+                if process.is_alive(): process.kill()
+
+        self.assertTrue(all(status == Result.KILLED for *_, status, _ in local))
+
+
+class TCPDistributedTest(DistributedTestMixin, ProjectTestCase):
+
+    def address(self):
+        return "127.0.0.1:0"
+
+
+@skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+class UnixDistributedTest(DistributedTestMixin, ProjectTestCase):
+
+    def address(self):
+        return f"unix:{os.path.join(self.directory, 'coordinator.sock')}"
@@ -0,0 +1,100 @@
+import os
+import sysconfig
+
+from unittest import TestCase
+
+from code_mutate import mutate
+from code_mutate.mutation import Mutation, SourceBuffer
+from code_mutate.sampling import CountSampler
+from code_mutate.equivalence import EquivalenceFilter, code_digest
+
+
+SOURCE = """from __future__ import annotations
+
+LIMIT = 1
+
+
+def add(x, y):
+    return x + y
+
+
+class Counter:
+
+    def increment(self, step : int = 1):
+        self.value = self.value + step
+        return self.value
+"""
+
+
+def _classify_modules(buffer, mutations):
+    # Reference: compile the complete mutated module
+    original = code_digest(compile(buffer.text, "<mutant>", "exec", dont_inherit = True))
+    seen = set()
+
+    for mutation in mutations:
+        target_code, _ = mutation.apply(buffer)
+        try:
+            digest = code_digest(compile(target_code, "<mutant>", "exec", dont_inherit = True))
+        except (SyntaxError, ValueError):
+            yield None
+            continue
+
+        if digest == original:
+            yield "equivalent"
+        elif digest in seen:
+            yield "duplicate"
+        else:
+            seen.add(digest)
+            yield None
+
+
+class EquivalenceFilterTest(TestCase):
+
+    def assertModuleClassification(self, source_code, mutations):
+        buffer = SourceBuffer(source_code)
+        mutations = list(mutations)
+
+        equivalence = EquivalenceFilter(buffer)
+        classification = [equivalence.check(mutation) for mutation in mutations]
+
+        self.assertEqual(classification, list(_classify_modules(buffer, mutations)))
+        self.assertEqual(equivalence.equivalent, classification.count("equivalent"))
+        self.assertEqual(equivalence.duplicate, classification.count("duplicate"))
+
+    def test_equivalent_and_duplicate(self):
+        mutations = [
+            Mutation((2, 8, 2, 9), "0x1"),        # LIMIT = 0x1
+            Mutation((6, 11, 6, 16), "x - y"),
+            Mutation((6, 11, 6, 16), "x  -  y"),  # duplicate of x - y
+            Mutation((6, 11, 6, 16), "(x + y)"),  # equivalent
+            Mutation((6, 11, 6, 16), "x +"),      # does not compile
+        ]
+        equivalence = EquivalenceFilter(SOURCE)
+        self.assertEqual([equivalence.check(mutation) for mutation in mutations],
+                         ["equivalent", None, "duplicate", "equivalent", None])
+        self.assertEqual(list(EquivalenceFilter(SOURCE).filter(mutations)), [mutations[1], mutations[4]])
+        self.assertModuleClassification(SOURCE, mutations)
+
+    def test_generated_mutants(self):
+        self.assertModuleClassification(SOURCE, mutate(SOURCE, lang = "python"))
+
+    def test_moved_lines(self):
+        # Mutants that add lines shift all later statements
+        mutations = [Mutation((6, 4, 6, 16), "pass\n    return x + y"),
+                     Mutation((12, 8, 12, 40), "self.value += step")]
+        self.assertModuleClassification(SOURCE, mutations)
+
+    def test_standard_library(self):
+        # Large modules are sampled to keep the reference compilation fast
+        for module, count in [("calendar", None), ("argparse", 150), ("enum", 150)]:
+            with open(os.path.join(sysconfig.get_paths()["stdlib"], f"{module}.py"), "r", encoding = "utf-8") as f:
+                source_code = f.read()
+
+            mutations = list(mutate(source_code, lang = "python"))
+            if count is not None: mutations = CountSampler(count, seed = 0).sample(mutations)
+            self.assertModuleClassification(source_code, mutations)
+
+    def test_invalid_source(self):
+        equivalence = EquivalenceFilter("def f(:\n    return 1\n")
+        self.assertIsNone(equivalence.check(Mutation((1, 11, 1, 12), "1")))
+        self.assertEqual(equivalence.removed, 0)
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+import tempfile
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from code_mutate import journal
+from code_mutate.journal import Journal, mutant_id
+from code_mutate.mutation import Mutation
+from code_mutate.runners.base import TestResult as Result
+
+
+def _result(i):
+    return Result(Result.KILLED if i % 2 else Result.SURVIVED, tests_run = i,
+                  failed_tests = [f"test_{i}"] if i % 2 else [], duration = 0.5 * i)
+
+
+def _lines(path):
+    with open(path, "r") as f:
+        return f.readlines()
+
+
+class MutantIdTest(TestCase):
+
+    def test_stable(self):
+        mutation = Mutation((1, 4, 1, 5), "-", op_type = "BinaryOp")
+        self.assertEqual(mutant_id("src/lib.py", mutation),
+                         mutant_id("src/lib.py", Mutation((1, 4, 1, 5), "-", op_type = "BinaryOp")))
+
+    def test_equivalent_paths(self):
+        mutation = Mutation((1, 4, 1, 5), "-", op_type = "BinaryOp")
+        for file_path in ["./src/lib.py", "src/../src/lib.py", os.path.abspath("src/lib.py")]:
+            self.assertEqual(mutant_id(file_path, mutation), mutant_id("src/lib.py", mutation), file_path)
+
+    def test_distinct(self):
+        mutation = Mutation((1, 4, 1, 5), "-", op_type = "BinaryOp")
+        others = [Mutation((1, 4, 1, 5), "*", op_type = "BinaryOp"),
+                  Mutation((2, 4, 2, 5), "-", op_type = "BinaryOp"),
+                  Mutation((1, 4, 1, 5), "-", op_type = "Other")]
+
+        ids = {mutant_id("lib.py", m) for m in [mutation] + others}
+        ids.add(mutant_id("other.py", mutation))
+        self.assertEqual(len(ids), 5)
+
+
+class JournalTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "journal.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_batches_writes(self):
+        with patch.object(journal.os, "fsync") as fsync:
+            log = Journal(self.path, batch_size = 3, sync_interval = 3600)
+
+            log.append("a", _result(0))
+            log.append("b", _result(1))
+            self.assertEqual(_lines(self.path), [])
+            self.assertEqual(fsync.call_count, 0)
+
+            log.append("c", _result(2))
+            self.assertEqual(len(_lines(self.path)), 3)
+            self.assertEqual(fsync.call_count, 1)
+
+            log.append("d", _result(3))
+            log.close()
+            self.assertEqual(len(_lines(self.path)), 4)
+            self.assertEqual(fsync.call_count, 2)
+
+    def test_sync_interval(self):
+        with patch.object(journal.os, "fsync") as fsync:
+            log = Journal(self.path, batch_size = 100, sync_interval = 0.0)
+            log.append("a", _result(0))
+            log.append("b", _result(1))
+            self.assertEqual(len(_lines(self.path)), 2)
+            self.assertEqual(fsync.call_count, 2)
+            log.close()
+
+    def test_empty_sync(self):
+        with patch.object(journal.os, "fsync") as fsync:
+            with Journal(self.path) as log:
+                log.sync()
+            self.assertEqual(fsync.call_count, 0)
+
+    def test_resume(self):
+        with Journal(self.path) as log:
+            for i, key in enumerate("abc"):
+                log.append(key, _result(i))
+
+        log = Journal(self.path, resume = True)
+        self.assertEqual(set(log.records), {"a", "b", "c"})
+        self.assertIn("b", log)
+        self.assertIsNone(log.lookup("d"))
+
+        log.append("d", _result(3))
+        log.close()
+        self.assertEqual([json.loads(line)["id"] for line in _lines(self.path)], ["a", "b", "c", "d"])
+
+    def test_round_trip(self):
+        with Journal(self.path) as log:
+            log.append("a", Result(Result.TIMEOUT, tests_run = 2, failed_tests = ["test_x"],
+                                   duration = 1.25, message = "Timeout after 1.0s"))
+
+        result = Result(**Journal(self.path, resume = True).lookup("a"))
+        self.assertEqual((result.status, result.tests_run, result.failed_tests, result.duration, result.message),
+                         (Result.TIMEOUT, 2, ["test_x"], 1.25, "Timeout after 1.0s"))
+
+    def test_truncates_torn_line(self):
+        with Journal(self.path) as log:
+            log.append("a", _result(0))
+            log.append("b", _result(1))
+
+        valid_size = os.path.getsize(self.path)
+        with open(self.path, "a") as f:
+            f.write('{"id": "c", "status": "kil')
+
+        log = Journal(self.path, resume = True)
+        self.assertEqual(set(log.records), {"a", "b"})
+        self.assertEqual(os.path.getsize(self.path), valid_size)
+
+        log.append("c", _result(2))
+        log.close()
+        self.assertEqual([json.loads(line)["id"] for line in _lines(self.path)], ["a", "b", "c"])
+
+    def test_without_resume_truncates(self):
+        with Journal(self.path) as log:
+            log.append("a", _result(0))
+
+        log = Journal(self.path)
+        self.assertEqual(log.records, {})
+        self.assertEqual(_lines(self.path), [])
+        log.close()
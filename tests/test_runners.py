@@ -0,0 +1,509 @@
+import os
+import sys
+import asyncio
+import importlib
+import shutil
+import tempfile
+import textwrap
+
+from unittest import TestCase, skipUnless, mock
+
+from code_mutate import cache
+from code_mutate.cache import ResultCache
+from code_mutate import mutate
+from code_mutate.mutation import Mutation
+from code_mutate.runners.base import BaseTestRunner, TestResult as Result, evict_modules, module_origin
+from code_mutate.history import KillHistory
+from code_mutate.runners.cached import CachedRunner
+from code_mutate.runners.prioritized import PrioritizedRunner
+from code_mutate.runners.coverage import CoverageGuidedRunner
+from code_mutate.runners.pool import run_mutants
+from code_mutate.runners.subprocess import AsyncSubprocessRunner, run_campaign
+from code_mutate.runners.unittest import UnittestRunner
+from code_mutate.runners.fork import ForkServerRunner, dependent_modules
+from code_mutate.schemata import MutantSchemata
+
+
+PACKAGE = {
+    "calc/__init__.py": """\
+        NAME = "calc"
+
+        from .ops import add
+    """,
+    "calc/ops.py": """\
+        def add(x, y):
+            return x + y
+    """,
+    "calc/ops_extra.py": """\
+        def sub(x, y):
+            return x - y
+    """,
+    "test_calc.py": """\
+        import unittest
+
+        import calc
+        from calc.ops_extra import sub
+
+
+        class CalcTest(unittest.TestCase):
+
+            def test_name(self):
+                self.assertEqual(calc.NAME, "calc")
+
+            def test_add(self):
+                self.assertEqual(calc.add(1, 2), 3)
+
+            def test_sub(self):
+                self.assertEqual(sub(3, 2), 1)
+    """,
+}
+
+
+# Mutants of calc.ops that are killed, survive and are killed again
+REEXPORTED_MUTANTS = [
+    Mutation((1, 11, 1, 16), "x * y"),
+    Mutation((1, 11, 1, 16), "y + x"),
+    Mutation((1, 13, 1, 14), "-"),
+]
+REEXPORTED_STATUSES = [Result.KILLED, Result.SURVIVED, Result.KILLED]
+
+
+def write_project(directory, files):
+    for path, content in files.items():
+        path = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, "w") as f:
+            f.write(textwrap.dedent(content))
+
+
+class ProjectTestCase(TestCase):
+    """Writes a project to a temporary directory on the import path"""
+
+    files = PACKAGE
+    modules = ("calc", "test_calc")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_project(self.directory, self.files)
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        for module_name in self.modules:
+            evict_modules(module_name)
+        shutil.rmtree(self.directory)
+
+
+class MutateImportsTest(ProjectTestCase):
+
+    def runner(self):
+        return UnittestRunner("test_calc")
+
+    def test_package_init(self):
+        runner = self.runner()
+        result = runner.run_tests_with_mutant("calc", Mutation((0, 0, 0, 13), 'NAME = "x"'))
+
+        self.assertEqual(result.status, Result.KILLED, result.message)
+        self.assertEqual(result.failed_tests, ["test_calc.CalcTest.test_name"])
+
+    def test_submodule(self):
+        # calc.ops_extra shares the prefix of calc.ops but must stay unchanged
+        runner = self.runner()
+        result = runner.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "*"))
+
+        self.assertEqual(result.status, Result.KILLED, result.message)
+        self.assertEqual(result.failed_tests, ["test_calc.CalcTest.test_add"])
+
+    def test_unmutated(self):
+        result = self.runner().run_tests("calc")
+        self.assertEqual((result.status, result.tests_run), (Result.SURVIVED, 3))
+
+    def test_reexported_sequence(self):
+        # calc re-exports add. Later mutants must not see the function of an earlier mutant.
+        runner = self.runner()
+        statuses = [runner.run_tests_with_mutant("calc.ops", mutation).status for mutation in REEXPORTED_MUTANTS]
+        self.assertEqual(statuses, REEXPORTED_STATUSES)
+
+    @skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_reexported_pool(self):
+        mutants = [("calc.ops", mutation) for mutation in REEXPORTED_MUTANTS] * 2
+        results = run_mutants(self.runner(), mutants, jobs = 2)
+        self.assertEqual([result.status for *_, result in results], REEXPORTED_STATUSES * 2)
+
+    def test_not_imported(self):
+        result = self.runner().run_tests_with_mutant("calc.missing", Mutation((0, 0, 0, 1), "x"))
+        self.assertEqual(result.status, Result.ERROR)
+
+
+class SchemataImportsTest(MutateImportsTest):
+
+    def runner(self):
+        runner = UnittestRunner("test_calc")
+        runner.schemata = MutantSchemata()
+        return runner
+
+    def test_submodule_schema(self):
+        runner = self.runner()
+        result = runner.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "-"))
+
+        # The mutant is loaded from the schema of calc/ops.py without compiling it
+        self.assertEqual(result.failed_tests, ["test_calc.CalcTest.test_add"])
+        self.assertNotIn("compile", result.timings)
+
+
+@skipUnless(hasattr(os, "fork"), "requires fork")
+class ForkServerImportsTest(MutateImportsTest):
+
+    def runner(self):
+        return ForkServerRunner(UnittestRunner("test_calc"))
+
+    def test_dependent_modules(self):
+        importlib.import_module("test_calc")
+        self.assertEqual(dependent_modules("calc.ops"), ["calc"])
+        self.assertEqual(dependent_modules("calc.ops_extra"), [])
+        self.assertEqual(dependent_modules("calc"), [])
+
+
+class CoverageImportsTest(MutateImportsTest):
+
+    def runner(self):
+        return CoverageGuidedRunner(UnittestRunner("test_calc"))
+
+    def test_unmutated(self):
+        result = self.runner().run_tests("calc")
+        self.assertEqual(result.status, Result.SURVIVED)
+
+    def test_not_imported(self):
+        # No test covers a module that does not exist
+        result = self.runner().run_tests_with_mutant("calc.missing", Mutation((0, 0, 0, 1), "x"))
+        self.assertEqual(result.status, Result.ERROR)
+
+    def test_select_without_import(self):
+        runner = self.runner()
+        runner.prepare()
+        for module_name in self.modules: evict_modules(module_name)
+
+        self.assertEqual(runner.select_tests("calc.ops", Mutation((1, 13, 1, 14), "-")),
+                         ["test_calc.CalcTest.test_add"])
+        self.assertNotIn("calc", sys.modules)
+
+    def test_matches_plain_runner(self):
+        with open(os.path.join(self.directory, "calc", "ops.py")) as f:
+            mutants = [("calc.ops", mutation) for mutation in mutate(f.read(), lang = "python")]
+        mutants += [("calc.ops", mutation) for mutation in REEXPORTED_MUTANTS]
+
+        plain = [result.status for *_, result in run_mutants(UnittestRunner("test_calc"), mutants)]
+        for module_name in self.modules: evict_modules(module_name)
+        guided = [result.status for *_, result in run_mutants(self.runner(), mutants)]
+
+        self.assertEqual(guided, plain)
+        self.assertIn(Result.SURVIVED, guided)
+
+
+class ModuleOriginTest(ProjectTestCase):
+
+    def test_origin(self):
+        self.assertEqual(module_origin("calc.ops"), os.path.join(self.directory, "calc", "ops.py"))
+        self.assertEqual(module_origin("calc"), os.path.join(self.directory, "calc", "__init__.py"))
+        self.assertIsNone(module_origin("calc.missing"))
+        self.assertIsNone(module_origin("calc.ops.add"))
+        self.assertNotIn("calc", sys.modules)
+
+
+class TimeLimitTest(ProjectTestCase):
+
+    files = {
+        "spin.py": """\
+            import time
+
+
+            def spin():
+                while False:
+                    try:
+                        time.sleep(0.01)
+                    except Exception:
+                        pass
+        """,
+        "test_spin.py": """\
+            import unittest
+
+            from spin import spin
+
+
+            class SpinTest(unittest.TestCase):
+
+                def test_spin(self):
+                    self.assertIsNone(spin())
+
+                def test_after(self):
+                    pass
+        """,
+    }
+    modules = ("spin", "test_spin")
+
+    def test_swallowed_timeout(self):
+        runner = UnittestRunner("test_spin")
+        result = runner.run_tests_with_mutant("spin", Mutation((4, 10, 4, 15), "True"), timeout = 1)
+
+        self.assertEqual(result.status, Result.TIMEOUT)
+        self.assertLess(result.duration, 10)
+
+
+class _StatusRunner(BaseTestRunner):
+    """Returns the given verdicts in order and counts executed mutants"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.executed = 0
+
+    def run_tests_with_mutant(self, module_name, mutation, timeout = -1, tests = None):
+        self.executed += 1
+        return Result(self.statuses.pop(0), 1)
+
+
+class CachedRunnerTest(ProjectTestCase):
+
+    def cached_runner(self, *statuses):
+        runner = _StatusRunner(*statuses)
+        return runner, CachedRunner(runner, ResultCache(os.path.join(self.directory, "cache.db")))
+
+    def run_mutant(self, runner, timeout = -1):
+        return runner.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "*"), timeout = timeout, tests = [])
+
+    def test_reuses_verdict(self):
+        runner, cached = self.cached_runner(Result.KILLED)
+        self.assertEqual(self.run_mutant(cached).status, Result.KILLED)
+        self.assertEqual(self.run_mutant(cached).status, Result.KILLED)
+        self.assertEqual(runner.executed, 1)
+
+    def test_reruns_timeout(self):
+        # A longer timeout might turn the verdict of a mutant
+        runner, cached = self.cached_runner(Result.TIMEOUT, Result.RESOURCE, Result.SURVIVED)
+        self.assertEqual(self.run_mutant(cached, timeout = 1).status, Result.TIMEOUT)
+        self.assertEqual(self.run_mutant(cached, timeout = 10).status, Result.RESOURCE)
+        self.assertEqual(self.run_mutant(cached, timeout = 10).status, Result.SURVIVED)
+        self.assertEqual(runner.executed, 3)
+
+    def test_tool_version(self):
+        runner, cached = self.cached_runner(Result.KILLED, Result.SURVIVED)
+        self.run_mutant(cached)
+        cached.cache.store_mutants("hash", None, [Mutation((1, 13, 1, 14), "*")])
+
+        with mock.patch.object(cache, "TOOL_VERSION", "other"):
+            self.assertEqual(self.run_mutant(cached).status, Result.SURVIVED)
+            self.assertIsNone(cached.cache.load_mutants("hash", None))
+        self.assertEqual(runner.executed, 2)
+
+
+class KillHistoryTest(TestCase):
+
+    tests = ["test_slow", "test_fast", "test_operator", "test_location", "test_unknown"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "history.db")
+
+    def history(self):
+        history = KillHistory(self.path)
+        self.addCleanup(history.close)
+        return history
+
+    def record(self, history):
+        history.record_durations({"test_slow": 2.0, "test_fast": 0.5, "test_operator": 3.0, "test_location": 4.0})
+        # Same line, other operator
+        history.record_kill("calc.ops", Mutation((1, 11, 1, 16), "x * y", op_type = "SCI"), ["test_location"])
+        # Same operator, other line
+        history.record_kill("calc.ops", Mutation((5, 13, 5, 14), "*", op_type = "AOR"), ["test_operator"])
+        history.record_kill("calc.ops", Mutation((5, 13, 5, 14), "/", op_type = "AOR"), ["test_operator"])
+
+    def test_order(self):
+        history = self.history()
+        self.record(history)
+
+        # Location kills, operator kills, test duration (unknown durations last)
+        self.assertEqual(history.prioritize("calc.ops", Mutation((1, 13, 1, 14), "-", op_type = "AOR"), self.tests),
+                         ["test_location", "test_operator", "test_fast", "test_slow", "test_unknown"])
+
+        # Kills in other modules are ignored
+        self.assertEqual(history.prioritize("calc.other", Mutation((1, 13, 1, 14), "-", op_type = "AOR"), self.tests),
+                         ["test_fast", "test_slow", "test_operator", "test_location", "test_unknown"])
+
+    def test_kill_counts(self):
+        history = self.history()
+        self.record(history)
+        history.record_kill("calc.ops", Mutation((1, 13, 1, 14), "*", op_type = "AOR"), ["test_slow"])
+        history.record_kill("calc.ops", Mutation((1, 13, 1, 14), "/", op_type = "AOR"), ["test_slow"])
+
+        # More kills on the same line outrank fewer kills
+        self.assertEqual(history.prioritize("calc.ops", Mutation((1, 13, 1, 14), "-", op_type = "AOR"), self.tests)[:3],
+                         ["test_slow", "test_location", "test_operator"])
+
+    def test_persistence(self):
+        history = self.history()
+        self.record(history)
+        mutation = Mutation((1, 13, 1, 14), "-", op_type = "AOR")
+        expected = history.prioritize("calc.ops", mutation, self.tests)
+        history.close()
+
+        self.assertEqual(self.history().prioritize("calc.ops", mutation, self.tests), expected)
+
+    def test_similar_durations(self):
+        history = self.history()
+        history.record_durations({"test_fast": 1.0, "test_slow": 2.0})
+        history.record_durations({"test_fast": 1.05, "test_slow": 1.0})
+        history.close()
+
+        # Small changes of a duration are not persisted
+        reloaded = self.history()
+        reloaded._load()
+        self.assertEqual(reloaded._durations, {"test_fast": 1.0, "test_slow": 1.0})
+
+
+class _KillingRunner(BaseTestRunner):
+    """Kills every mutant with the given tests and records the order of the executed tests"""
+
+    def __init__(self, tests, killing_tests):
+        self.tests = tests
+        self.killing_tests = killing_tests
+        self.test_durations = {test_id: 1.0 + i for i, test_id in enumerate(tests)}
+        self.orders = []
+
+    def select_tests(self, module_name, mutation):
+        return None
+
+    def list_tests(self):
+        return self.tests
+
+    def run_tests_with_mutant(self, module_name, mutation, timeout = -1, tests = None):
+        self.orders.append(list(tests))
+        return Result(Result.KILLED, 1, failed_tests = self.killing_tests)
+
+
+class PrioritizedRunnerTest(TestCase):
+
+    tests = ["test_a", "test_b", "test_c"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def prioritized_runner(self):
+        runner = _KillingRunner(self.tests, ["test_c"])
+        history = KillHistory(os.path.join(self.directory, "history.db"))
+        self.addCleanup(history.close)
+
+        prioritized = PrioritizedRunner(runner, history)
+        prioritized.prepare()
+        return runner, prioritized
+
+    def test_killing_tests_first(self):
+        runner, prioritized = self.prioritized_runner()
+        prioritized.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "-", op_type = "AOR"))
+        prioritized.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "*", op_type = "AOR"))
+
+        # Tests without kills are ordered by duration
+        self.assertEqual(runner.orders, [["test_a", "test_b", "test_c"], ["test_c", "test_a", "test_b"]])
+
+    def test_across_runs(self):
+        _, prioritized = self.prioritized_runner()
+        prioritized.run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), "-", op_type = "AOR"))
+        prioritized.history.close()
+
+        # A new campaign starts with the recorded kills
+        runner, prioritized = self.prioritized_runner()
+        prioritized.run_tests_with_mutant("calc.ops", Mutation((3, 13, 3, 14), "-", op_type = "AOR"))
+        self.assertEqual(runner.orders, [["test_c", "test_a", "test_b"]])
+
+
+class AsyncSubprocessRunnerTest(ProjectTestCase):
+
+    files = {
+        "calc/__init__.py": "",
+        "calc/ops.py": """\
+            def add(x, y):
+                return x + y
+        """,
+        "test_calc.py": """\
+            import os
+            import time
+            import unittest
+
+            from calc.ops import add
+
+
+            class CalcTest(unittest.TestCase):
+
+                def test_add(self):
+                    with open("pids.txt", "a") as f:
+                        f.write(f"{os.getpid()}\\n")
+
+                    # x - y hangs and x / y crashes the test process
+                    if add(2, 2) == 0: time.sleep(60)
+                    if add(2, 2) == 1: os._exit(3)
+
+                    self.assertEqual(add(2, 2), 4)
+        """,
+    }
+
+    def setUp(self):
+        super().setUp()
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+
+    def runner(self, concurrency = 2):
+        return AsyncSubprocessRunner("test_calc", concurrency = concurrency)
+
+    def run_mutant(self, target_text, timeout = -1):
+        return self.runner().run_tests_with_mutant("calc.ops", Mutation((1, 13, 1, 14), target_text), timeout = timeout)
+
+    def started_processes(self):
+        if not os.path.exists("pids.txt"): return []
+        with open("pids.txt") as f:
+            return [int(line) for line in f]
+
+    def assertTerminated(self, pids):
+        for pid in pids:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+
+    def test_verdicts(self):
+        self.assertEqual(self.run_mutant("+").status, Result.SURVIVED)
+        self.assertEqual(self.run_mutant("*").status, Result.SURVIVED)
+        self.assertEqual(self.run_mutant("<<").status, Result.KILLED)
+
+    def test_timeout(self):
+        result = self.run_mutant("-", timeout = 3)
+        self.assertEqual(result.status, Result.TIMEOUT)
+        self.assertLess(result.duration, 10)
+
+        self.assertEqual(len(self.started_processes()), 1)
+        self.assertTerminated(self.started_processes())
+
+    def test_crash(self):
+        result = self.run_mutant("/")
+        self.assertEqual(result.status, Result.ERROR)
+        self.assertIn("exited with code 3", result.message)
+
+    def test_cancel_campaign(self):
+        mutants = [("calc.ops", Mutation((1, 13, 1, 14), "-"))] * 4
+
+        async def cancel_campaign():
+            async def consume():
+                async for result in run_campaign(self.runner(), mutants):
+                    self.fail(f"Hanging mutant finished: {result}")
+
+            task = asyncio.ensure_future(consume())
+            while len(self.started_processes()) < 2:
+                await asyncio.sleep(0.05)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(asyncio.wait_for(cancel_campaign(), 30))
+
+        # Only the first mutants were started (bounded by the concurrency) and all of them were killed
+        self.assertEqual(len(self.started_processes()), 2)
+        self.assertTerminated(self.started_processes())
@@ -0,0 +1,115 @@
+from unittest import TestCase
+
+from code_mutate import mutate
+from code_mutate.sampling import FractionSampler, CountSampler, init_sampler
+
+
+SOURCE = """
+def add(x, y):
+    if x > 100 and y < 0:
+        return x + y
+    return x - y
+
+
+def mul(x, y):
+    while x > 0:
+        x -= 1
+    return x * y * 2
+"""
+
+
+def _mutants():
+    return list(mutate(SOURCE, lang = "python"))
+
+
+def _key(mutation):
+    return (mutation.source_pos, mutation.target_text, mutation.op_type)
+
+
+class FractionSamplerTest(TestCase):
+
+    def test_full_fraction_keeps_all(self):
+        mutants = _mutants()
+        self.assertEqual(list(FractionSampler(1.0).sample(mutants)), mutants)
+
+    def test_invalid_fraction(self):
+        for fraction in [0.0, -0.1, 1.5]:
+            with self.assertRaises(ValueError):
+                FractionSampler(fraction)
+
+    def test_same_seed_same_sample(self):
+        mutants = _mutants()
+        first  = [_key(m) for m in FractionSampler(0.5, seed = 1).sample(mutants)]
+        second = [_key(m) for m in FractionSampler(0.5, seed = 1).sample(_mutants())]
+        self.assertEqual(first, second)
+
+    def test_decision_is_independent_of_other_mutants(self):
+        mutants = _mutants()
+        sampler = FractionSampler(0.5, seed = 3)
+        kept = {_key(m) for m in sampler.sample(mutants)}
+        kept_half = {_key(m) for m in sampler.sample(mutants[::2])}
+        self.assertEqual(kept_half, {_key(m) for m in mutants[::2]} & kept)
+
+    def test_seeds_differ(self):
+        mutants = _mutants()
+        samples = {tuple(_key(m) for m in FractionSampler(0.5, seed = seed).sample(mutants))
+                   for seed in range(5)}
+        self.assertGreater(len(samples), 1)
+
+
+class CountSamplerTest(TestCase):
+
+    def test_keeps_count_in_original_order(self):
+        mutants = _mutants()
+        sample  = CountSampler(5, seed = 0).sample(mutants)
+
+        self.assertEqual(len(sample), 5)
+        positions = [mutants.index(m) for m in sample]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_large_count_keeps_all(self):
+        mutants = _mutants()
+        self.assertEqual(CountSampler(len(mutants) + 10).sample(mutants), mutants)
+
+    def test_same_seed_same_sample(self):
+        first  = [_key(m) for m in CountSampler(4, seed = 7).sample(_mutants())]
+        second = [_key(m) for m in CountSampler(4, seed = 7).sample(_mutants())]
+        self.assertEqual(first, second)
+
+    def test_seeds_differ(self):
+        mutants = _mutants()
+        samples = {tuple(_key(m) for m in CountSampler(4, seed = seed).sample(mutants))
+                   for seed in range(5)}
+        self.assertGreater(len(samples), 1)
+
+    def test_count_per_operator(self):
+        mutants = _mutants()
+        sample  = CountSampler(1, by = "operator").sample(mutants)
+
+        operators = [m.op_type for m in sample]
+        self.assertEqual(sorted(operators), sorted({m.op_type for m in mutants}))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            CountSampler(-1)
+        with self.assertRaises(ValueError):
+            CountSampler(1, by = "line")
+
+
+class InitSamplerTest(TestCase):
+
+    def test_floats_are_fractions(self):
+        self.assertIsInstance(init_sampler(1.0), FractionSampler)
+        self.assertIsInstance(init_sampler(0.1), FractionSampler)
+
+    def test_ints_are_counts(self):
+        sampler = init_sampler(1, by = "scope", seed = 2)
+        self.assertIsInstance(sampler, CountSampler)
+        self.assertEqual((sampler.count, sampler.by, sampler.seed), (1, "scope", 2))
+
+    def test_fraction_with_stratum(self):
+        with self.assertRaises(ValueError):
+            init_sampler(0.5, by = "operator")
+
+    def test_full_fraction_via_mutate(self):
+        self.assertEqual(len(list(mutate(SOURCE, lang = "python", sample = 1.0))), len(_mutants()))
@@ -0,0 +1,150 @@
+from unittest import TestCase
+
+from code_mutate import mutate
+from code_mutate.mutation import Mutation, SourceBuffer
+from code_mutate.schemata import MutantSchema, SWITCH_NAME
+
+
+SOURCE = """
+class Base:
+
+    def total(self, values):
+        return sum(values)
+
+
+class Child(Base):
+
+    def total(self, values):
+        result = super().total(values)
+        return result + 1
+
+
+def scale(x, y = 2):
+    if x > 0 and y > 0:
+        return x * y
+    return -x
+
+
+def safe_div(x, y):
+    try:
+        return x / y
+    except ZeroDivisionError:
+        fallback = 0
+    return fallback
+
+
+def lookup(table, key):
+    try:
+        value = table[key]
+    except KeyError:
+        value = None
+    return value
+
+
+def numbers(n):
+    for i in range(n):
+        yield n - i
+
+
+def flags(x):
+    found = False
+    for i in range(x):
+        if i % 3 == 0:
+            continue
+        found = True
+    return found
+
+
+def apply(values, f = lambda v: v * 2):
+    return [f(v) for v in values if v != 1]
+"""
+
+PROBES = [
+    "Child().total([1, 2])",
+    "scale(2)",
+    "scale(-1, 3)",
+    "safe_div(4, 2)",
+    "safe_div(1, 0)",
+    "lookup({'a': 1}, 'a')",
+    "lookup({}, 'a')",
+    "list(numbers(3))",
+    "flags(4)",
+    "flags(1)",
+    "apply([1, 2, 3])",
+]
+
+# Mutants that change the locals or the kind of a function
+SCOPE_MUTATIONS = [
+    Mutation((38, 8, 38, 19), "pass", op_type = "DEL"),       # removes the only yield
+    Mutation((24, 8, 24, 20), "pass", op_type = "DEL"),       # removes the only binding of fallback
+    Mutation((46, 8, 46, 20), "range = x", op_type = "INS"),  # shadows a builtin used in the function
+]
+
+
+def _verdict(code, mutant_id = None):
+    namespace = {"__name__": "subject"}
+    if mutant_id is not None: namespace[SWITCH_NAME] = mutant_id
+
+    try:
+        exec(code, namespace)
+    except Exception as e:
+        return type(e).__name__
+
+    outcome = []
+    for probe in PROBES:
+        try:
+            outcome.append(repr(eval(probe, namespace)))
+        except Exception as e:
+            outcome.append(type(e).__name__)
+    return outcome
+
+
+def _compiled(source_code):
+    try:
+        return compile(source_code, "<mutant>", "exec", dont_inherit = True)
+    except (SyntaxError, ValueError):
+        return None
+
+
+class MutantSchemaTest(TestCase):
+
+    def setUp(self):
+        self.buffer = SourceBuffer(SOURCE)
+        self.mutations = list(mutate(SOURCE, lang = "python")) + SCOPE_MUTATIONS
+        self.schema = MutantSchema(SOURCE, mutations = self.mutations)
+
+    def test_original(self):
+        self.assertEqual(_verdict(self.schema.code, 0), _verdict(compile(SOURCE, "<original>", "exec")))
+
+    def test_matches_apply(self):
+        for mutation in self.mutations:
+            mutant_id = self.schema.mutant_id(mutation)
+            if mutant_id is None: continue
+
+            code = _compiled(mutation.apply(self.buffer)[0])
+            self.assertIsNotNone(code, mutation)
+            with self.subTest(mutation = repr(mutation)):
+                self.assertEqual(_verdict(self.schema.code, mutant_id), _verdict(code))
+
+    def test_site_kinds(self):
+        kinds = {site.kind for site in _sites(self.schema) if site.enabled}
+        self.assertEqual(kinds, {"expression", "statement"})
+        self.assertGreater(len(self.schema), len(self.mutations) // 2)
+
+    def test_excludes_scope_changes(self):
+        for mutation in SCOPE_MUTATIONS:
+            self.assertIsNone(self.schema.mutant_id(mutation), mutation)
+
+    def test_keeps_bound_names(self):
+        # value is still bound in the try block if the handler is swallowed
+        handler = [m for m in self.mutations if m.op_type == "EXS" and m.source_pos[0] == 32]
+        self.assertEqual(len(handler), 1)
+        self.assertIsNotNone(self.schema.mutant_id(handler[0]))
+
+
+def _sites(schema):
+    stack = list(schema._sites)
+    while stack:
+        site = stack.pop()
+        yield site
+        stack.extend(site.children)
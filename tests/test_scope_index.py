@@ -0,0 +1,88 @@
+import os
+
+from glob import glob
+from unittest import TestCase
+
+import code_ast as ca
+
+import code_mutate
+from code_mutate import mutate
+from code_mutate.mutation import ScopeIndex, get_scope_index, _identify_scope
+
+
+NESTED_SOURCE = """
+import os
+
+class Outer:
+
+    x = 1
+
+    class Inner:
+        def method(self):
+            def local(y):
+                return lambda z: y + z
+            return local
+
+    @staticmethod
+    def static(a, b = 1):
+        return a - b
+
+
+def function(x):
+    class Local:
+        def __init__(self):
+            self.x = x
+    return Local()
+
+
+async def coroutine():
+    await function(1)
+"""
+
+
+def _nodes(root_node):
+    stack = [root_node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+def _package_sources():
+    package_dir = os.path.dirname(code_mutate.__file__)
+    for file_path in sorted(glob(os.path.join(package_dir, "**", "*.py"), recursive = True)):
+        with open(file_path, "r") as f:
+            yield f.read()
+
+
+class ScopeIndexTest(TestCase):
+
+    def assertScopes(self, source_code):
+        source_ast  = ca.ast(source_code, lang = "python")
+        scope_index = ScopeIndex(source_ast)
+
+        for node in _nodes(source_ast.root_node()):
+            self.assertEqual(scope_index.scope_of(node), _identify_scope(node),
+                             msg = f"{node.type} at {node.start_point}")
+
+    def test_nested_definitions(self):
+        self.assertScopes(NESTED_SOURCE)
+
+    def test_package_sources(self):
+        for source_code in _package_sources():
+            self.assertScopes(source_code)
+
+    def test_definitions(self):
+        scope_index = ScopeIndex(ca.ast(NESTED_SOURCE, lang = "python"))
+        self.assertEqual(scope_index.names, ["Outer", "Outer.Inner", "Outer.Inner.method",
+                                             "Outer.Inner.method.local", "Outer.static",
+                                             "function", "function.Local",
+                                             "function.Local.__init__", "coroutine"])
+
+    def test_index_is_memoized(self):
+        source_ast = ca.ast(NESTED_SOURCE, lang = "python")
+        self.assertIs(get_scope_index(source_ast), get_scope_index(source_ast))
+
+    def test_mutation_scopes(self):
+        for mutation in mutate(NESTED_SOURCE, lang = "python"):
+            self.assertEqual(mutation.scope, _identify_scope(mutation.source_node))
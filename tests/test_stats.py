@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from code_mutate import mutate
+from code_mutate.mutation import ASTMutation
+from code_mutate.stats import Stats
+
+
+SOURCE = """
+def clamp(x, low, high):
+    if x < low:
+        return low
+    if x > high and high != 0:
+        return high
+    return x + 0
+"""
+
+
+class OperatorCountTest(TestCase):
+
+    def profile(self, ops, **kwargs):
+        stats = Stats()
+        mutants = list(mutate(SOURCE, ops = ops, lang = "python", stats = stats, **kwargs))
+        return stats, mutants
+
+    def test_attributed_to_operator(self):
+        # ROR produces mutants of type LOR
+        stats, mutants = self.profile(["ROR"])
+        self.assertEqual({mutant.op_type for mutant in mutants}, {"LOR"})
+        self.assertEqual(stats.counters["mutants.ROR"], len(mutants))
+        self.assertGreater(stats.counters["mutants.ROR"], 0)
+        self.assertNotIn("mutants.LOR", stats.counters)
+
+    def test_operators(self):
+        stats, mutants = self.profile(["AOR", "ROR", "LCR"])
+        counts = {op: stats.counters.get(f"mutants.{op}", 0) for op in ["AOR", "ROR", "LCR"]}
+        self.assertEqual(sum(counts.values()), len(mutants))
+        self.assertEqual(stats.counters["mutants"], len(mutants))
+        self.assertTrue(all(counts.values()), counts)
+
+    def test_stream(self):
+        stats, mutants = self.profile(["ROR"], stream = True)
+        self.assertEqual(stats.counters["mutants.ROR"], len(mutants))
+
+    def test_callable_operator(self):
+        # Callables are visited as generic operators
+        def replace_zero(node):
+            if node.type == "integer": return ASTMutation(node, "1")
+
+        stats, mutants = self.profile([replace_zero])
+        self.assertEqual(len(mutants), 2)
+        self.assertEqual(stats.counters["mutants.CallableMutationOperator"], 2)
+
+    def test_before_filters(self):
+        stats, mutants = self.profile(["ROR"], lines = [(3, 3)])
+        self.assertEqual(stats.counters["mutants"], len(mutants))
+        self.assertGreaterEqual(stats.counters["mutants.ROR"], len(mutants))
+        self.assertIn("Mutants emitted", stats.format())
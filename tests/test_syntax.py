@@ -0,0 +1,133 @@
+import os
+
+from glob import glob
+from unittest import TestCase
+
+import code_ast as ca
+
+import code_mutate
+from code_mutate import mutate
+from code_mutate.mutation import Mutation, SourceBuffer
+from code_mutate.syntax import SyntaxFilter, source_text
+
+
+SOURCE = """
+def add(x, y):
+    if x > 100 and y < 0:
+        return x + y
+    return x - y
+"""
+
+# Line endings and form feeds that are lost by joining the source lines of an AST
+CRLF_SOURCE = "\n\n# Header\r\ndef add(x, y):\r\n    return x + y\r\n\x0c\n\ndef sub(x, y):\r\n    if x > y:\r\n        return x - y\r\n    return y - x\r\n"
+
+UNICODE_SOURCE = """
+GREETING = "grüße, 世界"
+
+def shout(text = "ünïcödé"):
+    return text.upper() + "!"   # ✓
+"""
+
+
+def _reparse_valid(buffer, mutation):
+    # Reference: parse the complete mutated module from scratch
+    target_code, _ = mutation.apply(buffer)
+    target_ast  = ca.ast(target_code, lang = "python", syntax_error = "ignore")
+    return not target_ast.source_tree.root_node.has_error
+
+
+def _package_sources():
+    # Small modules only, the reference parses every mutant from scratch
+    package_dir = os.path.dirname(code_mutate.__file__)
+    for file_path in sorted(glob(os.path.join(package_dir, "**", "*.py"), recursive = True)):
+        with open(file_path, "r") as f:
+            source_code = f.read()
+        if source_code.count("\n") < 150: yield source_code
+
+
+class SyntaxFilterTest(TestCase):
+
+    def assertReparse(self, source_code, mutations):
+        buffer = SourceBuffer(source_code)
+        syntax_filter = SyntaxFilter(buffer)
+
+        for mutation in mutations:
+            self.assertEqual(syntax_filter.is_valid(mutation), _reparse_valid(buffer, mutation),
+                             msg = repr(mutation))
+
+    def test_invalid_mutants(self):
+        mutations = [
+            Mutation((2, 9, 2, 10), "<"),     # if x < 100 ...
+            Mutation((2, 9, 2, 10), "=<"),
+            Mutation((3, 15, 3, 16), "+ +"),    # unary plus
+            Mutation((3, 15, 3, 16), ")"),
+            Mutation((4, 4, 4, 16), "return x y"),
+            Mutation((1, 0, 1, 3), "class"),
+        ]
+        self.assertReparse(SOURCE, mutations)
+        self.assertEqual([SyntaxFilter(SOURCE).is_valid(m) for m in mutations],
+                         [True, False, True, False, False, True])
+
+    def test_generated_mutants(self):
+        self.assertReparse(SOURCE, mutate(SOURCE, lang = "python"))
+
+    def test_package_sources(self):
+        for source_code in _package_sources():
+            self.assertReparse(source_code, mutate(source_code, lang = "python"))
+
+    def test_unicode_source(self):
+        mutations = list(mutate(UNICODE_SOURCE, lang = "python"))
+        # Columns after non-ASCII characters differ from byte offsets
+        mutations += [Mutation((3, 26, 3, 27), "]"), Mutation((3, 26, 3, 27), "):"),
+                      Mutation((1, 21, 1, 22), "\""), Mutation((1, 21, 1, 22), "\" +")]
+        self.assertReparse(UNICODE_SOURCE, mutations)
+
+    def test_source_with_errors(self):
+        syntax_filter = SyntaxFilter("def f(:\n    return 1\n")
+        self.assertFalse(syntax_filter.enabled)
+        self.assertTrue(syntax_filter.check(Mutation((1, 11, 1, 12), "+")))
+        self.assertEqual(syntax_filter.invalid, 0)
+
+    def test_invalid_counter(self):
+        syntax_filter = SyntaxFilter(SOURCE)
+        mutations = [Mutation((2, 9, 2, 10), "<"), Mutation((2, 9, 2, 10), "=<"),
+                     Mutation((3, 15, 3, 16), ")")]
+
+        self.assertEqual(list(syntax_filter.filter(mutations)), mutations[:1])
+        self.assertEqual(syntax_filter.invalid, 2)
+
+    def test_mutate_validate(self):
+        buffer = SourceBuffer(SOURCE)
+        mutations = list(mutate(SOURCE, lang = "python"))
+        valid = [m for m in mutations if _reparse_valid(buffer, m)]
+
+        validated = list(mutate(SOURCE, lang = "python", validate = True))
+        self.assertEqual([(m.source_pos, m.target_text) for m in validated],
+                         [(m.source_pos, m.target_text) for m in valid])
+
+    def test_source_text(self):
+        for source_code in [SOURCE, UNICODE_SOURCE, CRLF_SOURCE]:
+            source_ast = ca.ast(source_code, lang = "python")
+            self.assertEqual(source_text(source_ast).strip(), source_code.strip())
+            self.assertEqual(len(source_text(source_ast).encode("utf-8")), len(source_code.encode("utf-8")))
+
+    def test_ast_input(self):
+        # Edits next to a carriage return are misplaced if the line endings are lost
+        crlf_mutations = [Mutation((3, 14, 3, 15), "pass"), Mutation((4, 17, 4, 18), "pass"),
+                          Mutation((11, 17, 11, 18), "x")]
+
+        for source_code, extra in [(SOURCE, []), (UNICODE_SOURCE, []), (CRLF_SOURCE, crlf_mutations)]:
+            source_ast = ca.ast(source_code, lang = "python")
+            syntax_filter = SyntaxFilter(source_ast = source_ast)
+
+            # The filter edits the tree of the AST instead of parsing the code again
+            self.assertIs(syntax_filter.tree, source_ast.source_tree)
+
+            mutations = list(mutate(source_code, lang = "python")) + extra
+            self.assertReparse(source_code, mutations)
+            self.assertEqual([syntax_filter.is_valid(m) for m in mutations],
+                             [SyntaxFilter(source_code).is_valid(m) for m in mutations])
+
+            validated = list(mutate(source_ast, lang = "python", validate = True))
+            self.assertEqual([(m.source_pos, m.target_text) for m in validated],
+                             [(m.source_pos, m.target_text) for m in mutate(source_code, lang = "python", validate = True)])